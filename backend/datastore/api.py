@@ -1,5 +1,4 @@
 import datetime
-import requests
 from typing import Any, List, Literal, Optional
 
 from epiweeks import Week
@@ -11,16 +10,13 @@ from django.views.decorators.csrf import csrf_exempt
 from django.db.utils import OperationalError
 from django.db.models import (
     F,
-    Avg,
     Sum,
-    Count,
-    Q,
-    Subquery,
-    OuterRef,
-    CharField,
+    Case,
+    When,
+    Value,
+    FloatField,
 )
-from django.db.models.functions import Round, Coalesce, Cast
-from django.core.cache import cache
+from django.db.models.functions import Cast, NullIf, Round
 
 
 from users.auth import UidKeyAuth
@@ -28,28 +24,110 @@ from main.schema import NotFoundSchema, InternalErrorSchema, BadRequestSchema
 from main.utils import UFs, UF_CODES, CODES_UF
 from main.models import APILog
 from registry.pagination import PagesPagination
-from vis.brasil.models import State, GeoMacroSaude
 from .models import (
-    Municipio,
     HistoricoAlerta,
     HistoricoAlertaZika,
     HistoricoAlertaChik,
     CopernicusBrasil,
-    CopernicusBrasilPrecipFixed,
+    CopernicusBrasilWeekly,
     ContaOvos,
-    Adm2,
-    EpiscannerSirParams,
+    PRECIP_FIXED_CUTOFF,
+    precip_column,
 )
-from datastore import schema, filters, models
-
+from datastore import schema, filters, models, export, episcanner
+from datastore.geography import geography
+from datastore.episcanner import DISEASE_ALERT_MODEL, DISEASE_CID10
+from datastore.caching import (
+    cached_result,
+    EPISCANNER_SOURCES,
+    HISTORICO_ALERTA,
+)
+from datastore.charts import (
+    WEEKLY_RANGE_DESCRIPTION,
+    contaovos_weekly,
+    eggs_density,
+    map_clusters,
+    map_states,
+    positivity,
+)
+from datastore.tasks import schedule_contaovos_live
 
-PRECIP_FIXED_CUTOFF = datetime.date(2026, 8, 1)
 
 router = Router(tags=["datastore"])
 
 paginator = PagesPagination
 uidkey_auth = UidKeyAuth()
 
+# Unique row keys, used by the cursor pagination and always kept on `fields`
+HISTORICO_ALERTA_KEY = ("data_iniSE", "municipio_geocodigo", "id")
+COPERNICUS_BRASIL_KEY = ("date", "geocodigo")
+CONTAOVOS_KEY = ("date", "counting_id")
+
+
+def project_fields(
+    queryset,
+    response_schema: Any,
+    fields: Optional[List[str]],
+    key_fields: tuple,
+):
+    """
+    Narrows the queryset to the requested columns (`?fields=a,b` or
+    `?fields=a&fields=b`), so only those are read from the database and
+    serialized. The row key is always included
+    """
+    if not fields:
+        return queryset
+
+    requested = {
+        f.strip() for value in fields for f in value.split(",") if f.strip()
+    }
+    unknown = requested - set(response_schema.model_fields)
+    if unknown:
+        raise HttpError(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    columns = [
+        f
+        for f in response_schema.model_fields
+        if f in requested or f in key_fields
+    ]
+    return queryset.values(*columns)
+
+
+def weighted_avg(field: str, weight: str):
+    """SUM(field * weight) / SUM(weight), over the rows where field is set"""
+    return Sum(F(field) * F(weight)) / NullIf(
+        Sum(Case(When(**{f"{field}__isnull": False}, then=F(weight)))), 0.0
+    )
+
+
+def aggregate_historico_alerta(queryset, region_code: int):
+    """
+    Weekly series of a region: the case counts and population are summed,
+    the incidence is recomputed and Rt is weighted by the population
+    """
+    # Aliased, as the annotations below override the original columns
+    queryset = queryset.alias(
+        _casos_est=F("casos_est"),
+        _pop=Cast("pop", FloatField()),
+        _rt=F("Rt"),
+    )
+    return (
+        queryset.values("data_iniSE", "SE")
+        .annotate(
+            municipio_geocodigo=Value(region_code),
+            casos=Sum("casos"),
+            casos_est=Sum("casos_est"),
+            casos_est_min=Sum("casos_est_min"),
+            casos_est_max=Sum("casos_est_max"),
+            pop=Sum("_pop"),
+            p_inc100k=Round(
+                Sum("_casos_est") * 100000 / NullIf(Sum("_pop"), 0.0), 4
+            ),
+            Rt=Round(weighted_avg("_rt", "_pop"), 4),
+        )
+        .order_by("data_iniSE")
+    )
+
 
 @router.get(
     "/vegetation/",
@@ -60,6 +138,7 @@ uidkey_auth = UidKeyAuth()
     },
     auth=uidkey_auth,
 )
+@cached_result("vegetation", "geography", log=True)
 @paginate(paginator)
 @csrf_exempt
 def get_vegetation_metrics(
@@ -98,8 +177,6 @@ def get_vegetation_metrics(
     ] = None,
     **kwargs,
 ):
-    APILog.from_request(request)
-
     try:
         data = models.VegetationIndexMetric.objects.using("infodengue").all()
     except OperationalError:
@@ -110,12 +187,7 @@ def get_vegetation_metrics(
         if uf_upper not in list(UFs):
             return 404, {"message": "Unknown UF. Format: SP"}
 
-        uf_name = UFs[uf]
-        geocodes = (
-            Municipio.objects.using("infodengue")
-            .filter(uf=uf_name)
-            .values_list("geocodigo", flat=True)
-        )
+        geocodes = geography().geocodes(uf_upper)
         data = data.filter(geocode__in=geocodes)
 
     data = filters.filter(data)
@@ -139,12 +211,7 @@ def get_infodengue_queryset(
     if uf:
         uf = uf.upper()  # type: ignore[no-redef]
         if uf in UFs:
-            uf_name = UFs[uf]
-            geocodes = (
-                Municipio.objects.using("infodengue")
-                .filter(uf=uf_name)
-                .values_list("geocodigo", flat=True)
-            )
+            geocodes = geography().geocodes(uf)
             qs = qs.filter(municipio_geocodigo__in=geocodes)
         else:
             raise ValueError("Invalid UF")
@@ -160,8 +227,10 @@ def get_infodengue_queryset(
         500: InternalErrorSchema,
     },
     auth=uidkey_auth,
+    exclude_unset=True,
 )
-@paginate(paginator)
+@cached_result(*HISTORICO_ALERTA, "geography", log=True)
+@paginate(paginator, cursor_fields=HISTORICO_ALERTA_KEY)
 @csrf_exempt
 def get_infodengue(
     request,
@@ -200,11 +269,17 @@ def get_infodengue(
         ]
     ] = None,
     # fmt: on
+    fields: Optional[List[str]] = Query(None),
+    aggregate: Optional[Literal["region"]] = None,
     **kwargs,
 ):
-    APILog.from_request(request)
     disease = disease.lower()  # type: ignore[assignment]
 
+    if aggregate and not uf:
+        raise HttpError(400, "`aggregate=region` requires `uf`")
+    if aggregate and fields:
+        raise HttpError(400, "`fields` can't be used with `aggregate`")
+
     try:
         data = get_infodengue_queryset(disease, uf)  # type: ignore[arg-type]
     except ValueError:
@@ -217,23 +292,28 @@ def get_infodengue(
 
     data = filters.filter(data)
 
-    return data
+    if aggregate:
+        region_code = UF_CODES[uf.upper()]  # type: ignore[union-attr]
+        return aggregate_historico_alerta(data, region_code)
+
+    return project_fields(
+        data, schema.HistoricoAlertaSchema, fields, HISTORICO_ALERTA_KEY
+    )
 
 
 @router.get(
-    "/climate/",
+    "/infodengue/export/",
     response={
-        200: List[schema.CopernicusBrasilSchema],
         404: NotFoundSchema,
         500: InternalErrorSchema,
     },
     auth=uidkey_auth,
 )
-@paginate(paginator)
 @csrf_exempt
-def get_copernicus_brasil(
+def export_infodengue(
     request,
-    filters: filters.CopernicusBrasilFilterSchema = Query(...),
+    disease: Literal["dengue", "zika", "chik", "chikungunya"],
+    filters: filters.HistoricoAlertaFilterSchema = Query(...),
     # fmt: off
     uf: Optional[
         Literal[
@@ -267,84 +347,48 @@ def get_copernicus_brasil(
         ]
     ] = None,
     # fmt: on
-    precip_fixed: bool = Query(True),
-    **kwargs,
+    format: export.ExportFormat = "ndjson",
 ):
     APILog.from_request(request)
+    disease = disease.lower()  # type: ignore[assignment]
+
     try:
-        data = CopernicusBrasil.objects.using("infodengue").all()
+        data = get_infodengue_queryset(disease, uf)  # type: ignore[arg-type]
+    except ValueError:
+        return 404, {"message": f"Unknown UF '{uf}'"}
     except OperationalError:
         return 500, {"message": "Server error. Please contact the moderation"}
 
+    if data is None:
+        return 404, {"message": f"Unknown disease '{disease}'"}
+
+    data = filters.filter(data).order_by("data_iniSE", "municipio_geocodigo")
+
+    return export.stream_queryset(
+        data,
+        schema=schema.HistoricoAlertaSchema,
+        fmt=format,
+        filename=f"infodengue_{disease}_{filters.start}_{filters.end}",
+    )
+
+
+def get_copernicus_brasil_queryset(
+    filters: filters.CopernicusBrasilFilterSchema,
+    uf: Optional[str] = None,
+    precip_fixed: bool = True,
+):
+    data = CopernicusBrasil.objects.using("infodengue").all()
+
     if uf:
-        uf = uf.upper()  # type: ignore[assignment,no-redef]
-        if uf not in list(UFs):
-            return 404, {"message": "Unkown UF. Format: SP"}
-        uf_name = UFs[uf]
-        geocodes = (
-            Municipio.objects.using("infodengue")
-            .filter(uf=uf_name)
-            .values_list("geocodigo", flat=True)
-        )
+        uf = uf.upper()  # type: ignore[no-redef]
+        if uf not in UFs:
+            raise ValueError("Invalid UF")
+        geocodes = geography().geocodes(uf)
         data = data.filter(geocodigo__in=geocodes)
 
     data = filters.filter(data)
 
     if precip_fixed and filters.start < PRECIP_FIXED_CUTOFF:
-        data = data.annotate(
-            _pf_min=Coalesce(
-                Subquery(
-                    CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                    .filter(
-                        date=OuterRef("date"),
-                        geocode=Cast(
-                            OuterRef("geocodigo"), output_field=CharField()
-                        ),
-                    )
-                    .values("precip_min")[:1]
-                ),
-                F("precip_min"),
-            ),
-            _pf_med=Coalesce(
-                Subquery(
-                    CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                    .filter(
-                        date=OuterRef("date"),
-                        geocode=Cast(
-                            OuterRef("geocodigo"), output_field=CharField()
-                        ),
-                    )
-                    .values("precip_med")[:1]
-                ),
-                F("precip_med"),
-            ),
-            _pf_max=Coalesce(
-                Subquery(
-                    CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                    .filter(
-                        date=OuterRef("date"),
-                        geocode=Cast(
-                            OuterRef("geocodigo"), output_field=CharField()
-                        ),
-                    )
-                    .values("precip_max")[:1]
-                ),
-                F("precip_max"),
-            ),
-            _pf_tot=Coalesce(
-                Subquery(
-                    CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                    .filter(
-                        date=OuterRef("date"),
-                        geocode=Cast(
-                            OuterRef("geocodigo"), output_field=CharField()
-                        ),
-                    )
-                    .values("precip_tot")[:1]
-                ),
-                F("precip_tot"),
-            ),
-        )
         data = data.values(  # type: ignore[assignment]
             "date",
             "geocodigo",
@@ -359,15 +403,144 @@ def get_copernicus_brasil(
             "umid_med",
             "umid_max",
         ).annotate(
-            precip_min=F("_pf_min"),
-            precip_med=F("_pf_med"),
-            precip_max=F("_pf_max"),
-            precip_tot=F("_pf_tot"),
+            precip_min=precip_column("precip_min", filters.start),
+            precip_med=precip_column("precip_med", filters.start),
+            precip_max=precip_column("precip_max", filters.start),
+            precip_tot=precip_column("precip_tot", filters.start),
         )
 
     return data
 
 
+@router.get(
+    "/climate/",
+    response={
+        200: List[schema.CopernicusBrasilSchema],
+        404: NotFoundSchema,
+        500: InternalErrorSchema,
+    },
+    auth=uidkey_auth,
+    exclude_unset=True,
+)
+@cached_result("copernicus_brasil", "geography", log=True)
+@paginate(paginator, cursor_fields=COPERNICUS_BRASIL_KEY)
+@csrf_exempt
+def get_copernicus_brasil(
+    request,
+    filters: filters.CopernicusBrasilFilterSchema = Query(...),
+    # fmt: off
+    uf: Optional[
+        Literal[
+            "AC",
+            "AL",
+            "AP",
+            "AM",
+            "BA",
+            "CE",
+            "ES",
+            "GO",
+            "MA",
+            "MT",
+            "MS",
+            "MG",
+            "PA",
+            "PB",
+            "PR",
+            "PE",
+            "PI",
+            "RJ",
+            "RN",
+            "RS",
+            "RO",
+            "RR",
+            "SC",
+            "SP",
+            "SE",
+            "TO",
+            "DF",
+        ]
+    ] = None,
+    # fmt: on
+    precip_fixed: bool = Query(True),
+    fields: Optional[List[str]] = Query(None),
+    **kwargs,
+):
+    try:
+        data = get_copernicus_brasil_queryset(filters, uf, precip_fixed)
+    except ValueError:
+        return 404, {"message": "Unkown UF. Format: SP"}
+    except OperationalError:
+        return 500, {"message": "Server error. Please contact the moderation"}
+
+    return project_fields(
+        data, schema.CopernicusBrasilSchema, fields, COPERNICUS_BRASIL_KEY
+    )
+
+
+@router.get(
+    "/climate/export/",
+    response={
+        404: NotFoundSchema,
+        500: InternalErrorSchema,
+    },
+    auth=uidkey_auth,
+)
+@csrf_exempt
+def export_copernicus_brasil(
+    request,
+    filters: filters.CopernicusBrasilFilterSchema = Query(...),
+    # fmt: off
+    uf: Optional[
+        Literal[
+            "AC",
+            "AL",
+            "AP",
+            "AM",
+            "BA",
+            "CE",
+            "ES",
+            "GO",
+            "MA",
+            "MT",
+            "MS",
+            "MG",
+            "PA",
+            "PB",
+            "PR",
+            "PE",
+            "PI",
+            "RJ",
+            "RN",
+            "RS",
+            "RO",
+            "RR",
+            "SC",
+            "SP",
+            "SE",
+            "TO",
+            "DF",
+        ]
+    ] = None,
+    # fmt: on
+    precip_fixed: bool = Query(True),
+    format: export.ExportFormat = "ndjson",
+):
+    APILog.from_request(request)
+    try:
+        data = get_copernicus_brasil_queryset(filters, uf, precip_fixed)
+    except ValueError:
+        return 404, {"message": "Unkown UF. Format: SP"}
+    except OperationalError:
+        return 500, {"message": "Server error. Please contact the moderation"}
+
+    return export.stream_queryset(
+        data.order_by("date", "geocodigo"),
+        schema=schema.CopernicusBrasilSchema,
+        fmt=format,
+        filename=f"climate_{filters.start}_{filters.end}",
+    )
+
+
 @router.get(
     "/climate/weekly/",
     response={
@@ -378,6 +551,7 @@ def get_copernicus_brasil(
     },
     auth=uidkey_auth,
 )
+@cached_result("copernicus_brasil_weekly", "geography", log=True)
 @paginate(paginator)
 @csrf_exempt
 def get_copernicus_brasil_weekly(
@@ -386,7 +560,6 @@ def get_copernicus_brasil_weekly(
     filters: filters.CopernicusBrasilWeeklyFilterSchema = Query(...),
     **kwargs,
 ):
-    APILog.from_request(request)
     if not params.geocode and not params.macro_health_code and not params.uf:
         # NOTE: raising a HttpError is a workaround (django-ninja/issues/940)
         raise HttpError(
@@ -403,37 +576,30 @@ def get_copernicus_brasil_weekly(
             "the request must contain `geocode` or `macro_health_code` or `uf`",
         )
 
+    if params.aggregate and params.geocode:
+        raise HttpError(
+            400, "`aggregate=region` requires `uf` or `macro_health_code`"
+        )
+
+    geo = geography()
     if params.uf:
-        try:
-            state = State.objects.get(uf=params.uf.upper())
-        except State.DoesNotExist:
+        uf = params.uf.upper()
+        geocodes = geo.geocodes(uf)
+        if not geocodes:
             raise HttpError(400, f"Unknown UF: `{params.uf}`")
-        geocodes = list(
-            Municipio.objects.using("infodengue")
-            .filter(uf=state.name)
-            .values_list("geocodigo", flat=True)
-        )
+        region_code = UF_CODES[uf]
     elif params.macro_health_code:
-        try:
-            geocodes = list(
-                GeoMacroSaude.objects.get(geocode=params.macro_health_code)
-                .cities.all()
-                .values_list("geocode", flat=True)
-            )
-        except GeoMacroSaude.DoesNotExist:
+        region_code = params.macro_health_code
+        geocodes = geo.macro(params.macro_health_code)
+        if not geocodes:
             raise HttpError(
                 400,
                 f"Unknown Macro Health Geocode: `{params.macro_health_code}`",
             )
     else:
-        try:
-            geocodes = [
-                Municipio.objects.using("infodengue")
-                .get(geocodigo=params.geocode)
-                .geocodigo
-            ]
-        except Municipio.DoesNotExist:
+        if params.geocode not in geo:
             raise HttpError(400, f"Unknown geocode: `{params.geocode}`")
+        geocodes = [params.geocode]
 
     try:
         sweek = Week.fromstring(str(filters.start))
@@ -445,44 +611,69 @@ def get_copernicus_brasil_weekly(
     except ValueError as err:
         raise HttpError(400, f"`start` or `end` epiweek error: {err}")
 
+    if params.precip_fixed and sweek.startdate() < PRECIP_FIXED_CUTOFF:
+        precip_tot_field = "precip_tot_fixed_sum"
+    else:
+        precip_tot_field = "precip_tot_sum"
+
     try:
-        qs = CopernicusBrasil.objects.using("infodengue").filter(
-            date__gte=sweek.startdate(),
-            date__lte=eweek.enddate(),
+        qs = CopernicusBrasilWeekly.objects.filter(
             geocodigo__in=geocodes,
+            epiweek__gte=int(sweek.cdcformat()),
+            epiweek__lte=int(eweek.cdcformat()),
         )
 
-        if params.precip_fixed and sweek.startdate() < PRECIP_FIXED_CUTOFF:
-            qs = qs.annotate(
-                _precip_tot_fixed=Coalesce(
-                    Subquery(
-                        CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                        .filter(
-                            date=OuterRef("date"),
-                            geocode=Cast(
-                                OuterRef("geocodigo"),
-                                output_field=CharField(),
-                            ),
-                        )
-                        .values("precip_tot")[:1]
+        if params.aggregate:
+            # Means weighted by the municipalities' area. The region's
+            # precipitation is the weighted mean of their weekly totals
+            data = (
+                qs.alias(_precip_tot=F(precip_tot_field))
+                .values("epiweek")
+                .annotate(
+                    geocodigo=Value(region_code),
+                    temp_min_avg=Round(
+                        weighted_avg("temp_min_avg", "area"), 4
+                    ),
+                    temp_med_avg=Round(
+                        weighted_avg("temp_med_avg", "area"), 4
+                    ),
+                    temp_max_avg=Round(
+                        weighted_avg("temp_max_avg", "area"), 4
+                    ),
+                    temp_amplit_avg=Round(
+                        weighted_avg("temp_amplit_avg", "area"), 4
                     ),
-                    F("precip_tot"),
-                ),
+                    precip_tot_sum=Round(
+                        weighted_avg("_precip_tot", "area"), 4
+                    ),
+                    umid_min_avg=Round(
+                        weighted_avg("umid_min_avg", "area"), 4
+                    ),
+                    umid_med_avg=Round(
+                        weighted_avg("umid_med_avg", "area"), 4
+                    ),
+                    umid_max_avg=Round(
+                        weighted_avg("umid_max_avg", "area"), 4
+                    ),
+                )
+                .order_by("epiweek")
             )
-            precip_tot_ref = F("_precip_tot_fixed")
         else:
-            precip_tot_ref = F("precip_tot")
-
-        data = qs.values("epiweek", "geocodigo").annotate(
-            temp_min_avg=Round(Avg("temp_min"), 4),
-            temp_med_avg=Round(Avg("temp_med"), 4),
-            temp_max_avg=Round(Avg("temp_max"), 4),
-            temp_amplit_avg=Round(Avg(F("temp_max") - F("temp_min")), 4),
-            precip_tot_sum=Round(Sum(precip_tot_ref), 4),
-            umid_min_avg=Round(Avg("umid_min"), 4),
-            umid_med_avg=Round(Avg("umid_med"), 4),
-            umid_max_avg=Round(Avg("umid_max"), 4),
-        )
+            data = (
+                qs.order_by("geocodigo", "epiweek")
+                .values(
+                    "epiweek",
+                    "geocodigo",
+                    "temp_min_avg",
+                    "temp_med_avg",
+                    "temp_max_avg",
+                    "temp_amplit_avg",
+                    "umid_min_avg",
+                    "umid_med_avg",
+                    "umid_max_avg",
+                )
+                .annotate(precip_tot_sum=F(precip_tot_field))
+            )
     except OperationalError:
         raise HttpError(500, "Server error. Please contact the moderation")
 
@@ -493,42 +684,62 @@ def get_copernicus_brasil_weekly(
     "/mosquito/",
     response={
         200: List[schema.ContaOvosSchema],
-        404: NotFoundSchema,
-        500: InternalErrorSchema,
+        400: BadRequestSchema,
     },
     auth=uidkey_auth,
 )
+@cached_result("contaovos", log=True)
+@paginate(paginator, cursor_fields=CONTAOVOS_KEY)
 @csrf_exempt
 def get_contaovos(
     request,
     params: schema.ContaOvosParams = Query(...),
     municipality: Optional[str] = None,
+    **kwargs,
 ):
-    APILog.from_request(request)
-    url = "https://contaovos.com/pt-br/api/lastcountingpublic"
-    params = {
-        "date_start": params.date_start,
-        "date_end": params.date_end,
-        "page": params.page,
-        "state": params.state,
-        "municipality": municipality,
-    }
-    response = requests.get(url, params=params, timeout=20)
-
-    if response.status_code == 200:
-        data = response.json()
-        if not isinstance(data, list):
-            return 402, {"message": data}
-        return 200, [
-            schema.ContaOvosSchema(**i) for i in data if isinstance(i, dict)
-        ]
+    """
+    Ovitrap countings mirrored from the Contaovos API. Dates after the
+    last sync are loaded in the background, the request is answered with
+    the countings already stored
+    """
+    if params.date_start > params.date_end:
+        raise HttpError(400, "date_start must be before date_end")
+
+    schedule_contaovos_live(params.date_end)
+
+    data = ContaOvos.objects.filter(
+        date__range=(params.date_start, params.date_end)
+    )
 
-    try:
-        message = response.json()
-    except Exception:
-        message = response.text
+    if params.state:
+        state = params.state.upper()
+        if state not in UF_CODES:
+            raise HttpError(400, f"Unknown state: {params.state}")
+        data = data.filter(adm2__adm1=UF_CODES[state])
 
-    return response.status_code, {"message": message}
+    if municipality:
+        if municipality.isdigit():
+            data = data.filter(adm2=municipality)
+        else:
+            data = data.filter(adm2__name__iexact=municipality)
+
+    return data.values(
+        "counting_id",
+        "date",
+        "date_collect",
+        "eggs",
+        "latitude",
+        "longitude",
+        "ovitrap_id",
+        "ovitrap_website_id",
+        "time",
+        "week",
+        "year",
+        municipality=F("adm2__name"),
+        municipality_code=F("adm2_id"),
+        state_code=F("adm2__adm1_id"),
+        state_name=F("adm2__adm1__name"),
+    ).order_by(*CONTAOVOS_KEY)
 
 
 @router.get(
@@ -536,6 +747,7 @@ def get_contaovos(
     response=List[schema.EpiScannerSchema],
     auth=uidkey_auth,
 )
+@cached_result("episcanner", "geography", log=True)
 @csrf_exempt
 def get_episcanner(
     request,
@@ -572,77 +784,11 @@ def get_episcanner(
     ],
     year: int = datetime.datetime.now().year,
 ):
-    APILog.from_request(request)
-
-    cache_key = f"episcanner:{disease}:{uf}:{year}"
-    cached_data = cache.get(cache_key)
-    if cached_data is not None:
-        return 200, cached_data
-
-    cid10 = DISEASE_CID10[disease]
-
-    geocodes_in_state = [
-        int(g)
-        for g in Adm2.objects.filter(adm1__name=UFs[uf]).values_list(
-            "geocode", flat=True
-        )
-    ]
-
-    rows = (
-        EpiscannerSirParams.objects.using("infodengue")
-        .filter(
-            cid10=cid10,
-            year=year,
-            geocode__in=geocodes_in_state,
-        )
-        .values(
-            "cid10",
-            "geocode",
-            "year",
-            "ep_ini",
-            "ep_pw",
-            "ep_end",
-            "ep_dur",
-            "peak_week",
-            "beta",
-            "gamma",
-            "r0",
-            "total_cases",
-            "alpha",
-            "sum_res",
-        )
+    geo = geography()
+    params = episcanner.sir_params(
+        DISEASE_CID10[disease], geo.geocodes(uf), year=year
     )
-
-    adm2_names = {
-        a.geocode: a.name
-        for a in Adm2.objects.filter(
-            geocode__in=[str(g) for g in geocodes_in_state]
-        )
-    }
-
-    objs = [
-        schema.EpiScannerSchema(
-            disease=disease,
-            CID10=r["cid10"],
-            year=r["year"],
-            geocode=r["geocode"],
-            muni_name=adm2_names.get(str(r["geocode"]), ""),
-            peak_week=r["peak_week"],
-            beta=r["beta"],
-            gamma=r["gamma"],
-            R0=r["r0"],
-            total_cases=r["total_cases"],
-            alpha=r["alpha"],
-            sum_res=r["sum_res"],
-            ep_ini=r["ep_ini"],
-            ep_end=r["ep_end"],
-            ep_dur=r["ep_dur"],
-        )
-        for r in rows
-    ]
-
-    cache.set(cache_key, objs, timeout=86400)
-    return 200, objs
+    return 200, episcanner.sir_panel(params, disease, geo)
 
 
 @router.get(
@@ -650,6 +796,7 @@ def get_episcanner(
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
+@cached_result(*HISTORICO_ALERTA, "geography")
 def charts_infodengue_rt(
     request,
     disease: str,
@@ -680,6 +827,7 @@ def charts_infodengue_rt(
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
+@cached_result(*HISTORICO_ALERTA, "geography")
 def charts_infodengue_total_cases(
     request,
     disease: str,
@@ -707,6 +855,7 @@ def charts_infodengue_total_cases(
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
+@cached_result("copernicus_brasil")
 def charts_climate_daily_temperature(
     request, geocode: int, start: datetime.date, end: datetime.date
 ):
@@ -730,6 +879,7 @@ def charts_climate_daily_temperature(
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
+@cached_result("copernicus_brasil")
 def charts_climate_daily_accumulated_waterfall(
     request,
     geocode: int,
@@ -743,44 +893,10 @@ def charts_climate_daily_accumulated_waterfall(
         .order_by("date")
     )
 
-    if precip_fixed and start < PRECIP_FIXED_CUTOFF:
-        qs = qs.annotate(
-            _pf_tot=Coalesce(
-                Subquery(
-                    CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                    .filter(
-                        date=OuterRef("date"),
-                        geocode=Cast(
-                            OuterRef("geocodigo"),
-                            output_field=CharField(),
-                        ),
-                    )
-                    .values("precip_tot")[:1]
-                ),
-                F("precip_tot"),
-            ),
-            _pf_med=Coalesce(
-                Subquery(
-                    CopernicusBrasilPrecipFixed.objects.using("infodengue")
-                    .filter(
-                        date=OuterRef("date"),
-                        geocode=Cast(
-                            OuterRef("geocodigo"),
-                            output_field=CharField(),
-                        ),
-                    )
-                    .values("precip_med")[:1]
-                ),
-                F("precip_med"),
-            ),
-        )
-        qs = qs.values("date", "epiweek")  # type: ignore[assignment]
-        return qs.annotate(
-            precip_tot=F("_pf_tot"),
-            precip_med=F("_pf_med"),
-        )
-
-    return qs.values("date", "epiweek", "precip_tot", "precip_med")
+    return qs.values("date", "epiweek").annotate(
+        precip_tot=precip_column("precip_tot", start, precip_fixed),
+        precip_med=precip_column("precip_med", start, precip_fixed),
+    )
 
 
 @router.get(
@@ -789,6 +905,7 @@ def charts_climate_daily_accumulated_waterfall(
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
+@cached_result("copernicus_brasil")
 def charts_climate_daily_umid_press_med(
     request, geocode: int, start: datetime.date, end: datetime.date
 ):
@@ -810,7 +927,9 @@ def charts_climate_daily_umid_press_med(
     response=List[schema.EggsDensitySchema],
     auth=UidKeyAuth(),
     include_in_schema=False,
+    description=WEEKLY_RANGE_DESCRIPTION,
 )
+@cached_result("contaovos")
 def charts_contaovos(
     request,
     start: datetime.date,
@@ -818,26 +937,7 @@ def charts_contaovos(
     uf: Optional[str] = None,
     geocode: Optional[int] = None,
 ):
-    qs = ContaOvos.objects.filter(date__range=(start, end))
-
-    if uf:
-        qs = qs.filter(adm2__adm1=UF_CODES[uf.upper()])
-    elif geocode:
-        qs = qs.filter(adm2=geocode)
-
-    qs = (
-        qs.values("year", "week")  # type: ignore[assignment]
-        .annotate(total_eggs=Sum("eggs"))
-        .order_by("year", "week")
-    )
-
-    return [
-        {
-            "epiweek": f"{row['year']}-{str(row['week']).zfill(2)}",  # type: ignore[index]
-            "total_eggs": row["total_eggs"],  # type: ignore[index]
-        }
-        for row in qs
-    ]
+    return eggs_density(contaovos_weekly(start, end, uf=uf, geocode=geocode))
 
 
 @router.get(
@@ -845,46 +945,17 @@ def charts_contaovos(
     response=List[schema.PositivitySchema],
     auth=UidKeyAuth(),
     include_in_schema=False,
+    description=WEEKLY_RANGE_DESCRIPTION,
 )
+@cached_result("contaovos")
 def charts_contaovos_positivity(
     request,
     start: datetime.date,
     end: datetime.date,
     uf: Optional[str] = None,
 ):
-    qs = ContaOvos.objects.filter(date__range=(start, end))
-
-    if uf:
-        qs = qs.filter(adm2__adm1=UF_CODES[uf.upper()])
-
-    data = (
-        qs.annotate(group=F("adm2__name") if uf else F("adm2__adm1__geocode"))
-        .values("group")
-        .annotate(
-            total_traps=Count("ovitrap_website_id", distinct=True),
-            pos_traps=Count(
-                "ovitrap_website_id", distinct=True, filter=Q(eggs__gt=0)
-            ),
-        )
-    )
-
-    result = []
-    for row in data:
-        name = row["group"]
-        if not uf:
-            name = CODES_UF.get(int(name), str(name))
-        positivity = round(
-            (
-                (row["pos_traps"] / row["total_traps"] * 100)
-                if row["total_traps"]
-                else 0
-            ),
-            2,
-        )
-        result.append({"name": name, "positivity": positivity})
-
-    result.sort(key=lambda x: x["positivity"], reverse=True)
-    return result
+    qs = contaovos_weekly(start, end, uf=uf)
+    return positivity(qs, by_municipality=bool(uf))
 
 
 @router.get(
@@ -892,40 +963,15 @@ def charts_contaovos_positivity(
     response=List[schema.MapStateSchema],
     auth=UidKeyAuth(),
     include_in_schema=False,
+    description=WEEKLY_RANGE_DESCRIPTION,
 )
+@cached_result("contaovos")
 def charts_contaovos_map(
     request,
     start: datetime.date,
     end: datetime.date,
 ):
-    qs = ContaOvos.objects.filter(date__range=(start, end))
-
-    states = (
-        qs.annotate(state_code_num=F("adm2__adm1__geocode"))
-        .values("state_code_num")
-        .annotate(
-            total_eggs=Sum("eggs"),
-            trap_count=Count("ovitrap_website_id", distinct=True),
-            municipality_count=Count("adm2", distinct=True),
-        )
-    )
-
-    state_data = []
-    for row in states:
-        name = CODES_UF.get(
-            int(row["state_code_num"]),
-            str(row["state_code_num"]),
-        )
-        state_data.append(
-            {
-                "name": name,
-                "total_eggs": row["total_eggs"],
-                "trap_count": row["trap_count"],
-                "municipality_count": row["municipality_count"],
-            }
-        )
-
-    return state_data
+    return map_states(contaovos_weekly(start, end))
 
 
 @router.get(
@@ -934,6 +980,7 @@ def charts_contaovos_map(
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
+@cached_result("contaovos")
 def charts_contaovos_map_scatter(
     request,
     start: datetime.date,
@@ -974,6 +1021,26 @@ def charts_contaovos_map_scatter(
     return scatter_data
 
 
+@router.get(
+    "/charts/contaovos/map/clusters/",
+    response=List[schema.MapClusterSchema],
+    auth=UidKeyAuth(),
+    include_in_schema=False,
+)
+@cached_result("contaovos")
+def charts_contaovos_map_clusters(
+    request,
+    start: datetime.date,
+    end: datetime.date,
+    zoom: int = 4,
+    bbox: Optional[str] = None,
+):
+    try:
+        return map_clusters(start, end, zoom, bbox)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+
 @router.get(
     "/diseases/",
     response=List[schema.DiseaseOut],
@@ -1016,29 +1083,11 @@ def city_search(
     return qs
 
 
-DISEASE_ALERT_MODEL = {
-    "dengue": HistoricoAlerta,
-    "chikungunya": HistoricoAlertaChik,
-    "zika": HistoricoAlertaZika,
-}
-
-DISEASE_CID10 = {
-    "dengue": "A90",
-    "chikungunya": "A92.0",
-    "zika": "A92.5",
-}
-
-
 def _get_alert_geocodes_for_uf(uf: str):
     uf = uf.upper()
-    uf_name = UFs.get(uf)
-    if not uf_name:
+    if uf not in UFs:
         raise HttpError(404, f"Unknown UF: {uf}")
-
-    geocodes = Adm2.objects.filter(adm1__name=uf_name).values_list(
-        "geocode", flat=True
-    )
-    return [int(g) for g in geocodes]
+    return geography().geocodes(uf)
 
 
 def _get_alert_queryset(disease: str, uf: Optional[str] = None):
@@ -1072,6 +1121,7 @@ def episcanner_states(request):
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result(*HISTORICO_ALERTA, "geography")
 def episcanner_cities(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1106,38 +1156,15 @@ def episcanner_cities(
     ],
     year: int = datetime.datetime.now().year,
 ):
-    uf_name = UFs[uf]
-    adm2_geocodes = Adm2.objects.filter(adm1__name=uf_name).values_list(
-        "geocode", flat=True
+    geo = geography()
+    geocodes = geo.geocodes(uf)
+    totals = episcanner.yearly_totals(
+        episcanner.alerts(disease), geocodes, year, year
     )
-    geocodes_int = [int(g) for g in adm2_geocodes]
-
-    start_date = Week(year - 1, 45).startdate()
-    end_date = Week(year, 45).startdate()
-
-    qs = _get_alert_queryset(disease).filter(
-        municipio_geocodigo__in=geocodes_int,
-        data_iniSE__gte=start_date,
-        data_iniSE__lt=end_date,
+    return episcanner.cities_panel(
+        episcanner.year_totals(totals, year), geocodes, geo
     )
 
-    municipality_geocodes = (
-        qs.values_list("municipio_geocodigo", flat=True)
-        .distinct()
-        .order_by("municipio_geocodigo")
-    )
-    geocode_set = {str(g) for g in municipality_geocodes}
-
-    adm2_names = {
-        a.geocode: a.name for a in Adm2.objects.filter(geocode__in=geocode_set)
-    }
-
-    return [
-        {"geocode": str(g), "name": adm2_names.get(str(g), str(g))}
-        for g in sorted(geocodes_int)
-        if str(g) in geocode_set
-    ]
-
 
 @router.get(
     "/episcanner/parameters/",
@@ -1145,6 +1172,7 @@ def episcanner_cities(
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result("episcanner", *HISTORICO_ALERTA, "geography")
 def episcanner_parameters(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1178,88 +1206,57 @@ def episcanner_parameters(
         "DF",
     ],
 ):
-    cid10 = DISEASE_CID10[disease]
-
-    geocodes_in_state = [
-        int(g)
-        for g in Adm2.objects.filter(adm1__name=UFs[uf]).values_list(
-            "geocode", flat=True
-        )
-    ]
-
-    qs = (
-        EpiscannerSirParams.objects.using("infodengue")
-        .filter(cid10=cid10, geocode__in=geocodes_in_state)
-        .values(
-            "cid10",
-            "geocode",
-            "year",
-            "ep_ini",
-            "ep_pw",
-            "ep_end",
-            "ep_dur",
-            "peak_week",
-            "beta",
-            "gamma",
-            "r0",
-            "total_cases",
-            "alpha",
-            "sum_res",
-        )
+    geocodes = geography().geocodes(uf)
+    params = episcanner.sir_params(DISEASE_CID10[disease], geocodes)
+    reported = episcanner.reported_cases(
+        episcanner.alerts(disease), geocodes, {r["year"] for r in params}
     )
+    return episcanner.parameters_panel(params, reported)
 
-    rows = list(qs)
 
-    years = sorted({r["year"] for r in rows})
-    if years:
-        overall_start = Week(years[0] - 1, 45).startdate()
-        overall_end = Week(years[-1], 45).startdate()
-    else:
-        overall_start = overall_end = None
-
-    reported: dict[tuple, int] = {}
-    if overall_start and overall_end:
-        alert_qs = get_infodengue_queryset(disease)  # type: ignore[arg-type]
-        if alert_qs is not None:
-            week_ends = {y: Week(y, 45).startdate() for y in years}
-            sorted_years = sorted(years)
-            alert_rows = alert_qs.filter(
-                municipio_geocodigo__in=geocodes_in_state,
-                data_iniSE__gte=overall_start,
-                data_iniSE__lt=overall_end,
-            ).values("municipio_geocodigo", "data_iniSE", "casos")
-            for ar in alert_rows:
-                d = ar["data_iniSE"]
-                ep_year = None
-                for y in sorted_years:
-                    if d < week_ends[y]:
-                        ep_year = y
-                        break
-                if ep_year is None:
-                    ep_year = sorted_years[-1] + 1
-                key = (ar["municipio_geocodigo"], ep_year)
-                reported[key] = reported.get(key, 0) + (ar["casos"] or 0)
-
-    return [
-        schema.EpiScannerParameterSchema(
-            cid10=r["cid10"],
-            geocode=r["geocode"],
-            year=r["year"],
-            ep_ini=r["ep_ini"],
-            ep_pw=r["ep_pw"],
-            ep_end=r["ep_end"],
-            ep_dur=r["ep_dur"],
-            peak_week=r["peak_week"],
-            beta=r["beta"],
-            gamma=r["gamma"],
-            r0=r["r0"],
-            total_cases=r["total_cases"],
-            alpha=r["alpha"],
-            sum_res=r["sum_res"],
-            reported_cases=reported.get((r["geocode"], r["year"]), 0),
-        )
-        for r in rows
-    ]
+@router.get(
+    "/episcanner/bundle/",
+    response=schema.EpiScannerBundleSchema,
+    auth=uidkey_auth,
+    include_in_schema=False,
+)
+@cached_result(*EPISCANNER_SOURCES)
+def episcanner_bundle(
+    request,
+    disease: Literal["dengue", "zika", "chikungunya"],
+    uf: Literal[
+        "AC",
+        "AL",
+        "AP",
+        "AM",
+        "BA",
+        "CE",
+        "ES",
+        "GO",
+        "MA",
+        "MT",
+        "MS",
+        "MG",
+        "PA",
+        "PB",
+        "PR",
+        "PE",
+        "PI",
+        "RJ",
+        "RN",
+        "RS",
+        "RO",
+        "RR",
+        "SC",
+        "SP",
+        "SE",
+        "TO",
+        "DF",
+    ],
+    year: int = datetime.datetime.now().year,
+):
+    """Every Episcanner dashboard panel of the state, in one request"""
+    return episcanner.state_bundle(disease=disease, uf=uf, year=year)
 
 
 @router.get(
@@ -1268,6 +1265,7 @@ def episcanner_parameters(
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result(*HISTORICO_ALERTA)
 def episcanner_timeseries(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1310,6 +1308,7 @@ def episcanner_timeseries(
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result(*HISTORICO_ALERTA, "geography")
 def episcanner_top_cities(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1345,38 +1344,14 @@ def episcanner_top_cities(
     limit: int = 20,
     year: int = datetime.datetime.now().year,
 ):
-    start_date = Week(year - 1, 45).startdate()
-    end_date = Week(year, 45).startdate()
-    qs = _get_alert_queryset(disease, uf)
-
-    qs = qs.filter(
-        data_iniSE__gte=start_date,
-        data_iniSE__lt=end_date,
+    geo = geography()
+    totals = episcanner.yearly_totals(
+        episcanner.alerts(disease), geo.geocodes(uf), year, year
     )
-
-    aggregated = (
-        qs.values("municipio_geocodigo")
-        .annotate(total_transmissao=Sum("transmissao"))
-        .filter(total_transmissao__gt=0)
-        .order_by("-total_transmissao")[:limit]
+    return episcanner.top_cities_panel(
+        episcanner.year_totals(totals, year), geo, limit
     )
 
-    geocodes = [str(r["municipio_geocodigo"]) for r in aggregated]
-    adm2_names = {
-        a.geocode: a.name for a in Adm2.objects.filter(geocode__in=geocodes)
-    }
-
-    return [
-        schema.EpiScannerTopCitySchema(
-            name_muni=adm2_names.get(
-                str(r["municipio_geocodigo"]), str(r["municipio_geocodigo"])
-            ),
-            transmissao=r["total_transmissao"],
-            geocode=str(r["municipio_geocodigo"]),
-        )
-        for r in aggregated
-    ]
-
 
 @router.get(
     "/episcanner/maps/weeks/",
@@ -1384,6 +1359,7 @@ def episcanner_top_cities(
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result(*HISTORICO_ALERTA, "geography", log=True)
 def episcanner_maps_weeks(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1418,28 +1394,10 @@ def episcanner_maps_weeks(
     ],
     year: int = datetime.datetime.now().year,
 ):
-    APILog.from_request(request)
-
-    start_date = Week(year - 1, 45).startdate()
-    end_date = Week(year, 45).startdate()
-    qs = _get_alert_queryset(disease, uf)
-
-    qs = qs.filter(
-        data_iniSE__gte=start_date,
-        data_iniSE__lt=end_date,
+    totals = episcanner.yearly_totals(
+        episcanner.alerts(disease), geography().geocodes(uf), year, year
     )
-
-    aggregated = qs.values("municipio_geocodigo").annotate(
-        sum_transmissao=Sum("transmissao")
-    )
-
-    return [
-        schema.EpiScannerMapsWeeksItem(
-            geocode=str(r["municipio_geocodigo"]),
-            transmissao=r["sum_transmissao"],
-        )
-        for r in aggregated
-    ]
+    return episcanner.maps_weeks_panel(episcanner.year_totals(totals, year))
 
 
 @router.get(
@@ -1448,6 +1406,7 @@ def episcanner_maps_weeks(
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result("episcanner", "geography")
 def episcanner_maps_r0(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1482,51 +1441,11 @@ def episcanner_maps_r0(
     ],
     year: int = datetime.datetime.now().year,
 ):
-    cid10 = DISEASE_CID10[disease]
-
-    geocodes_in_state = [
-        int(g)
-        for g in Adm2.objects.filter(adm1__name=UFs[uf]).values_list(
-            "geocode", flat=True
-        )
-    ]
-
-    params = (
-        EpiscannerSirParams.objects.using("infodengue")
-        .filter(
-            cid10=cid10,
-            year=year,
-            geocode__in=geocodes_in_state,
-        )
-        .annotate(r0_val=F("r0"))
-        .values("geocode", "r0_val")
-    )
-
-    top_r0 = sorted(params, key=lambda x: x["r0_val"], reverse=True)[:10]
-
-    top_geocodes = [str(r["geocode"]) for r in top_r0]
-    adm2_names = {
-        a.geocode: a.name
-        for a in Adm2.objects.filter(geocode__in=top_geocodes)
-    }
-
-    return schema.EpiScannerR0MapResponse(
-        r0Data=[
-            schema.EpiScannerR0MapItem(
-                geocode=str(r["geocode"]),
-                R0=r["r0_val"],
-            )
-            for r in params
-        ],
-        topR0=[
-            schema.EpiScannerR0MapItem(
-                geocode=str(r["geocode"]),
-                name=adm2_names.get(str(r["geocode"]), str(r["geocode"])),
-                R0=r["r0_val"],
-            )
-            for r in top_r0
-        ],
+    geo = geography()
+    params = episcanner.sir_params(
+        DISEASE_CID10[disease], geo.geocodes(uf), year=year
     )
+    return episcanner.maps_r0_panel(params, geo)
 
 
 @router.get(
@@ -1535,6 +1454,7 @@ def episcanner_maps_r0(
     auth=uidkey_auth,
     include_in_schema=False,
 )
+@cached_result("episcanner", *HISTORICO_ALERTA, "geography")
 def episcanner_maps_model_eval(
     request,
     disease: Literal["dengue", "zika", "chikungunya"],
@@ -1569,68 +1489,11 @@ def episcanner_maps_model_eval(
     ],
     year: int = datetime.datetime.now().year,
 ):
-    cid10 = DISEASE_CID10[disease]
-
-    sir_params = {
-        str(r["geocode"]): r["total_cases"]
-        for r in EpiscannerSirParams.objects.using("infodengue")
-        .filter(cid10=cid10, year=year)
-        .values("geocode", "total_cases")
-    }
-
-    start_date = Week(year - 1, 45).startdate()
-    end_date = Week(year, 45).startdate()
-    qs = _get_alert_queryset(disease, uf).filter(
-        data_iniSE__gte=start_date,
-        data_iniSE__lt=end_date,
+    geocodes = geography().geocodes(uf)
+    params = episcanner.sir_params(DISEASE_CID10[disease], geocodes, year=year)
+    totals = episcanner.yearly_totals(
+        episcanner.alerts(disease), geocodes, year, year
     )
-
-    observed = qs.values("municipio_geocodigo").annotate(
-        obs_cases=Sum("casos")
+    return episcanner.model_eval_panel(
+        episcanner.year_totals(totals, year), params
     )
-
-    rate_map = []
-    ratios = []
-    for r in observed:
-        geocode_str = str(r["municipio_geocodigo"])
-        total = sir_params.get(geocode_str)
-        obs = r["obs_cases"] or 0
-        if total and total > 0:
-            rate = obs / total
-        else:
-            rate = None
-        rate_map.append(
-            schema.EpiScannerModelEvalItem(
-                geocode=geocode_str,
-                observed_cases=obs,
-                total_cases=total or 0,
-                rate=round(rate, 4) if rate is not None else None,
-            )
-        )
-        if rate is not None:
-            ratios.append(rate)
-
-    if not ratios:
-        return schema.EpiScannerModelEvalResponse(rateMap=rate_map, table=[])
-
-    bins = [0, 0.5, 0.75, 1.0, 1.25, float("inf")]
-    bin_labels = ["<50%", "50-75%", "75-100%", "100-125%", ">125%"]
-    bin_counts = [0] * (len(bins) - 1)
-
-    for r in ratios:
-        for i in range(len(bins) - 1):
-            if bins[i] <= r < bins[i + 1]:
-                bin_counts[i] += 1
-                break
-
-    total = len(ratios)
-    table = [
-        schema.EpiScannerModelEvalBin(
-            range=label,
-            count=count,
-            percentage=round(count / total * 100, 1),
-        )
-        for label, count in zip(bin_labels, bin_counts)
-    ]
-
-    return schema.EpiScannerModelEvalResponse(rateMap=rate_map, table=table)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DatastoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "datastore"
+
+    def ready(self):
+        import datastore.signals  # noqa
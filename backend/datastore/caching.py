@@ -0,0 +1,221 @@
+"""
+Result cache for the read-only datastore and chart endpoints.
+
+Results are keyed by the endpoint and its parsed (normalized) parameters,
+plus the current watermark of every source table the endpoint reads. A
+watermark is a cheap probe (e.g. `max(data_iniSE)`) that changes when new
+data is loaded; it is shared through the cache and recomputed at most once
+every `WATERMARK_INTERVAL` seconds. After an ingest the watermark moves
+and the keys change; the previous result of each endpoint is served until
+the first request that missed has recomputed it (`main.cache`).
+
+The same key is sent as a strong ETag, so clients that send it back in
+`If-None-Match` get a `304 Not Modified` before the view runs and without
+rendering a body (see `main.api.NinjaAPI.create_response`).
+"""
+
+import json
+import hashlib
+import functools
+from typing import Any, Callable
+
+from pydantic import BaseModel
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max, QuerySet
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+
+from main.cache import single_flight
+from main.models import APILog
+from datastore import geography
+from datastore.models import (
+    HistoricoAlerta,
+    HistoricoAlertaChik,
+    HistoricoAlertaZika,
+    CopernicusBrasil,
+    CopernicusBrasilPrecipFixed,
+    CopernicusBrasilWeekly,
+    ContaOvos,
+    ContaOvosWeekly,
+    EpiscannerSirParams,
+    VegetationIndexMetric,
+)
+
+RESULT_TIMEOUT = 60 * 60 * 24
+WATERMARK_INTERVAL = 60  # seconds
+
+HISTORICO_ALERTA = (
+    "historico_alerta",
+    "historico_alerta_chik",
+    "historico_alerta_zika",
+)
+# Every table read by the Episcanner dashboard (`datastore.episcanner`)
+EPISCANNER_SOURCES = ("episcanner", *HISTORICO_ALERTA, "geography")
+
+
+def _probe(model, *aggregates, using: str = "infodengue") -> tuple:
+    return tuple(model.objects.using(using).aggregate(*aggregates).values())
+
+
+WATERMARKS: dict[str, Callable[[], Any]] = {
+    "historico_alerta": lambda: _probe(
+        HistoricoAlerta, Max("data_iniSE"), Max("id")
+    ),
+    "historico_alerta_chik": lambda: _probe(
+        HistoricoAlertaChik, Max("data_iniSE"), Max("id")
+    ),
+    "historico_alerta_zika": lambda: _probe(
+        HistoricoAlertaZika, Max("data_iniSE"), Max("id")
+    ),
+    "copernicus_brasil": lambda: (
+        _probe(CopernicusBrasil, Max("date"))
+        + _probe(CopernicusBrasilPrecipFixed, Max("date"))
+    ),
+    "copernicus_brasil_weekly": lambda: _probe(
+        CopernicusBrasilWeekly, Max("updated"), using="default"
+    ),
+    "contaovos": lambda: (
+        _probe(ContaOvos, Max("counting_id"), using="default")
+        + _probe(ContaOvosWeekly, Max("updated"), using="default")
+    ),
+    "episcanner": lambda: _probe(EpiscannerSirParams, Max("id"), Count("id")),
+    "vegetation": lambda: _probe(VegetationIndexMetric, Max("date")),
+    "geography": geography.current_version,
+}
+
+
+def watermark(source: str) -> Any:
+    return cache.get_or_set(
+        f"watermark:{source}", WATERMARKS[source], WATERMARK_INTERVAL
+    )
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return value
+
+
+def _digest(func: Callable, params: dict, *extra: Any) -> str:
+    raw = json.dumps(
+        [
+            f"{func.__module__}.{func.__qualname__}",
+            {k: _normalize(v) for k, v in params.items()},
+            *extra,
+        ],
+        cls=DjangoJSONEncoder,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def result_key(func: Callable, params: dict, sources: tuple) -> str:
+    return _digest(func, params, [watermark(s) for s in sources])
+
+
+def stale_key(func: Callable, params: dict) -> str:
+    """Key of the last result of `func(**params)`, for any watermark"""
+    return f"results:latest:{_digest(func, params)}"
+
+
+def etag_matches(request, etag: str) -> bool:
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    # If-None-Match uses the weak comparison
+    return etag in [e.removeprefix("W/") for e in etags]
+
+
+def set_etag(response, etag: str) -> None:
+    response["ETag"] = etag
+    # Clients may keep the body but must revalidate it on every use. Being
+    # `private` also keeps it out of the site-wide cache middleware, which
+    # would otherwise serve it for CACHE_MIDDLEWARE_SECONDS after an ingest
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def set_stale(response) -> None:
+    """Keeps a result served while it is recomputed out of any cache"""
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def materialize(result: Any) -> Any:
+    """Evaluates the querysets in a view result so it can be pickled"""
+    if isinstance(result, QuerySet):
+        return list(result)
+    if isinstance(result, dict):
+        return {k: materialize(v) for k, v in result.items()}
+    if isinstance(result, tuple):
+        return tuple(materialize(v) for v in result)
+    return result
+
+
+def _is_cacheable(result: Any) -> bool:
+    if result is None:
+        return False
+    if isinstance(result, tuple) and isinstance(result[0], int):
+        return result[0] == 200  # (status, data)
+    return True
+
+
+def cached_result(*sources: str, log: bool = False):
+    """
+    Caches the view result until one of the `sources` watermarks changes.
+    Concurrent misses are computed once (`main.cache.single_flight`), and
+    the previous result is served meanwhile after a watermark change.
+    Apply it right below the router decorator (above `@paginate`) so each
+    page is cached with its pagination parameters. With `log=True` the
+    request is logged to APILog, including the ones served from the cache
+    or answered with 304. `view.warm(**params)` precomputes the result of
+    a view that doesn't read the request, outside of one (e.g. in a task).
+    """
+    for source in sources:
+        if source not in WATERMARKS:
+            raise ValueError(f"Unknown watermark source: {source}")
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(request, *args, **kwargs):
+            if log:
+                APILog.from_request(request)
+
+            digest = result_key(func, kwargs, sources)
+            etag = quote_etag(digest)
+            if etag_matches(request, etag):
+                response = HttpResponseNotModified()
+                set_etag(response, etag)
+                return response
+
+            def compute():
+                result = func(request, *args, **kwargs)
+                return materialize(result) if _is_cacheable(result) else result
+
+            result, stale = single_flight(
+                f"results:{digest}",
+                compute,
+                RESULT_TIMEOUT,
+                stale_key=stale_key(func, kwargs),
+                cacheable=_is_cacheable,
+            )
+            # A result from before the last ingest is served while the new
+            # one is computed, without the (new) ETag
+            if stale:
+                request.stale_result = True
+            else:
+                request.etag = etag
+            return result
+
+        def warm(**params):
+            result, _ = single_flight(
+                f"results:{result_key(func, params, sources)}",
+                lambda: materialize(func(None, **params)),
+                RESULT_TIMEOUT,
+                stale_key=stale_key(func, params),
+                cacheable=_is_cacheable,
+            )
+            return result
+
+        wrapper.warm = warm
+        return wrapper
+
+    return decorator
@@ -0,0 +1,209 @@
+"""
+ContaOvos chart queries, answered from the ContaOvosWeekly rollup. Weeks
+are selected when any of their countings falls in the requested range.
+The map clusters are read from the daily ContaOvosGridCell bins.
+"""
+
+import math
+import datetime
+from typing import Optional
+
+from django.db.models import Count, F, QuerySet, Sum
+
+from main.utils import UF_CODES, CODES_UF
+from datastore.models import ContaOvos, ContaOvosGridCell, ContaOvosWeekly
+
+# Zooms up to CLUSTER_MAX_ZOOM are clustered, above it traps are returned
+CLUSTER_MAX_ZOOM = 11
+# Cell size at CLUSTER_MAX_ZOOM, 8 cells per 256px map tile. Each zoom out
+# doubles it, merging 2x2 cells
+CELL_DEGREES = 360 / 2 ** (CLUSTER_MAX_ZOOM + 3)
+# west, south, east, north
+BRAZIL_BBOX = (-74.0, -33.8, -34.8, 5.3)
+
+# Description of the endpoints answered with `contaovos_weekly`
+WEEKLY_RANGE_DESCRIPTION = (
+    "Countings are aggregated by epidemiological week. Every week with a "
+    "counting between `start` and `end` is included whole, so the first "
+    "and last weeks may include countings from before `start` or after "
+    "`end`."
+)
+
+
+def contaovos_weekly(
+    start: datetime.date,
+    end: datetime.date,
+    uf: Optional[str] = None,
+    geocode: Optional[int] = None,
+) -> QuerySet:
+    """Weeks with countings in [start, end], not clipped to the range"""
+    qs = ContaOvosWeekly.objects.filter(
+        start_date__lte=end, end_date__gte=start
+    )
+
+    if uf:
+        qs = qs.filter(adm2__adm1=UF_CODES[uf.upper()])
+    elif geocode:
+        qs = qs.filter(adm2=geocode)
+
+    return qs
+
+
+def eggs_density(qs: QuerySet) -> list[dict]:
+    rows = (
+        qs.values("year", "week")
+        .annotate(total_eggs=Sum("eggs"))
+        .order_by("year", "week")
+    )
+    return [
+        {
+            "epiweek": f"{row['year']}-{str(row['week']).zfill(2)}",
+            "total_eggs": row["total_eggs"],
+        }
+        for row in rows
+    ]
+
+
+def positivity(qs: QuerySet, by_municipality: bool) -> list[dict]:
+    """
+    Share of the distinct traps with eggs, by municipality or by state. The
+    trap arrays of the weeks are merged, so a trap is counted once
+    """
+    group = "adm2__name" if by_municipality else "adm2__adm1_id"
+    traps: dict[str, set] = {}
+    positive: dict[str, set] = {}
+    for name, week_traps, week_positive in qs.values_list(
+        group, "traps", "positive_traps"
+    ):
+        traps.setdefault(name, set()).update(week_traps)
+        positive.setdefault(name, set()).update(week_positive)
+
+    result = []
+    for name, group_traps in traps.items():
+        ratio = len(positive[name]) / len(group_traps) if group_traps else 0
+        if not by_municipality:
+            name = CODES_UF.get(int(name), str(name))
+        result.append({"name": name, "positivity": round(ratio * 100, 2)})
+
+    result.sort(key=lambda x: x["positivity"], reverse=True)
+    return result
+
+
+def map_states(qs: QuerySet) -> list[dict]:
+    states: dict[str, dict] = {}
+    for state, adm2, eggs, week_traps in qs.values_list(
+        "adm2__adm1_id", "adm2_id", "eggs", "traps"
+    ):
+        row = states.setdefault(
+            state, {"total_eggs": 0, "traps": set(), "municipalities": set()}
+        )
+        row["total_eggs"] += eggs
+        row["traps"].update(week_traps)
+        row["municipalities"].add(adm2)
+
+    return [
+        {
+            "name": CODES_UF.get(int(state), str(state)),
+            "total_eggs": row["total_eggs"],
+            "trap_count": len(row["traps"]),
+            "municipality_count": len(row["municipalities"]),
+        }
+        for state, row in states.items()
+    ]
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple[int, int]:
+    return (
+        math.floor((longitude + 180) / CELL_DEGREES),
+        math.floor((latitude + 90) / CELL_DEGREES),
+    )
+
+
+def parse_bbox(bbox: Optional[str]) -> tuple[float, float, float, float]:
+    """`west,south,east,north`, clipped to Brazil"""
+    if not bbox:
+        return BRAZIL_BBOX
+
+    try:
+        west, south, east, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be `west,south,east,north`")
+
+    if west >= east or south >= north:
+        raise ValueError("bbox must be `west,south,east,north`")
+
+    return (
+        max(west, BRAZIL_BBOX[0]),
+        max(south, BRAZIL_BBOX[1]),
+        min(east, BRAZIL_BBOX[2]),
+        min(north, BRAZIL_BBOX[3]),
+    )
+
+
+def map_clusters(
+    start: datetime.date,
+    end: datetime.date,
+    zoom: int,
+    bbox: Optional[str] = None,
+) -> list[dict]:
+    """
+    Countings in `bbox` grouped in grid cells of the `zoom` level, with
+    their centroid, amount of countings and eggs. Above CLUSTER_MAX_ZOOM
+    each trap is returned with its readings summed
+    """
+    west, south, east, north = parse_bbox(bbox)
+
+    if zoom > CLUSTER_MAX_ZOOM:
+        traps = (
+            ContaOvos.objects.filter(
+                date__range=(start, end),
+                latitude__range=(south, north),
+                longitude__range=(west, east),
+            )
+            .values("ovitrap_website_id", "latitude", "longitude")
+            .annotate(
+                municipality=F("adm2__name"),
+                countings=Count("counting_id"),
+                total_eggs=Sum("eggs"),
+            )
+        )
+        return [
+            {
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+                "count": row["countings"],
+                "eggs": row["total_eggs"],
+                "trap_id": row["ovitrap_website_id"],
+                "municipality": row["municipality"],
+            }
+            for row in traps
+        ]
+
+    # Cell indexes are non negative, so the integer division merges them
+    size = 2 ** (CLUSTER_MAX_ZOOM - max(zoom, 0))
+    x0, y0 = grid_cell(south, west)
+    x1, y1 = grid_cell(north, east)
+
+    cells = (
+        ContaOvosGridCell.objects.filter(
+            date__range=(start, end),
+            x__range=(x0, x1),
+            y__range=(y0, y1),
+        )
+        .values(cx=F("x") / size, cy=F("y") / size)
+        .annotate(
+            total_countings=Sum("countings"),
+            total_eggs=Sum("eggs"),
+            latitudes=Sum("latitude_sum"),
+            longitudes=Sum("longitude_sum"),
+        )
+    )
+    return [
+        {
+            "latitude": row["latitudes"] / row["total_countings"],
+            "longitude": row["longitudes"] / row["total_countings"],
+            "count": row["total_countings"],
+            "eggs": row["total_eggs"],
+        }
+        for row in cells
+    ]
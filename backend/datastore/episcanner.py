@@ -0,0 +1,315 @@
+"""
+Episcanner panels. The epidemic year `y` runs from EW45 of `y - 1`
+(inclusive) to EW45 of `y` (exclusive).
+
+The alert panels are built from `yearly_totals`, the reported cases and
+transmission weeks of each (municipality, epidemic year) summed in one
+grouped scan, so `state_bundle` answers every dashboard panel of a state
+from a single pass over the alert table.
+"""
+
+import bisect
+import datetime
+from typing import Iterable
+
+import numpy as np
+from epiweeks import Week
+from django.db.models import Case, IntegerField, QuerySet, Sum, Value, When
+
+from datastore.geography import GeographyIndex, geography
+from datastore.models import (
+    EpiscannerSirParams,
+    HistoricoAlerta,
+    HistoricoAlertaChik,
+    HistoricoAlertaZika,
+)
+
+EPIDEMIC_YEAR_WEEK = 45
+
+DISEASE_ALERT_MODEL = {
+    "dengue": HistoricoAlerta,
+    "chikungunya": HistoricoAlertaChik,
+    "zika": HistoricoAlertaZika,
+}
+
+DISEASE_CID10 = {
+    "dengue": "A90",
+    "chikungunya": "A92.0",
+    "zika": "A92.5",
+}
+
+SIR_FIELDS = (
+    "cid10",
+    "geocode",
+    "year",
+    "ep_ini",
+    "ep_pw",
+    "ep_end",
+    "ep_dur",
+    "peak_week",
+    "beta",
+    "gamma",
+    "r0",
+    "total_cases",
+    "alpha",
+    "sum_res",
+)
+
+RATE_BINS = [0, 0.5, 0.75, 1.0, 1.25, float("inf")]
+RATE_LABELS = ["<50%", "50-75%", "75-100%", "100-125%", ">125%"]
+
+# (geocode, epidemic year) -> {"casos": ..., "transmissao": ...}
+Totals = dict[tuple[int, int], dict]
+
+
+def year_start(year: int) -> datetime.date:
+    return Week(year - 1, EPIDEMIC_YEAR_WEEK).startdate()
+
+
+def year_end(year: int) -> datetime.date:
+    return Week(year, EPIDEMIC_YEAR_WEEK).startdate()
+
+
+def epidemic_year(field: str, years: list[int]) -> Case:
+    """
+    SQL expression mapping the date `field` to the first of the (sorted)
+    `years` whose EW45 it precedes, or to the year after the last one
+    """
+    return Case(
+        *[When(**{f"{field}__lt": year_end(y)}, then=Value(y)) for y in years],
+        default=Value(years[-1] + 1),
+        output_field=IntegerField(),
+    )
+
+
+def alerts(disease: str) -> QuerySet:
+    return DISEASE_ALERT_MODEL[disease].objects.using("infodengue").all()
+
+
+def sir_params(cid10: str, geocodes, year: int | None = None) -> list[dict]:
+    qs = EpiscannerSirParams.objects.using("infodengue").filter(
+        cid10=cid10, geocode__in=geocodes
+    )
+    if year is not None:
+        qs = qs.filter(year=year)
+    return list(qs.values(*SIR_FIELDS))
+
+
+def yearly_totals(alerts: QuerySet, geocodes, first: int, last: int) -> Totals:
+    """Cases and transmission weeks per (geocode, epidemic year)"""
+    rows = (
+        alerts.filter(
+            municipio_geocodigo__in=geocodes,
+            data_iniSE__gte=year_start(first),
+            data_iniSE__lt=year_end(last),
+        )
+        .annotate(
+            ep_year=epidemic_year("data_iniSE", list(range(first, last + 1)))
+        )
+        .values("municipio_geocodigo", "ep_year")
+        .annotate(casos=Sum("casos"), transmissao=Sum("transmissao"))
+        .order_by()
+    )
+
+    return {
+        (r["municipio_geocodigo"], r["ep_year"]): {
+            "casos": r["casos"],
+            "transmissao": r["transmissao"],
+        }
+        for r in rows
+    }
+
+
+def year_totals(totals: Totals, year: int) -> dict[int, dict]:
+    return {g: t for (g, y), t in totals.items() if y == year}
+
+
+def fold_years(
+    totals: Totals, years: Iterable[int]
+) -> dict[tuple[int, int], int]:
+    """
+    Reported cases per (geocode, year) of the sorted `years`, each epidemic
+    year counted in the first of `years` that is not before it. Epidemic
+    years outside `years[0]..years[-1]` are left out, as in `reported_cases`
+    """
+    years = sorted(set(years))
+    if not years:
+        return {}
+    reported: dict[tuple[int, int], int] = {}
+    for (geocode, ep_year), total in totals.items():
+        i = bisect.bisect_left(years, ep_year)
+        if years[0] <= ep_year <= years[-1]:
+            key = (geocode, years[i])
+            reported[key] = reported.get(key, 0) + (total["casos"] or 0)
+    return reported
+
+
+def reported_cases(
+    alerts: QuerySet, geocodes, years: Iterable[int]
+) -> dict[tuple[int, int], int]:
+    """
+    Sum of the reported cases (`casos`) of each (geocode, epidemic year) in
+    `years`, grouped in the database
+    """
+    years = sorted(set(years))
+    if not years:
+        return {}
+    totals = yearly_totals(alerts, geocodes, years[0], years[-1])
+    return fold_years(totals, years)
+
+
+def sir_panel(
+    params: list[dict], disease: str, geo: GeographyIndex
+) -> list[dict]:
+    return [
+        {
+            "disease": disease,
+            "CID10": r["cid10"],
+            "year": r["year"],
+            "geocode": r["geocode"],
+            "muni_name": geo.name(r["geocode"]),
+            "peak_week": r["peak_week"],
+            "beta": r["beta"],
+            "gamma": r["gamma"],
+            "R0": r["r0"],
+            "total_cases": r["total_cases"],
+            "alpha": r["alpha"],
+            "sum_res": r["sum_res"],
+            "ep_ini": r["ep_ini"],
+            "ep_end": r["ep_end"],
+            "ep_dur": r["ep_dur"],
+        }
+        for r in params
+    ]
+
+
+def parameters_panel(
+    params: list[dict], reported: dict[tuple[int, int], int]
+) -> list[dict]:
+    return [
+        {
+            **r,
+            "reported_cases": reported.get((int(r["geocode"]), r["year"]), 0),
+        }
+        for r in params
+    ]
+
+
+def cities_panel(
+    totals: dict[int, dict], geocodes, geo: GeographyIndex
+) -> list[dict]:
+    return [
+        {"geocode": str(g), "name": geo.name(g, str(g))}
+        for g in geocodes
+        if g in totals
+    ]
+
+
+def top_cities_panel(
+    totals: dict[int, dict], geo: GeographyIndex, limit: int = 20
+) -> list[dict]:
+    top = sorted(
+        (
+            (g, t["transmissao"])
+            for g, t in totals.items()
+            if (t["transmissao"] or 0) > 0
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:limit]
+    return [
+        {
+            "name_muni": geo.name(g, str(g)),
+            "transmissao": transmissao,
+            "geocode": str(g),
+        }
+        for g, transmissao in top
+    ]
+
+
+def maps_weeks_panel(totals: dict[int, dict]) -> list[dict]:
+    return [
+        {"geocode": str(g), "transmissao": t["transmissao"]}
+        for g, t in totals.items()
+    ]
+
+
+def maps_r0_panel(params: list[dict], geo: GeographyIndex) -> dict:
+    top = sorted(params, key=lambda r: r["r0"], reverse=True)[:10]
+    return {
+        "r0Data": [
+            {"geocode": str(r["geocode"]), "R0": r["r0"]} for r in params
+        ],
+        "topR0": [
+            {
+                "geocode": str(r["geocode"]),
+                "name": geo.name(r["geocode"], str(r["geocode"])),
+                "R0": r["r0"],
+            }
+            for r in top
+        ],
+    }
+
+
+def model_eval_panel(totals: dict[int, dict], params: list[dict]) -> dict:
+    """Observed over SIR estimated cases, per municipality and binned"""
+    # `sir_params` geocodes are str (Adm2 key), `totals` ones are int
+    estimated = {int(r["geocode"]): r["total_cases"] for r in params}
+
+    rate_map = []
+    ratios = []
+    for geocode, t in totals.items():
+        total = estimated.get(geocode)
+        observed = t["casos"] or 0
+        rate = observed / total if total and total > 0 else None
+        rate_map.append(
+            {
+                "geocode": str(geocode),
+                "observed_cases": observed,
+                "total_cases": total or 0,
+                "rate": round(rate, 4) if rate is not None else None,
+            }
+        )
+        if rate is not None:
+            ratios.append(rate)
+
+    if not ratios:
+        return {"rateMap": rate_map, "table": []}
+
+    counts = np.histogram(ratios, bins=RATE_BINS)[0].tolist()
+    table = [
+        {
+            "range": label,
+            "count": count,
+            "percentage": round(count / len(ratios) * 100, 1),
+        }
+        for label, count in zip(RATE_LABELS, counts)
+    ]
+    return {"rateMap": rate_map, "table": table}
+
+
+def state_bundle(disease: str, uf: str, year: int, limit: int = 20) -> dict:
+    """
+    Every Episcanner panel of the state `uf` for the epidemic `year`. The
+    alert table is scanned once, from the first year with SIR parameters
+    """
+    geo = geography()
+    geocodes = geo.geocodes(uf)
+
+    params = sir_params(DISEASE_CID10[disease], geocodes)
+    params_year = [r for r in params if r["year"] == year]
+    years = sorted({r["year"] for r in params} | {year})
+
+    totals = yearly_totals(alerts(disease), geocodes, years[0], years[-1])
+    current = year_totals(totals, year)
+    reported = fold_years(totals, {r["year"] for r in params})
+
+    return {
+        "episcanner": sir_panel(params_year, disease, geo),
+        "cities": cities_panel(current, geocodes, geo),
+        "parameters": parameters_panel(params, reported),
+        "top_cities": top_cities_panel(current, geo, limit),
+        "maps_weeks": maps_weeks_panel(current),
+        "maps_r0": maps_r0_panel(params_year, geo),
+        "model_eval": model_eval_panel(current, params_year),
+    }
@@ -0,0 +1,152 @@
+import io
+import csv
+import json
+import math
+import datetime
+from decimal import Decimal
+from typing import Any, Iterator, Literal, Sequence, Type, get_args
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ninja import Schema
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+ExportFormat = Literal["ndjson", "csv", "arrow", "parquet"]
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+ARROW_TYPES = {
+    datetime.date: pa.date32(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    bool: pa.bool_(),
+}
+
+
+class Echo:
+    """File-like object that returns what is written, used by csv.writer"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def clean_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def arrow_schema(schema: Type[Schema]) -> pa.Schema:
+    """Maps the response Schema fields to typed Arrow columns"""
+    fields = []
+    for name, field in schema.model_fields.items():
+        annotation = field.annotation
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        nullable = bool(args)  # Optional[X]
+        if nullable:
+            annotation = args[0]
+        fields.append(pa.field(name, ARROW_TYPES[annotation], nullable))
+    return pa.schema(fields)
+
+
+def iter_rows(queryset, fields: Sequence[str]) -> Iterator[dict]:
+    """
+    Reads the queryset through a server-side cursor, keeping only
+    `EXPORT_CHUNK_SIZE` rows in memory at a time
+    """
+    rows = queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for row in rows:
+        yield {f: clean_value(row[f]) for f in fields}
+
+
+def iter_batches(queryset, schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+    columns: dict[str, list] = {f: [] for f in schema.names}
+    size = 0
+
+    for row in iter_rows(queryset, schema.names):
+        for f in schema.names:
+            columns[f].append(row[f])
+        size += 1
+
+        if size == EXPORT_CHUNK_SIZE:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {f: [] for f in schema.names}
+            size = 0
+
+    if size:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def iter_ndjson(queryset, fields: Sequence[str]) -> Iterator[str]:
+    for row in iter_rows(queryset, fields):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+def iter_csv(queryset, fields: Sequence[str]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in iter_rows(queryset, fields):
+        yield writer.writerow([row[f] for f in fields])
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def iter_arrow(queryset, schema: pa.Schema) -> Iterator[bytes]:
+    """Arrow IPC stream, one record batch per DB cursor chunk"""
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in iter_batches(queryset, schema):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def iter_parquet(queryset, schema: pa.Schema) -> Iterator[bytes]:
+    """Parquet file, one row group per DB cursor chunk"""
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in iter_batches(queryset, schema):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def stream_queryset(
+    queryset,
+    schema: Type[Schema],
+    fmt: ExportFormat,
+    filename: str,
+) -> StreamingHttpResponse:
+    fields = list(schema.model_fields)
+
+    content: Iterator[Any]
+    if fmt == "csv":
+        content = iter_csv(queryset, fields)
+    elif fmt == "arrow":
+        content = iter_arrow(queryset, arrow_schema(schema))
+    elif fmt == "parquet":
+        content = iter_parquet(queryset, arrow_schema(schema))
+    else:
+        content = iter_ndjson(queryset, fields)
+
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{fmt}"'
+    )
+    return response
@@ -0,0 +1,115 @@
+"""
+Read-only index of the Brazilian administrative geography, built once per
+worker from the Adm tables and shared by every request.
+
+The index is immutable: when Adm1, Adm2 or the cities' macro health
+regions change, a new version number is stored in the cache (see
+`datastore.signals`) and each worker rebuilds its copy the next time it
+checks the version, which happens at most every `CHECK_INTERVAL` seconds.
+"""
+
+import time
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core.cache import cache
+
+from main.utils import UFs
+from datastore.models import Adm2
+from vis.brasil.models import City
+
+VERSION_KEY = "geography:version"
+CHECK_INTERVAL = 60  # seconds
+
+EMPTY = array("q")
+
+_index: Optional["GeographyIndex"] = None
+_checked_at: float = 0.0
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class GeographyIndex:
+    version: int
+    uf_geocodes: dict[str, array]  # UF -> sorted municipality geocodes
+    macro_geocodes: dict[int, array]  # Macro health code -> sorted geocodes
+    names: dict[int, str]  # geocode -> municipality name
+    ufs: dict[int, str]  # geocode -> UF
+
+    def geocodes(self, uf: str) -> array:
+        return self.uf_geocodes.get(uf.upper(), EMPTY)
+
+    def macro(self, code: int) -> array:
+        return self.macro_geocodes.get(int(code), EMPTY)
+
+    def name(self, geocode: int | str, default: str = "") -> str:
+        return self.names.get(int(geocode), default)
+
+    def uf(self, geocode: int | str) -> Optional[str]:
+        return self.ufs.get(int(geocode))
+
+    def __contains__(self, geocode: int) -> bool:
+        return geocode in self.ufs
+
+
+def _sorted_arrays(groups: dict) -> dict:
+    return {k: array("q", sorted(v)) for k, v in groups.items()}
+
+
+def build_index(version: int) -> GeographyIndex:
+    name_to_uf = {name: uf for uf, name in UFs.items()}
+
+    names: dict[int, str] = {}
+    ufs: dict[int, str] = {}
+    by_uf: dict[str, list[int]] = {}
+    rows = Adm2.objects.filter(adm1__name__in=name_to_uf).values_list(
+        "geocode", "name", "adm1__name"
+    )
+    for geocode, name, adm1_name in rows:
+        uf = name_to_uf[adm1_name]
+        names[int(geocode)] = name
+        ufs[int(geocode)] = uf
+        by_uf.setdefault(uf, []).append(int(geocode))
+
+    by_macro: dict[int, list[int]] = {}
+    rows = City.objects.filter(macro_health__isnull=False).values_list(
+        "geocode", "macro_health_id"
+    )
+    for geocode, macro in rows:
+        by_macro.setdefault(int(macro), []).append(int(geocode))
+
+    return GeographyIndex(
+        version=version,
+        uf_geocodes=_sorted_arrays(by_uf),
+        macro_geocodes=_sorted_arrays(by_macro),
+        names=names,
+        ufs=ufs,
+    )
+
+
+def current_version() -> int:
+    return cache.get_or_set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate() -> None:
+    """Publishes a new version, making every worker rebuild its index"""
+    global _checked_at
+    cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    _checked_at = 0.0
+
+
+def geography() -> GeographyIndex:
+    global _index, _checked_at
+
+    index = _index
+    if index is not None and time.monotonic() - _checked_at < CHECK_INTERVAL:
+        return index
+
+    with _lock:
+        version = current_version()
+        if _index is None or _index.version != version:
+            _index = build_index(version)
+        _checked_at = time.monotonic()
+        return _index
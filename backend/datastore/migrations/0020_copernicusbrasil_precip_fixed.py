@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:00
+
+import datastore.models
+from django.db import migrations
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datastore", "0019_copernicusbrasilprecipfixed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="copernicusbrasil",
+            name="precip_fixed",
+            field=datastore.models.PrecipFixedRelation(
+                from_fields=["date"],
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="datastore.copernicusbrasilprecipfixed",
+                to_fields=["date"],
+            ),
+        ),
+    ]
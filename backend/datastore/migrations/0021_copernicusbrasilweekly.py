@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datastore", "0020_copernicusbrasil_precip_fixed"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CopernicusBrasilWeekly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("epiweek", models.IntegerField()),
+                ("geocodigo", models.BigIntegerField()),
+                ("temp_min_avg", models.FloatField(null=True)),
+                ("temp_med_avg", models.FloatField(null=True)),
+                ("temp_max_avg", models.FloatField(null=True)),
+                ("temp_amplit_avg", models.FloatField(null=True)),
+                ("precip_tot_sum", models.FloatField(null=True)),
+                ("precip_tot_fixed_sum", models.FloatField(null=True)),
+                ("umid_min_avg", models.FloatField(null=True)),
+                ("umid_med_avg", models.FloatField(null=True)),
+                ("umid_max_avg", models.FloatField(null=True)),
+                ("days", models.PositiveSmallIntegerField()),
+                ("days_fixed", models.PositiveSmallIntegerField()),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Copernicus Brasil Weekly",
+                "indexes": [
+                    models.Index(
+                        fields=["epiweek"],
+                        name="idx_copernicus_weekly_epiweek",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="copernicusbrasilweekly",
+            constraint=models.UniqueConstraint(
+                fields=("geocodigo", "epiweek"),
+                name="uq_copernicus_weekly_geocode_epiweek",
+            ),
+        ),
+    ]
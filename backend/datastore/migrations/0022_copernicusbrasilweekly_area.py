@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datastore", "0021_copernicusbrasilweekly"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="copernicusbrasilweekly",
+            name="area",
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datastore", "0022_copernicusbrasilweekly_area"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestionState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("source", models.CharField(max_length=50, unique=True)),
+                ("high_water", models.DateField(null=True)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:00
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datastore", "0023_ingestionstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContaOvosWeekly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("year", models.PositiveSmallIntegerField()),
+                ("week", models.PositiveSmallIntegerField()),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("eggs", models.BigIntegerField()),
+                ("countings", models.PositiveIntegerField()),
+                ("trap_count", models.PositiveIntegerField()),
+                ("positive_trap_count", models.PositiveIntegerField()),
+                (
+                    "traps",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), size=None
+                    ),
+                ),
+                (
+                    "positive_traps",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), size=None
+                    ),
+                ),
+                ("updated", models.DateTimeField(auto_now=True)),
+                (
+                    "adm2",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="datastore.adm2",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ovitrap Counting Weekly",
+                "indexes": [
+                    models.Index(
+                        fields=["start_date", "end_date"],
+                        name="idx_contaovos_weekly_dates",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="contaovosweekly",
+            constraint=models.UniqueConstraint(
+                fields=("year", "week", "adm2"),
+                name="uq_contaovos_weekly_year_week_adm2",
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("datastore", "0024_contaovosweekly"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContaOvosGridCell",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("x", models.IntegerField()),
+                ("y", models.IntegerField()),
+                ("countings", models.PositiveIntegerField()),
+                ("eggs", models.BigIntegerField()),
+                ("latitude_sum", models.FloatField()),
+                ("longitude_sum", models.FloatField()),
+            ],
+            options={
+                "verbose_name": "Ovitrap Counting Grid Cell",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="contaovosgridcell",
+            constraint=models.UniqueConstraint(
+                fields=("date", "x", "y"), name="uq_contaovos_grid_date_x_y"
+            ),
+        ),
+    ]
@@ -1,6 +1,13 @@
+import datetime
+
 from django.db import models
+from django.db.models import F
+from django.db.models.expressions import Col
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import Exact
 from asgiref.sync import async_to_sync
 from django.utils.translation import gettext as _
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.postgres.indexes import GinIndex
 from .utils.fetch_icd import get_diseases
 
@@ -95,6 +102,85 @@ class ContaOvos(models.Model):
         ordering = ["-date"]
 
 
+class ContaOvosWeekly(models.Model):
+    """
+    Weekly rollup of the ovitrap countings per municipality, refreshed by
+    the ContaOvos sync. Trap ids are kept as sorted arrays so the distinct
+    traps of any range of weeks are the union of its rows
+    """
+
+    year = models.PositiveSmallIntegerField()  # type: ignore[var-annotated]
+    week = models.PositiveSmallIntegerField()  # type: ignore[var-annotated]
+    adm2 = models.ForeignKey("datastore.Adm2", on_delete=models.PROTECT)  # type: ignore[var-annotated]
+    # Dates of the first and last countings of the week
+    start_date = models.DateField()  # type: ignore[var-annotated]
+    end_date = models.DateField()  # type: ignore[var-annotated]
+    eggs = models.BigIntegerField()  # type: ignore[var-annotated]
+    countings = models.PositiveIntegerField()  # type: ignore[var-annotated]
+    trap_count = models.PositiveIntegerField()  # type: ignore[var-annotated]
+    positive_trap_count = models.PositiveIntegerField()  # type: ignore[var-annotated]
+    traps = ArrayField(models.IntegerField())  # type: ignore[var-annotated]
+    positive_traps = ArrayField(models.IntegerField())  # type: ignore[var-annotated]
+    updated = models.DateTimeField(auto_now=True)  # type: ignore[var-annotated]
+
+    class Meta:
+        verbose_name = "Ovitrap Counting Weekly"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["year", "week", "adm2"],
+                name="uq_contaovos_weekly_year_week_adm2",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["start_date", "end_date"],
+                name="idx_contaovos_weekly_dates",
+            )
+        ]
+
+
+class ContaOvosGridCell(models.Model):
+    """
+    Ovitrap countings of a day, binned in the grid cells of the map
+    clustering at its finest zoom (see `datastore.charts.map_clusters`).
+    Cells of coarser zooms are unions of these, so any zoom and bounding
+    box is answered by grouping the cells of the day range
+    """
+
+    date = models.DateField()  # type: ignore[var-annotated]
+    # Cell indexes, from (-180, -90)
+    x = models.IntegerField()  # type: ignore[var-annotated]
+    y = models.IntegerField()  # type: ignore[var-annotated]
+    countings = models.PositiveIntegerField()  # type: ignore[var-annotated]
+    eggs = models.BigIntegerField()  # type: ignore[var-annotated]
+    # Sum of the coordinates, for the centroid of merged cells
+    latitude_sum = models.FloatField()  # type: ignore[var-annotated]
+    longitude_sum = models.FloatField()  # type: ignore[var-annotated]
+
+    class Meta:
+        verbose_name = "Ovitrap Counting Grid Cell"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "x", "y"],
+                name="uq_contaovos_grid_date_x_y",
+            )
+        ]
+
+
+class IngestionState(models.Model):
+    """
+    High-water mark of an incremental load: every date up to `high_water`
+    has been fully ingested from `source`
+    """
+
+    source = models.CharField(max_length=50, unique=True)  # type: ignore[var-annotated]
+    high_water = models.DateField(null=True)  # type: ignore[var-annotated]
+    updated = models.DateTimeField(auto_now=True)  # type: ignore[var-annotated]
+
+    def __str__(self):
+        return f"{self.source} ({self.high_water})"
+
+
 class Adm0(models.Model):
     geocode = models.CharField(primary_key=True, max_length=3, unique=True)  # type: ignore[var-annotated]
     name = models.CharField(null=False, max_length=100)  # type: ignore[var-annotated]
@@ -456,6 +542,11 @@ class HistoricoAlertaZika(models.Model):
         db_table = '"Historico_alerta_zika"'
 
 
+# Precipitation before this date was reprocessed in
+# `copernicus_bra_precip_tot_fixed`
+PRECIP_FIXED_CUTOFF = datetime.date(2026, 8, 1)
+
+
 class CopernicusBrasilPrecipFixed(models.Model):
     date = models.DateField(db_column="date", primary_key=True)  # type: ignore[var-annotated]
     geocode = models.BigIntegerField(db_column="geocode")  # type: ignore[var-annotated]
@@ -469,6 +560,23 @@ class CopernicusBrasilPrecipFixed(models.Model):
         db_table = "copernicus_bra_precip_tot_fixed"
 
 
+class PrecipFixedRelation(models.ForeignObject):
+    """
+    LEFT JOIN copernicus_bra_precip_tot_fixed ON (date, geocode). The geocodes
+    are compared as text, as the column types differ between both tables
+    """
+
+    def get_extra_restriction(self, alias, related_alias):
+        geocode = self.related_model._meta.get_field("geocode")
+        geocodigo = self.model._meta.get_field("geocodigo")
+        return Exact(
+            Cast(Col(alias, geocode), output_field=models.TextField()),
+            Cast(
+                Col(related_alias, geocodigo), output_field=models.TextField()
+            ),
+        )
+
+
 class CopernicusBrasil(models.Model):
     date = models.DateField(db_column="date", primary_key=True)  # type: ignore[var-annotated]
     geocodigo = models.BigIntegerField(db_column="geocode")  # type: ignore[var-annotated]
@@ -486,7 +594,64 @@ class CopernicusBrasil(models.Model):
     umid_min = models.FloatField(db_column="umid_min")  # type: ignore[var-annotated]
     umid_med = models.FloatField(db_column="umid_med")  # type: ignore[var-annotated]
     umid_max = models.FloatField(db_column="umid_max")  # type: ignore[var-annotated]
+    precip_fixed = PrecipFixedRelation(  # type: ignore[var-annotated]
+        CopernicusBrasilPrecipFixed,
+        on_delete=models.DO_NOTHING,
+        from_fields=["date"],
+        to_fields=["date"],
+        null=True,
+        related_name="+",
+    )
 
     class Meta:
         managed = False
         db_table = "copernicus_bra"
+
+
+class CopernicusBrasilWeekly(models.Model):
+    """
+    Weekly rollup of copernicus_bra, refreshed by the
+    `refresh_copernicus_brasil_weekly` task
+    """
+
+    epiweek = models.IntegerField()  # type: ignore[var-annotated]
+    geocodigo = models.BigIntegerField()  # type: ignore[var-annotated]
+    temp_min_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    temp_med_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    temp_max_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    temp_amplit_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    precip_tot_sum = models.FloatField(null=True)  # type: ignore[var-annotated]
+    precip_tot_fixed_sum = models.FloatField(null=True)  # type: ignore[var-annotated]
+    umid_min_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    umid_med_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    umid_max_avg = models.FloatField(null=True)  # type: ignore[var-annotated]
+    # Municipality area (km²), weight of the regional means
+    area = models.FloatField(null=True)  # type: ignore[var-annotated]
+    # Source rows aggregated, used to detect changed epiweeks
+    days = models.PositiveSmallIntegerField()  # type: ignore[var-annotated]
+    days_fixed = models.PositiveSmallIntegerField()  # type: ignore[var-annotated]
+    updated = models.DateTimeField(auto_now=True)  # type: ignore[var-annotated]
+
+    class Meta:
+        verbose_name = "Copernicus Brasil Weekly"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["geocodigo", "epiweek"],
+                name="uq_copernicus_weekly_geocode_epiweek",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["epiweek"], name="idx_copernicus_weekly_epiweek"
+            )
+        ]
+
+
+def precip_column(field: str, start: datetime.date, fixed: bool = True):
+    """
+    CopernicusBrasil precipitation `field` expression. For periods starting
+    before PRECIP_FIXED_CUTOFF, the reprocessed value is used when available
+    """
+    if fixed and start < PRECIP_FIXED_CUTOFF:
+        return Coalesce(F(f"precip_fixed__{field}"), F(field))
+    return F(field)
@@ -1,6 +1,7 @@
-from typing import Optional, List
+from typing import Literal, Optional, List
 
 from datetime import date
+from django.utils.http import http_date
 from pydantic import BaseModel, field_validator
 from ninja import Field, Schema
 
@@ -48,54 +49,54 @@ class DengueGlobalSchema(Schema):
 
 class HistoricoAlertaSchema(Schema):
     data_iniSE: date
-    SE: Optional[int]
-    casos_est: Optional[float]
-    casos_est_min: Optional[int]
-    casos_est_max: Optional[int]
-    casos: Optional[int]
-    municipio_geocodigo: Optional[int]
-    p_rt1: Optional[float]
-    p_inc100k: Optional[float]
-    Localidade_id: Optional[int]
-    nivel: Optional[int]
-    id: Optional[int]
-    versao_modelo: Optional[str]
-    Rt: Optional[float]
-    municipio_nome: Optional[str]
-    pop: Optional[float]
-    tempmin: Optional[float]
-    umidmax: Optional[float]
-    receptivo: Optional[int]
-    transmissao: Optional[int]
-    nivel_inc: Optional[int]
-    umidmed: Optional[float]
-    umidmin: Optional[float]
-    tempmed: Optional[float]
-    tempmax: Optional[float]
-    casprov: Optional[int]
-    casprov_est: Optional[float]
-    casprov_est_min: Optional[int]
-    casprov_est_max: Optional[int]
-    casconf: Optional[int]
+    SE: Optional[int] = None
+    casos_est: Optional[float] = None
+    casos_est_min: Optional[int] = None
+    casos_est_max: Optional[int] = None
+    casos: Optional[int] = None
+    municipio_geocodigo: Optional[int] = None
+    p_rt1: Optional[float] = None
+    p_inc100k: Optional[float] = None
+    Localidade_id: Optional[int] = None
+    nivel: Optional[int] = None
+    id: Optional[int] = None
+    versao_modelo: Optional[str] = None
+    Rt: Optional[float] = None
+    municipio_nome: Optional[str] = None
+    pop: Optional[float] = None
+    tempmin: Optional[float] = None
+    umidmax: Optional[float] = None
+    receptivo: Optional[int] = None
+    transmissao: Optional[int] = None
+    nivel_inc: Optional[int] = None
+    umidmed: Optional[float] = None
+    umidmin: Optional[float] = None
+    tempmed: Optional[float] = None
+    tempmax: Optional[float] = None
+    casprov: Optional[int] = None
+    casprov_est: Optional[float] = None
+    casprov_est_min: Optional[int] = None
+    casprov_est_max: Optional[int] = None
+    casconf: Optional[int] = None
 
 
 class CopernicusBrasilSchema(Schema):
     date: date
     geocodigo: int
-    epiweek: int
-    temp_min: float
-    temp_med: float
-    temp_max: float
-    precip_min: float
-    precip_med: float
-    precip_max: float
-    precip_tot: float
-    pressao_min: float
-    pressao_med: float
-    pressao_max: float
-    umid_min: float
-    umid_med: float
-    umid_max: float
+    epiweek: Optional[int] = None
+    temp_min: Optional[float] = None
+    temp_med: Optional[float] = None
+    temp_max: Optional[float] = None
+    precip_min: Optional[float] = None
+    precip_med: Optional[float] = None
+    precip_max: Optional[float] = None
+    precip_tot: Optional[float] = None
+    pressao_min: Optional[float] = None
+    pressao_med: Optional[float] = None
+    pressao_max: Optional[float] = None
+    umid_min: Optional[float] = None
+    umid_med: Optional[float] = None
+    umid_max: Optional[float] = None
 
 
 class CopernicusBrasilWeeklyParams(BaseModel):
@@ -105,6 +106,7 @@ class CopernicusBrasilWeeklyParams(BaseModel):
     uf: Optional[str] = None
     # fmt: on
     precip_fixed: bool = True
+    aggregate: Optional[Literal["region"]] = None
 
     @field_validator("geocode")
     def validate_geocode(cls, value):
@@ -155,7 +157,7 @@ class CopernicusBrasilWeeklyParams(BaseModel):
 
 class CopernicusBrasilWeeklySchema(Schema):
     epiweek: int  # YYYYWW
-    geocodigo: int  # City or GeoMacroSaude
+    geocodigo: int  # City, UF or GeoMacroSaude
     temp_min_avg: float
     temp_med_avg: float
     temp_max_avg: float
@@ -170,8 +172,8 @@ class ContaOvosSchema(Schema):
     """https://contaovos.com/pt-br/api/lastcountingpublic"""
 
     counting_id: int
-    date: str
-    date_collect: Optional[str]
+    date: date
+    date_collect: Optional[date]  # type: ignore[valid-type]
     eggs: int
     latitude: float
     longitude: float
@@ -185,6 +187,11 @@ class ContaOvosSchema(Schema):
     week: int
     year: int
 
+    @staticmethod
+    def resolve_time(obj):
+        # RFC 1123, as sent by the Contaovos API
+        return http_date(obj["time"].timestamp())
+
 
 class EpiScannerSchema(Schema):
     disease: str
@@ -224,7 +231,6 @@ class Sprint202425Schema(Schema):
 class ContaOvosParams(BaseModel):
     date_start: date = Field(default_factory=lambda: date(2025, 1, 1))
     date_end: date = Field(default_factory=lambda: date(2025, 1, 30))
-    page: Optional[int] = Field(1)
     state: Optional[str] = Field("MG")
 
 
@@ -261,6 +267,15 @@ class MapScatterSchema(Schema):
     municipality: str
 
 
+class MapClusterSchema(Schema):
+    latitude: float
+    longitude: float
+    count: int
+    eggs: int
+    trap_id: Optional[int] = None
+    municipality: Optional[str] = None
+
+
 class MunAccWaterfallOut(Schema):
     date: date
     epiweek: int
@@ -362,3 +377,13 @@ class EpiScannerModelEvalBin(Schema):
 class EpiScannerModelEvalResponse(Schema):
     rateMap: List[EpiScannerModelEvalItem]
     table: List[EpiScannerModelEvalBin]
+
+
+class EpiScannerBundleSchema(Schema):
+    episcanner: List[EpiScannerSchema]
+    cities: List[EpiScannerCitySchema]
+    parameters: List[EpiScannerParameterSchema]
+    top_cities: List[EpiScannerTopCitySchema]
+    maps_weeks: List[EpiScannerMapsWeeksItem]
+    maps_r0: EpiScannerR0MapResponse
+    model_eval: EpiScannerModelEvalResponse
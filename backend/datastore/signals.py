@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from datastore import geography
+from datastore.models import Adm1, Adm2
+from vis.brasil.models import City
+
+
+@receiver(post_save, sender=Adm1)
+@receiver(post_delete, sender=Adm1)
+@receiver(post_save, sender=Adm2)
+@receiver(post_delete, sender=Adm2)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def invalidate_geography(sender, **kwargs):
+    geography.invalidate()
@@ -5,10 +5,17 @@ from decimal import Decimal
 from typing import Optional
 
 import httpx
-from asgiref.sync import async_to_sync
-from celery import group
+from asgiref.sync import async_to_sync, sync_to_async
 from dateutil import parser  # type: ignore[import-untyped]
+from kombu.exceptions import OperationalError
+from django.contrib.gis.db.models.functions import Area, Transform
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Avg, Count, F, Max, Min, Q, Sum
+from django.db.models.functions import Round
 from django.utils import timezone
+from psycopg2.extras import execute_values
 from pydantic import (
     BaseModel,
     field_validator,
@@ -16,11 +23,44 @@ from pydantic import (
     ValidationError,
 )
 
+from main.utils import UFs
 from mosqlimate.celeryapp import app
-from .models import Adm2, ContaOvos
+from datastore import episcanner
+from datastore.caching import EPISCANNER_SOURCES, watermark
+from datastore.charts import BRAZIL_BBOX, grid_cell
+from vis.brasil.models import GeoCity
+from .models import (
+    Adm2,
+    ContaOvos,
+    ContaOvosGridCell,
+    ContaOvosWeekly,
+    IngestionState,
+    CopernicusBrasil,
+    CopernicusBrasilWeekly,
+    precip_column,
+)
 
 logger = logging.getLogger(__name__)
 
+CONTAOVOS_URL = "https://contaovos.com/pt-br/api/lastcountingpublic"
+CONTAOVOS_SOURCE = "contaovos"
+# Days per date range request, fetched concurrently
+CONTAOVOS_WINDOW_DAYS = 7
+# Countings can be published after their date, so the daily sync re-reads
+# this many days before the high-water mark
+CONTAOVOS_LOOKBACK_DAYS = 7
+CONTAOVOS_MAX_CONCURRENCY = 8
+CONTAOVOS_MAX_RETRIES = 10
+# Seconds between live reads of the same range past the high-water mark
+CONTAOVOS_LIVE_INTERVAL = 60 * 10
+
+# Latest epiweeks always recomputed, as their daily rows may be revised
+CLIMATE_WEEKLY_LOOKBACK = 4
+# SIRGAS 2000 / Brazil Polyconic, in meters
+AREA_SRID = 5880
+# Watermarks of the last Episcanner bundle warm-up
+EPISCANNER_WARMED_KEY = "episcanner:warmed"
+
 
 class ContaOvosSchema(BaseModel):
     counting_id: int
@@ -60,165 +100,411 @@ class ContaOvosSchema(BaseModel):
         return self
 
 
-async def get_contaovos(dt: date) -> list[ContaOvosSchema]:
-    page = 1
-    url = "https://contaovos.com/pt-br/api/lastcountingpublic"
-    validated_data = []
-
-    async with httpx.AsyncClient(
-        timeout=httpx.Timeout(30.0),
-        follow_redirects=True,
-    ) as client:
-        while True:
-            params = {
-                "date_start": str(dt - timedelta(days=1)),
-                "date_end": str(dt + timedelta(days=1)),
-                "page": page,
-            }
-
-            response = await client.get(url, params=params)
-
-            if response.status_code == 429:
-                logger.warning(
-                    "Rate limit hit on page %s for %s. Sleeping...", page, dt
-                )
-                await asyncio.sleep(5)
-                continue
+class AdaptiveLimiter:
+    """
+    Bounds the concurrent requests to an API. The limit grows by one after
+    each successful response, up to `maximum`, and is halved whenever the
+    server answers 429 (additive increase, multiplicative decrease)
+    """
 
-            response.raise_for_status()
-            res = response.json()
+    def __init__(self, maximum: int, initial: int = 2):
+        self.maximum = maximum
+        self.limit = min(initial, maximum)
+        self.active = 0
+        self._cond = asyncio.Condition()
 
-            if not res:
-                break
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
 
-            for item in res:
-                try:
-                    validated_data.append(ContaOvosSchema(**item))
-                except (ValidationError, ValueError) as e:
-                    logger.warning(
-                        "Skipping invalid record %s: %s",
-                        item.get("counting_id"),
-                        e,
-                    )
-                    continue
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
 
-            page += 1
+    async def succeeded(self) -> None:
+        async with self._cond:
+            self.limit = min(self.maximum, self.limit + 1)
+            self._cond.notify_all()
 
-            await asyncio.sleep(1)
+    async def throttled(self) -> None:
+        async with self._cond:
+            self.limit = max(1, self.limit // 2)
 
-    return validated_data
 
+def date_windows(
+    start: date, end: date, days: int = CONTAOVOS_WINDOW_DAYS
+) -> list[tuple[date, date]]:
+    windows = []
+    current = start
+    while current <= end:
+        window_end = min(current + timedelta(days=days - 1), end)
+        windows.append((current, window_end))
+        current = window_end + timedelta(days=1)
+    return windows
 
-@app.task(
-    bind=True,
-    rate_limit="1/s",
-    autoretry_for=(
-        httpx.HTTPError,
-        httpx.HTTPStatusError,
-        httpx.ReadError,
-        httpx.ConnectError,
-        httpx.TimeoutException,
-    ),
-    retry_backoff=True,
-    retry_jitter=True,
-    retry_kwargs={"max_retries": 10},
-)
-def sync_contaovos_for_date(self, dt_str: str | None = None):
-    dt = date.fromisoformat(dt_str) if dt_str else timezone.localdate()
 
-    logger.info("Starting ContaOvos sync for %s", dt)
+def validate_contaovos(items: list[dict]) -> list[ContaOvosSchema]:
+    validated = []
+    for item in items:
+        try:
+            validated.append(ContaOvosSchema(**item))
+        except (ValidationError, ValueError) as e:
+            logger.warning(
+                "Skipping invalid record %s: %s", item.get("counting_id"), e
+            )
+    return validated
 
-    try:
-        data = async_to_sync(get_contaovos)(dt)
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 429:
-            logger.error("Rate limit hit for %s. Retrying...", dt)
-            raise self.retry(exc=e, countdown=60)
-        raise e
-
-    if not data:
-        logger.warning("No valid ContaOvos data found for %s", dt)
-        return f"No data found for {dt}"
-
-    count_created = 0
-    count_updated = 0
-    count_skipped = 0
-
-    adm2_map = {adm2.geocode: adm2 for adm2 in Adm2.objects.all()}
-    incoming_ids = [item.counting_id for item in data]
-    existing_ids = set(
-        ContaOvos.objects.filter(counting_id__in=incoming_ids).values_list(
-            "counting_id", flat=True
+
+async def get_contaovos_page(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveLimiter,
+    start: date,
+    end: date,
+    page: int,
+) -> list[dict]:
+    params = {"date_start": str(start), "date_end": str(end), "page": page}
+    backoff = 1.0
+
+    for _ in range(CONTAOVOS_MAX_RETRIES):
+        async with limiter:
+            response = await client.get(CONTAOVOS_URL, params=params)
+
+        if response.status_code != 429:
+            response.raise_for_status()
+            await limiter.succeeded()
+            return response.json()
+
+        await limiter.throttled()
+        retry_after = response.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else backoff
+        logger.warning(
+            "Rate limit hit on page %s of %s..%s (limit %s). Sleeping %ss",
+            page,
+            start,
+            end,
+            limiter.limit,
+            delay,
         )
+        await asyncio.sleep(delay)
+        backoff = min(backoff * 2, 60)
+
+    response.raise_for_status()
+    return []
+
+
+async def get_contaovos(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveLimiter,
+    start: date,
+    end: date,
+) -> list[ContaOvosSchema]:
+    """Reads every page of a date range, validating them as they arrive"""
+    validated = []
+    page = 1
+    while True:
+        items = await get_contaovos_page(client, limiter, start, end, page)
+        if not items:
+            break
+        validated.extend(validate_contaovos(items))
+        page += 1
+    return validated
+
+
+CONTAOVOS_FIELDS = (
+    "counting_id",
+    "date",
+    "date_collect",
+    "eggs",
+    "latitude",
+    "longitude",
+    "adm2",
+    "ovitrap_id",
+    "ovitrap_website_id",
+    "time",
+    "week",
+    "year",
+)
+CONTAOVOS_BATCH_SIZE = 1000
+
+
+def contaovos_upsert_sql() -> str:
+    """
+    INSERT ... ON CONFLICT (counting_id) DO UPDATE, returning whether each
+    row was inserted (xmax is only set on rows that were updated)
+    """
+    meta = ContaOvos._meta
+    quote = connection.ops.quote_name
+    columns = [quote(meta.get_field(f).column) for f in CONTAOVOS_FIELDS]
+    pk = quote(meta.pk.column)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != pk)
+    return (
+        f"INSERT INTO {quote(meta.db_table)} ({', '.join(columns)}) "
+        f"VALUES %s ON CONFLICT ({pk}) DO UPDATE SET {updates} "
+        "RETURNING (xmax = 0)"
     )
 
-    to_create = []
-    to_update = []
 
+def save_contaovos(
+    data: list[ContaOvosSchema], geocodes: set[str]
+) -> dict[str, int]:
+    """
+    Upserts the countings, one statement per batch. Records of unknown
+    municipalities are skipped; created and updated counts are the ones
+    reported by the database
+    """
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+
+    # A statement can't update the same row twice, keep the last version
+    rows = {}
     for item in data:
-        try:
-            adm2 = adm2_map.get(item.municipality_code)
-            if not adm2:
-                count_skipped += 1
-                continue
-
-            obj = ContaOvos(
-                counting_id=item.counting_id,
-                date=item.date,
-                date_collect=item.date_collect,
-                eggs=item.eggs,
-                latitude=item.latitude,
-                longitude=item.longitude,
-                adm2=adm2,
-                ovitrap_id=item.ovitrap_id,
-                ovitrap_website_id=item.ovitrap_website_id,
-                time=item.time,
-                week=item.week,
-                year=item.year,
-            )
+        if item.municipality_code not in geocodes:
+            counts["skipped"] += 1
+            continue
+        rows[item.counting_id] = (
+            item.counting_id,
+            item.date,
+            item.date_collect,
+            item.eggs,
+            item.latitude,
+            item.longitude,
+            item.municipality_code,
+            item.ovitrap_id,
+            item.ovitrap_website_id,
+            item.time,
+            item.week,
+            item.year,
+        )
 
-            if item.counting_id in existing_ids:
-                to_update.append(obj)
-                count_updated += 1
-            else:
-                to_create.append(obj)
-                count_created += 1
-
-        except Exception:
-            count_skipped += 1
-            logger.exception(
-                "Failed processing counting_id=%s", item.counting_id
-            )
+    if not rows:
+        return counts
+
+    with connection.cursor() as cursor:
+        inserted = execute_values(
+            cursor,
+            contaovos_upsert_sql(),
+            list(rows.values()),
+            page_size=CONTAOVOS_BATCH_SIZE,
+            fetch=True,
+        )
 
-    if to_create:
-        ContaOvos.objects.bulk_create(to_create, batch_size=1000)
-
-    if to_update:
-        ContaOvos.objects.bulk_update(
-            to_update,
-            fields=[
-                "date",
-                "date_collect",
-                "eggs",
-                "latitude",
-                "longitude",
-                "adm2",
-                "ovitrap_id",
+    counts["created"] = sum(1 for (created,) in inserted if created)
+    counts["updated"] = len(inserted) - counts["created"]
+    return counts
+
+
+def advance_high_water(source: str, run_start: date, done: date) -> None:
+    """
+    Moves the high-water mark to `done` if this run covers every date from
+    the current mark on; backfills of older ranges never move it back
+    """
+    state, _ = IngestionState.objects.get_or_create(source=source)
+    if state.high_water and run_start > state.high_water + timedelta(days=1):
+        return
+    if state.high_water is None or done > state.high_water:
+        state.high_water = done
+        state.save()
+
+
+def refresh_contaovos_week(year: int, week: int) -> int:
+    rows = (
+        ContaOvos.objects.filter(year=year, week=week)
+        .values("year", "week", "adm2")
+        .annotate(
+            start_date=Min("date"),
+            end_date=Max("date"),
+            total_eggs=Sum("eggs"),
+            countings=Count("counting_id"),
+            traps=ArrayAgg(
+                "ovitrap_website_id",
+                distinct=True,
+                ordering="ovitrap_website_id",
+            ),
+            positive_traps=ArrayAgg(
                 "ovitrap_website_id",
-                "time",
-                "week",
-                "year",
-            ],
-            batch_size=1000,
+                distinct=True,
+                ordering="ovitrap_website_id",
+                filter=Q(eggs__gt=0),
+            ),
+        )
+    )
+    objs = []
+    for row in rows:
+        traps = row["traps"] or []
+        positive_traps = row["positive_traps"] or []
+        objs.append(
+            ContaOvosWeekly(
+                year=row["year"],
+                week=row["week"],
+                adm2_id=row["adm2"],
+                start_date=row["start_date"],
+                end_date=row["end_date"],
+                eggs=row["total_eggs"],
+                countings=row["countings"],
+                trap_count=len(traps),
+                positive_trap_count=len(positive_traps),
+                traps=traps,
+                positive_traps=positive_traps,
+            )
         )
 
-    result = f"{dt}: {count_created} created, {count_updated} updated, {
-        count_skipped
-    } skipped"
+    with transaction.atomic():
+        ContaOvosWeekly.objects.filter(year=year, week=week).delete()
+        ContaOvosWeekly.objects.bulk_create(objs, batch_size=1000)
+
+    return len(objs)
+
+
+def refresh_contaovos_weeks(weeks: set[tuple[int, int]]) -> int:
+    return sum(refresh_contaovos_week(y, w) for y, w in sorted(weeks))
+
+
+@app.task
+def refresh_contaovos_weekly():
+    """Rebuilds the whole ContaOvosWeekly rollup"""
+    weeks = set(
+        ContaOvos.objects.values_list("year", "week").distinct().order_by()
+    )
+    rows = refresh_contaovos_weeks(weeks)
+    result = f"{len(weeks)} weeks refreshed ({rows} rows)"
     logger.info(result)
     return result
 
 
+def refresh_contaovos_day(day: date) -> int:
+    west, south, east, north = BRAZIL_BBOX
+    rows = ContaOvos.objects.filter(
+        date=day,
+        latitude__range=(south, north),
+        longitude__range=(west, east),
+    ).values_list("latitude", "longitude", "eggs")
+
+    cells: dict[tuple[int, int], list] = {}
+    for latitude, longitude, eggs in rows:
+        latitude, longitude = float(latitude), float(longitude)
+        cell = cells.setdefault(grid_cell(latitude, longitude), [0, 0, 0, 0])
+        cell[0] += 1
+        cell[1] += eggs
+        cell[2] += latitude
+        cell[3] += longitude
+
+    objs = [
+        ContaOvosGridCell(
+            date=day,
+            x=x,
+            y=y,
+            countings=countings,
+            eggs=eggs,
+            latitude_sum=latitude_sum,
+            longitude_sum=longitude_sum,
+        )
+        for (x, y), (countings, eggs, latitude_sum, longitude_sum) in (
+            cells.items()
+        )
+    ]
+
+    with transaction.atomic():
+        ContaOvosGridCell.objects.filter(date=day).delete()
+        ContaOvosGridCell.objects.bulk_create(objs, batch_size=1000)
+
+    return len(objs)
+
+
+def refresh_contaovos_days(days: set[date]) -> int:
+    return sum(refresh_contaovos_day(day) for day in sorted(days))
+
+
+@app.task
+def refresh_contaovos_grid():
+    """Rebuilds the daily map clustering cells (ContaOvosGridCell)"""
+    days = set(ContaOvos.objects.values_list("date", flat=True).distinct())
+    rows = refresh_contaovos_days(days)
+    result = f"{len(days)} days refreshed ({rows} cells)"
+    logger.info(result)
+    return result
+
+
+def ingest_contaovos(start: date, end: date) -> dict:
+    """
+    Loads the ContaOvos countings between `start` and `end`. The range is
+    split in windows fetched concurrently; each window is saved as soon as
+    it's complete and the high-water mark follows the contiguous windows
+    already saved, so a failed run resumes from where it stopped
+    """
+    windows = date_windows(start, end)
+    geocodes = set(Adm2.objects.values_list("geocode", flat=True))
+    totals = {"created": 0, "updated": 0, "skipped": 0}
+    saved: set[int] = set()
+    contiguous = 0
+
+    def save_window(i: int, data: list[ContaOvosSchema]) -> None:
+        nonlocal contiguous
+        counts = save_contaovos(data, geocodes)
+        for key, value in counts.items():
+            totals[key] += value
+        refresh_contaovos_weeks({(item.year, item.week) for item in data})
+        refresh_contaovos_days({item.date for item in data})
+        logger.info("ContaOvos %s..%s: %s", *windows[i], counts)
+
+        saved.add(i)
+        while contiguous in saved:
+            contiguous += 1
+        if contiguous:
+            advance_high_water(
+                CONTAOVOS_SOURCE, start, windows[contiguous - 1][1]
+            )
+
+    async def run() -> None:
+        limiter = AdaptiveLimiter(CONTAOVOS_MAX_CONCURRENCY)
+        save = sync_to_async(save_window)
+
+        async with httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0),
+            follow_redirects=True,
+        ) as client:
+
+            async def fetch(i: int) -> None:
+                data = await get_contaovos(client, limiter, *windows[i])
+                await save(i, data)
+
+            await asyncio.gather(*(fetch(i) for i in range(len(windows))))
+
+    async_to_sync(run)()
+
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "windows": len(windows),
+        **totals,
+    }
+
+
+@app.task(
+    autoretry_for=(httpx.HTTPError,),
+    retry_backoff=True,
+    retry_jitter=True,
+    retry_kwargs={"max_retries": 10},
+)
+def sync_contaovos():
+    """
+    Incremental load, from `CONTAOVOS_LOOKBACK_DAYS` before the high-water
+    mark (late countings) until today
+    """
+    today = timezone.localdate()
+    state = IngestionState.objects.filter(source=CONTAOVOS_SOURCE).first()
+
+    if state and state.high_water:
+        start = min(state.high_water, today)
+    else:
+        start = today
+    start -= timedelta(days=CONTAOVOS_LOOKBACK_DAYS)
+
+    result = ingest_contaovos(start, today)
+    logger.info("ContaOvos sync: %s", result)
+    return result
+
+
 @app.task
 def backfill_contaovos(start_date: str, end_date: str):
     start = date.fromisoformat(start_date)
@@ -227,18 +513,157 @@ def backfill_contaovos(start_date: str, end_date: str):
     if start > end:
         raise ValueError("start_date must be before end_date")
 
-    tasks = []
-    current = start
-    while current <= end:
-        tasks.append(sync_contaovos_for_date.s(current.isoformat()))
-        current += timedelta(days=1)
+    return ingest_contaovos(start, end)
 
-    job = group(tasks)
-    result = job.delay()
 
-    return {
-        "start_date": start.isoformat(),
-        "end_date": end.isoformat(),
-        "days": len(tasks),
-        "group_id": result.id,
+def schedule_contaovos_live(end: date) -> None:
+    """
+    Live top-up for reads past the last sync: queues the load of the
+    countings from the day after the high-water mark until `end`, at most
+    once every `CONTAOVOS_LIVE_INTERVAL` per range. The request is served
+    with the data already stored
+    """
+    end = min(end, timezone.localdate())
+    state = IngestionState.objects.filter(source=CONTAOVOS_SOURCE).first()
+    if not state or not state.high_water or end <= state.high_water:
+        return
+
+    start = state.high_water + timedelta(days=1)
+    key = f"contaovos:live:{start}:{end}"
+    if not cache.add(key, True, CONTAOVOS_LIVE_INTERVAL):
+        return
+
+    try:
+        backfill_contaovos.delay(start.isoformat(), end.isoformat())
+    except OperationalError as e:
+        cache.delete(key)
+        logger.warning(
+            "ContaOvos live load %s..%s not queued: %s", start, end, e
+        )
+
+
+def changed_copernicus_epiweeks() -> list[int]:
+    """
+    Epiweeks whose amount of daily rows (or of fixed precipitation rows)
+    differs from the rollup, plus the latest `CLIMATE_WEEKLY_LOOKBACK`
+    """
+    source = {
+        row["epiweek"]: (row["days"], row["days_fixed"])
+        for row in CopernicusBrasil.objects.using("infodengue")
+        .values("epiweek")
+        .annotate(
+            days=Count("date"),
+            days_fixed=Count("precip_fixed__geocode"),
+        )
     }
+    rollup = {
+        row["epiweek"]: (row["days"], row["days_fixed"])
+        for row in CopernicusBrasilWeekly.objects.values("epiweek").annotate(
+            days=Sum("days"),
+            days_fixed=Sum("days_fixed"),
+        )
+    }
+
+    changed = {ew for ew, count in source.items() if rollup.get(ew) != count}
+    changed |= set(sorted(source)[-CLIMATE_WEEKLY_LOOKBACK:])
+    changed |= set(rollup) - set(source)
+    return sorted(changed)
+
+
+def city_areas() -> dict[int, float]:
+    """Municipality areas (km²), weights of the regional climate means"""
+    areas = GeoCity.objects.annotate(
+        area=Area(Transform("geometry", AREA_SRID))
+    ).values_list("city_id", "area")
+    return {int(geocode): area.sq_km for geocode, area in areas}
+
+
+def refresh_copernicus_epiweek(
+    epiweek: int, areas: Optional[dict[int, float]] = None
+) -> int:
+    rows = (
+        CopernicusBrasil.objects.using("infodengue")
+        .filter(epiweek=epiweek)
+        .values("epiweek", "geocodigo")
+        .annotate(
+            temp_min_avg=Round(Avg("temp_min"), 4),
+            temp_med_avg=Round(Avg("temp_med"), 4),
+            temp_max_avg=Round(Avg("temp_max"), 4),
+            temp_amplit_avg=Round(Avg(F("temp_max") - F("temp_min")), 4),
+            precip_tot_sum=Round(Sum("precip_tot"), 4),
+            # Always coalesced, the endpoint picks it by the requested period
+            precip_tot_fixed_sum=Round(
+                Sum(precip_column("precip_tot", date.min)), 4
+            ),
+            umid_min_avg=Round(Avg("umid_min"), 4),
+            umid_med_avg=Round(Avg("umid_med"), 4),
+            umid_max_avg=Round(Avg("umid_max"), 4),
+            days=Count("date"),
+            days_fixed=Count("precip_fixed__geocode"),
+        )
+    )
+    areas = areas if areas is not None else city_areas()
+    objs = [
+        CopernicusBrasilWeekly(area=areas.get(row["geocodigo"]), **row)
+        for row in rows
+    ]
+
+    with transaction.atomic():
+        CopernicusBrasilWeekly.objects.filter(epiweek=epiweek).delete()
+        CopernicusBrasilWeekly.objects.bulk_create(objs, batch_size=1000)
+
+    return len(objs)
+
+
+@app.task
+def refresh_copernicus_brasil_weekly(
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    """
+    Updates the CopernicusBrasilWeekly rollup for the epiweeks that changed
+    in copernicus_bra. `start` and `end` (YYYYWW) force a range refresh
+    """
+    if start and end:
+        epiweeks = sorted(
+            CopernicusBrasil.objects.using("infodengue")
+            .filter(epiweek__gte=start, epiweek__lte=end)
+            .values_list("epiweek", flat=True)
+            .distinct()
+        )
+    else:
+        epiweeks = changed_copernicus_epiweeks()
+
+    areas = city_areas()
+    rows = 0
+    for epiweek in epiweeks:
+        rows += refresh_copernicus_epiweek(epiweek, areas)
+
+    result = f"{len(epiweeks)} epiweeks refreshed ({rows} rows)"
+    logger.info(result)
+    return result
+
+
+@app.task
+def warm_episcanner_bundles(force: bool = False):
+    """
+    Precomputes the current year Episcanner bundle of every (disease, UF)
+    once the infodengue alert or Episcanner tables were loaded, i.e. once
+    their watermarks moved since the last run
+    """
+    marks = [watermark(source) for source in EPISCANNER_SOURCES]
+    if not force and cache.get(EPISCANNER_WARMED_KEY) == marks:
+        return "Episcanner bundles up to date"
+
+    # Warms the cache entries of the endpoint itself
+    from datastore.api import episcanner_bundle
+
+    year = datetime.now().year
+    for disease in episcanner.DISEASE_CID10:
+        for uf in UFs:
+            episcanner_bundle.warm(disease=disease, uf=uf, year=year)
+
+    cache.set(EPISCANNER_WARMED_KEY, marks, None)
+    result = f"{len(episcanner.DISEASE_CID10) * len(UFs)} bundles warmed"
+    logger.info(result)
+    return result
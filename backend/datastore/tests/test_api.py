@@ -1,5 +1,46 @@
-from datetime import datetime, timedelta
-from django.test import Client, TestCase
+import json
+import asyncio
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+from unittest import mock
+
+import pyarrow as pa
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import Client, SimpleTestCase, TestCase
+from ninja.errors import HttpError
+from datastore.charts import (
+    contaovos_weekly,
+    eggs_density,
+    map_clusters,
+    map_states,
+    positivity,
+)
+from datastore.geography import geography
+from datastore.models import (
+    Adm0,
+    Adm1,
+    Adm2,
+    ContaOvos,
+    ContaOvosWeekly,
+    CopernicusBrasil,
+    CopernicusBrasilWeekly,
+    IngestionState,
+)
+from datastore.schema import CopernicusBrasilSchema
+from datastore.tasks import (
+    CONTAOVOS_SOURCE,
+    AdaptiveLimiter,
+    ContaOvosSchema,
+    date_windows,
+    refresh_contaovos_days,
+    refresh_contaovos_weeks,
+    refresh_copernicus_brasil_weekly,
+    save_contaovos,
+    schedule_contaovos_live,
+)
+from registry.pagination import decode_cursor, encode_cursor, keyset_filter
 from users.models import CustomUser
 
 
@@ -43,3 +84,473 @@ class DatastoreAPITest(TestCase):
             timeout=60,
         )
         self.assertEqual(r.status_code, 200)
+
+    def test_copernicus_brasil_precip_fixed(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/climate/?"
+        filters = f"start={start_date}&end={end_date}&geocode=3304557"
+
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["items"][0]["precip_tot"], 18.0)
+
+        r = self.client.get(
+            url + "precip_fixed=false&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["items"][0]["precip_tot"], 15.0)
+
+    def test_copernicus_brasil_weekly_rollup(self):
+        refresh_copernicus_brasil_weekly()
+
+        row = CopernicusBrasilWeekly.objects.get(
+            geocodigo=3304557, epiweek=202601
+        )
+        self.assertEqual(row.temp_med_avg, 25.0)
+        self.assertEqual(row.temp_amplit_avg, 10.0)
+        self.assertEqual(row.precip_tot_sum, 15.0)
+        self.assertEqual(row.precip_tot_fixed_sum, 18.0)
+        self.assertEqual((row.days, row.days_fixed), (1, 1))
+
+        refresh_copernicus_brasil_weekly()
+        self.assertEqual(CopernicusBrasilWeekly.objects.count(), 1)
+
+    def test_historico_alerta_aggregate_requires_uf(self):
+        r = self.client.get(
+            "/api/datastore/infodengue/?disease=dengue&aggregate=region",
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 400)
+
+    def test_copernicus_brasil_weekly_aggregate_requires_region(self):
+        r = self.client.get(
+            "/api/datastore/climate/weekly/?geocode=3304557&aggregate=region",
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 400)
+
+    def test_historico_alerta_cursor_pagination(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/infodengue/?"
+        filters = f"disease=dengue&start={start_date}&end={end_date}"
+
+        r = self.client.get(
+            url + "cursor=&per_page=10&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 200)
+        pagination = r.json()["pagination"]
+        self.assertIn("next_cursor", pagination)
+        self.assertNotIn("total_items", pagination)
+
+        r = self.client.get(
+            url + "cursor=&count=true&per_page=10&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("total_items", r.json()["pagination"])
+
+    def test_copernicus_brasil_invalid_cursor(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/climate/?"
+        filters = f"start={start_date}&end={end_date}&geocode=3304557"
+
+        r = self.client.get(
+            url + "cursor=notacursor&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 400)
+
+    def test_copernicus_brasil_result_cache(self):
+        start_date = datetime.now().date() - timedelta(days=180)
+        end_date = datetime.now().date() + timedelta(days=1)
+
+        url = "/api/datastore/climate/?"
+        filters = f"start={start_date}&end={end_date}&geocode=3304557"
+
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.status_code, 200)
+        total = r.json()["pagination"]["total_items"]
+
+        CopernicusBrasil.objects.using("infodengue").create(
+            date=end_date, geocodigo=3304557, epiweek=202601, temp_med=26.0
+        )
+
+        # Served from the cache until the watermark is probed again
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.json()["pagination"]["total_items"], total)
+
+        cache.delete("watermark:copernicus_brasil")
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.json()["pagination"]["total_items"], total + 1)
+
+    def test_copernicus_brasil_fields_projection(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/climate/?"
+        filters = f"start={start_date}&end={end_date}&geocode=3304557"
+
+        r = self.client.get(
+            url + "fields=temp_med,precip_tot&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 200)
+        for item in r.json()["items"]:
+            self.assertEqual(
+                set(item), {"date", "geocodigo", "temp_med", "precip_tot"}
+            )
+
+    def test_historico_alerta_unknown_field(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/infodengue/?"
+        filters = f"disease=dengue&start={start_date}&end={end_date}"
+
+        r = self.client.get(
+            url + "fields=casos&fields=password&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 400)
+
+    def test_copernicus_brasil_export_ndjson(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/climate/export/?"
+        filters = f"start={start_date}&end={end_date}&geocode=3304557"
+
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        lines = b"".join(r.streaming_content).decode().splitlines()
+        for line in lines:
+            row = json.loads(line)
+            self.assertEqual(row["geocodigo"], 3304557)
+
+    def test_historico_alerta_export_csv(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/infodengue/export/?"
+        filters = (
+            f"disease=dengue&start={start_date}&end={end_date}&format=csv"
+        )
+
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r["Content-Type"], "text/csv")
+        lines = b"".join(r.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("data_iniSE,SE,"))
+
+    def test_copernicus_brasil_export_arrow(self):
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=180)
+
+        url = "/api/datastore/climate/export/?"
+        filters = (
+            f"start={start_date}&end={end_date}&geocode=3304557&format=arrow"
+        )
+
+        r = self.client.get(url + filters, **self.auth_headers, timeout=60)
+        self.assertEqual(r.status_code, 200)
+        table = pa.ipc.open_stream(b"".join(r.streaming_content)).read_all()
+        self.assertEqual(
+            table.schema.names,
+            list(CopernicusBrasilSchema.model_fields),
+        )
+        self.assertEqual(table.schema.field("date").type, pa.date32())
+
+
+class GeographyIndexTest(TestCase):
+    def setUp(self):
+        country, _ = Adm0.objects.get_or_create(
+            geocode="BRA", defaults={"name": "Brasil"}
+        )
+        self.state, _ = Adm1.objects.get_or_create(
+            geocode="33",
+            defaults={"name": "Rio de Janeiro", "country": country},
+        )
+        Adm2.objects.update_or_create(
+            geocode="3304557",
+            defaults={"name": "Rio de Janeiro", "adm1": self.state},
+        )
+
+    def test_geography_index(self):
+        geo = geography()
+        self.assertIn(3304557, geo)
+        self.assertEqual(geo.uf(3304557), "RJ")
+        self.assertEqual(geo.name("3304557"), "Rio de Janeiro")
+        self.assertIn(3304557, geo.geocodes("rj"))
+        self.assertEqual(list(geo.geocodes("XX")), [])
+
+    def test_geography_index_refreshes_on_change(self):
+        version = geography().version
+        Adm2.objects.create(geocode="3399999", name="Test", adm1=self.state)
+
+        geo = geography()
+        self.assertNotEqual(geo.version, version)
+        self.assertIn(3399999, geo.geocodes("RJ"))
+        geocodes = list(geo.geocodes("RJ"))
+        self.assertEqual(geocodes, sorted(geocodes))
+
+
+class PagesPaginationCursorTest(SimpleTestCase):
+    def test_cursor_roundtrip(self):
+        key = [date(2024, 1, 7), 3304557, 42]
+        token = encode_cursor(key)
+        self.assertEqual(decode_cursor(token, 3), ["2024-01-07", 3304557, 42])
+
+    def test_cursor_wrong_size(self):
+        with self.assertRaises(HttpError):
+            decode_cursor(encode_cursor([1, 2]), 3)
+
+    def test_keyset_filter(self):
+        q = keyset_filter(("date", "geocodigo"), ["2024-01-07", 3304557])
+        self.assertEqual(
+            q,
+            Q(date__gt="2024-01-07")
+            | (Q(date="2024-01-07") & Q(geocodigo__gt=3304557)),
+        )
+
+
+class ContaOvosTest(TestCase):
+    databases = {"default", "infodengue"}
+
+    def setUp(self):
+        self.client = Client()
+        self.user = CustomUser.objects.create_user(
+            username="testuser",
+            email="test@test.com",
+            password="testpass",
+            is_active=True,
+        )
+        self.auth_headers = {"HTTP_X_UID_KEY": self.user.api_key()}
+        country, _ = Adm0.objects.get_or_create(
+            geocode="BRA", defaults={"name": "Brasil"}
+        )
+        state, _ = Adm1.objects.get_or_create(
+            geocode="33",
+            defaults={"name": "Rio de Janeiro", "country": country},
+        )
+        Adm2.objects.update_or_create(
+            geocode="3304557",
+            defaults={"name": "Rio de Janeiro", "adm1": state},
+        )
+
+    def record(
+        self, counting_id: int, eggs: int, geocode="3304557", trap_id=1
+    ):
+        return ContaOvosSchema(
+            counting_id=counting_id,
+            date=date(2024, 1, 8),
+            date_collect=date(2024, 1, 8),
+            eggs=eggs,
+            latitude="-22.9",
+            longitude="-43.2",
+            municipality="Rio de Janeiro",
+            municipality_code=geocode,
+            ovitrap_id="RJ-1",
+            ovitrap_website_id=trap_id,
+            state_code="RJ",
+            state_name="Rio de Janeiro",
+            time=datetime(2024, 1, 8, 12, tzinfo=UTC),
+            week=2,
+            year=2024,
+        )
+
+    def test_save_contaovos_upsert(self):
+        geocodes = {"3304557"}
+        counts = save_contaovos(
+            [self.record(1, 10), self.record(2, 20)], geocodes
+        )
+        self.assertEqual(counts, {"created": 2, "updated": 0, "skipped": 0})
+
+        counts = save_contaovos(
+            [
+                self.record(2, 25),
+                self.record(3, 30),
+                self.record(4, 40, geocode="9999999"),
+            ],
+            geocodes,
+        )
+        self.assertEqual(counts, {"created": 1, "updated": 1, "skipped": 1})
+        self.assertEqual(ContaOvos.objects.get(counting_id=2).eggs, 25)
+        self.assertFalse(ContaOvos.objects.filter(counting_id=4).exists())
+
+    def test_contaovos_weekly_rollup(self):
+        save_contaovos(
+            [
+                self.record(1, 10, trap_id=1),
+                self.record(2, 0, trap_id=2),
+                self.record(3, 5, trap_id=1),
+            ],
+            {"3304557"},
+        )
+        refresh_contaovos_weeks({(2024, 2)})
+
+        row = ContaOvosWeekly.objects.get(year=2024, week=2, adm2="3304557")
+        self.assertEqual((row.eggs, row.countings), (15, 3))
+        self.assertEqual(row.traps, [1, 2])
+        self.assertEqual(row.positive_traps, [1])
+
+        qs = contaovos_weekly(date(2024, 1, 1), date(2024, 1, 31), uf="RJ")
+        self.assertEqual(
+            eggs_density(qs), [{"epiweek": "2024-02", "total_eggs": 15}]
+        )
+        self.assertEqual(
+            positivity(qs, by_municipality=True),
+            [{"name": "Rio de Janeiro", "positivity": 50.0}],
+        )
+        self.assertEqual(
+            map_states(qs),
+            [
+                {
+                    "name": "RJ",
+                    "total_eggs": 15,
+                    "trap_count": 2,
+                    "municipality_count": 1,
+                }
+            ],
+        )
+
+    def test_contaovos_weekly_range_is_week_aligned(self):
+        # 2024-01-08 and 2024-01-11 are in the same epidemiological week
+        later = self.record(2, 5)
+        later.date = date(2024, 1, 11)
+        save_contaovos([self.record(1, 10), later], {"3304557"})
+        refresh_contaovos_weeks({(2024, 2)})
+
+        # The week has a counting in the range: it's included whole
+        qs = contaovos_weekly(date(2024, 1, 10), date(2024, 1, 31))
+        self.assertEqual(
+            eggs_density(qs), [{"epiweek": "2024-02", "total_eggs": 15}]
+        )
+        qs = contaovos_weekly(date(2024, 1, 1), date(2024, 1, 9))
+        self.assertEqual(
+            eggs_density(qs), [{"epiweek": "2024-02", "total_eggs": 15}]
+        )
+        # No counting of the week in the range
+        qs = contaovos_weekly(date(2024, 1, 12), date(2024, 1, 31))
+        self.assertEqual(eggs_density(qs), [])
+
+    def test_contaovos_map_clusters(self):
+        far = self.record(3, 5, trap_id=2)
+        far.latitude, far.longitude = Decimal("-22.7"), Decimal("-43.0")
+        save_contaovos(
+            [self.record(1, 10), self.record(2, 20), far], {"3304557"}
+        )
+        refresh_contaovos_days({date(2024, 1, 8)})
+
+        start, end = date(2024, 1, 1), date(2024, 1, 31)
+        clusters = map_clusters(start, end, zoom=4)
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual((clusters[0]["count"], clusters[0]["eggs"]), (3, 35))
+        self.assertAlmostEqual(clusters[0]["latitude"], -22.8333, places=3)
+
+        clusters = map_clusters(start, end, zoom=11)
+        self.assertEqual(len(clusters), 2)
+
+        traps = map_clusters(start, end, zoom=14, bbox="-43.3,-23,-43.1,-22.8")
+        self.assertEqual(len(traps), 1)
+        self.assertEqual((traps[0]["trap_id"], traps[0]["eggs"]), (1, 30))
+
+        with self.assertRaises(ValueError):
+            map_clusters(start, end, zoom=4, bbox="-43,-22")
+
+    def test_mosquito_from_local_table(self):
+        save_contaovos([self.record(1, 10), self.record(2, 20)], {"3304557"})
+
+        url = "/api/datastore/mosquito/?"
+        filters = "date_start=2024-01-01&date_end=2024-01-31&state=RJ"
+
+        r = self.client.get(
+            url + "cursor=&per_page=1&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.status_code, 200)
+        item = r.json()["items"][0]
+        self.assertEqual(item["counting_id"], 1)
+        self.assertEqual(item["municipality_code"], "3304557")
+        self.assertEqual(item["state_code"], "33")
+        self.assertEqual(item["time"], "Mon, 08 Jan 2024 12:00:00 GMT")
+
+        cursor = r.json()["pagination"]["next_cursor"]
+        r = self.client.get(
+            url + f"cursor={cursor}&per_page=1&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.json()["items"][0]["counting_id"], 2)
+
+        r = self.client.get(
+            url + "municipality=niteroi&" + filters,
+            **self.auth_headers,
+            timeout=60,
+        )
+        self.assertEqual(r.json()["items"], [])
+
+    @mock.patch("datastore.tasks.backfill_contaovos")
+    def test_mosquito_queues_live_load(self, backfill):
+        cache.clear()
+        save_contaovos([self.record(1, 10)], {"3304557"})
+        IngestionState.objects.create(
+            source=CONTAOVOS_SOURCE, high_water=date(2024, 1, 10)
+        )
+
+        r = self.client.get(
+            "/api/datastore/mosquito/?date_start=2024-01-01"
+            "&date_end=2024-01-31&state=RJ",
+            **self.auth_headers,
+        )
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["items"]), 1)
+        backfill.delay.assert_called_once_with("2024-01-11", "2024-01-31")
+
+        # Throttled while the same range is being loaded
+        schedule_contaovos_live(date(2024, 1, 31))
+        backfill.delay.assert_called_once()
+
+
+class ContaOvosIngestionTest(SimpleTestCase):
+    def test_date_windows(self):
+        windows = date_windows(date(2024, 1, 1), date(2024, 1, 10), days=7)
+        self.assertEqual(
+            windows,
+            [
+                (date(2024, 1, 1), date(2024, 1, 7)),
+                (date(2024, 1, 8), date(2024, 1, 10)),
+            ],
+        )
+        self.assertEqual(date_windows(date(2024, 1, 2), date(2024, 1, 1)), [])
+
+    def test_adaptive_limiter(self):
+        async def run():
+            limiter = AdaptiveLimiter(maximum=4, initial=2)
+            for _ in range(5):
+                await limiter.succeeded()
+            self.assertEqual(limiter.limit, 4)
+            await limiter.throttled()
+            self.assertEqual(limiter.limit, 2)
+            for _ in range(3):
+                await limiter.throttled()
+            self.assertEqual(limiter.limit, 1)
+
+        asyncio.run(run())
@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+
+from datastore.caching import cached_result
+
+
+@mock.patch("datastore.caching.watermark", return_value=1)
+class CachedResultTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.compute = mock.Mock(return_value={"value": 1})
+
+        @cached_result("episcanner")
+        def view(request, disease: str, year: int):
+            return self.compute(disease, year)
+
+        self.view = view
+
+    def test_warm_fills_the_view_entry(self, watermark):
+        self.assertEqual(
+            self.view.warm(disease="zika", year=2024), {"value": 1}
+        )
+
+        request = RequestFactory().get("/")
+        result = self.view(request, disease="zika", year=2024)
+
+        self.assertEqual(result, {"value": 1})
+        self.compute.assert_called_once_with("zika", 2024)
+        self.assertTrue(request.etag)
@@ -1,6 +1,14 @@
-from django.test import Client, TestCase
+import datetime
+
+from django.test import Client, SimpleTestCase, TestCase
 from users.models import CustomUser
 
+from datastore.episcanner import (
+    fold_years,
+    model_eval_panel,
+    parameters_panel,
+)
+
 
 class EpiScannerAPITest(TestCase):
     databases = {"default", "infodengue"}
@@ -139,6 +147,51 @@ class EpiScannerAPITest(TestCase):
         self.assertIn("rateMap", data)
         self.assertIn("table", data)
 
+    def test_bundle_dengue_ce(self):
+        r = self.client.get(
+            "/api/datastore/episcanner/bundle/"
+            "?disease=dengue&uf=CE&year=2024",
+            **self.auth_headers,
+            timeout=30,
+        )
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        for panel in (
+            "episcanner",
+            "cities",
+            "parameters",
+            "top_cities",
+            "maps_weeks",
+        ):
+            self.assertIsInstance(data[panel], list)
+        self.assertIn("topR0", data["maps_r0"])
+        self.assertIn("table", data["model_eval"])
+
+        top = self.client.get(
+            "/api/datastore/episcanner/top-cities/"
+            "?disease=dengue&uf=CE&year=2024",
+            **self.auth_headers,
+            timeout=30,
+        )
+        self.assertEqual(data["top_cities"], top.json())
+
+    def test_bundle_parameters_match_endpoint(self):
+        params = self.client.get(
+            "/api/datastore/episcanner/parameters/?disease=dengue&uf=CE",
+            **self.auth_headers,
+            timeout=30,
+        ).json()
+        # From a year before, after and with SIR parameters
+        for year in (2010, 2024, datetime.date.today().year + 1):
+            with self.subTest(year=year):
+                bundle = self.client.get(
+                    "/api/datastore/episcanner/bundle/"
+                    f"?disease=dengue&uf=CE&year={year}",
+                    **self.auth_headers,
+                    timeout=30,
+                ).json()
+                self.assertEqual(bundle["parameters"], params)
+
     def test_get_episcanner_dengue_ce(self):
         r = self.client.get(
             "/api/datastore/episcanner/?disease=dengue&uf=CE&year=2024",
@@ -152,3 +205,81 @@ class EpiScannerAPITest(TestCase):
             self.assertIn("disease", data[0])
             self.assertIn("CID10", data[0])
             self.assertIn("R0", data[0])
+
+    def test_get_episcanner_not_modified(self):
+        url = "/api/datastore/episcanner/?disease=dengue&uf=CE&year=2024"
+        r = self.client.get(url, **self.auth_headers, timeout=30)
+        self.assertEqual(r.status_code, 200)
+        etag = r["ETag"]
+
+        r = self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag, **self.auth_headers, timeout=30
+        )
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r["ETag"], etag)
+        self.assertEqual(r.content, b"")
+
+        r = self.client.get(
+            url.replace("2024", "2023"),
+            HTTP_IF_NONE_MATCH=etag,
+            **self.auth_headers,
+            timeout=30,
+        )
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r["ETag"], etag)
+
+
+class EpidemicYearTest(SimpleTestCase):
+    def test_fold_years(self):
+        totals = {
+            (3304557, 2021): {"casos": 1, "transmissao": 0},
+            (3304557, 2022): {"casos": 2, "transmissao": 1},
+            (3304557, 2023): {"casos": None, "transmissao": None},
+            (3304557, 2024): {"casos": 4, "transmissao": 2},
+        }
+        # 2022 has no SIR parameters, its cases count in 2023
+        self.assertEqual(
+            fold_years(totals, [2021, 2023]),
+            {(3304557, 2021): 1, (3304557, 2023): 2},
+        )
+        # Years before the first one with SIR parameters are left out
+        self.assertEqual(
+            fold_years(totals, [2022, 2023]),
+            {(3304557, 2022): 2, (3304557, 2023): 0},
+        )
+        self.assertEqual(fold_years(totals, []), {})
+
+    def test_parameters_panel(self):
+        # `sir_params` geocodes are str, `fold_years` ones are int
+        params = [
+            {"geocode": "3304557", "year": 2023, "r0": 1.5},
+            {"geocode": "3550308", "year": 2023, "r0": 1.2},
+        ]
+        reported = {(3304557, 2023): 12}
+
+        self.assertEqual(
+            [r["reported_cases"] for r in parameters_panel(params, reported)],
+            [12, 0],
+        )
+
+    def test_model_eval_panel(self):
+        totals = {
+            1: {"casos": 40, "transmissao": 0},
+            2: {"casos": 100, "transmissao": 3},
+            3: {"casos": None, "transmissao": None},
+        }
+        params = [
+            # As returned by `sir_params`
+            {"geocode": "1", "total_cases": 100.0},
+            {"geocode": "2", "total_cases": 80.0},
+        ]
+        panel = model_eval_panel(totals, params)
+
+        self.assertEqual(
+            [r["rate"] for r in panel["rateMap"]], [0.4, 1.25, None]
+        )
+        self.assertEqual(
+            [r["total_cases"] for r in panel["rateMap"]], [100.0, 80.0, 0]
+        )
+        self.assertEqual([b["count"] for b in panel["table"]], [1, 0, 0, 0, 1])
+        self.assertEqual(panel["table"][0]["percentage"], 50.0)
@@ -1,7 +1,7 @@
 import os
 import json
 import math
-from typing import Any
+from typing import Any, Optional
 
 from ninja import Router, Swagger
 from ninja import NinjaAPI as API
@@ -15,6 +15,7 @@ from django.core.serializers.json import DjangoJSONEncoder
 
 from registry.api import router as registry_router
 from datastore.api import router as datastore_router
+from datastore.caching import set_etag, set_stale
 from vis.api import router as vis_router
 from users.api import router as users_router
 from maps.api import router as maps_router
@@ -51,6 +52,25 @@ class SafeJSONRenderer(BaseRenderer):
 
 
 class NinjaAPI(API):
+    def create_response(  # type: ignore[override]
+        self,
+        request,
+        data: Any,
+        *,
+        status: Optional[int] = None,
+        temporal_response: Optional[HttpResponse] = None,
+    ) -> HttpResponse:
+        response = super().create_response(
+            request, data, status=status, temporal_response=temporal_response
+        )
+        # Set by datastore.caching.cached_result
+        etag = getattr(request, "etag", None)
+        if etag and response.status_code == 200:
+            set_etag(response, etag)
+        elif getattr(request, "stale_result", False):
+            set_stale(response)
+        return response
+
     def get_openapi_schema(self, **kwargs) -> dict:  # type: ignore[override]
         schema = super().get_openapi_schema(**kwargs)
         schema.pop("BadRequestSchema", None)
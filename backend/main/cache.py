@@ -0,0 +1,156 @@
+"""
+Single-flight cache reads. When an entry is missing or expired, only the
+worker holding the key's lock recomputes it; the others keep serving the
+expired value (stale-while-revalidate) or, when there is none, wait for
+the lock holder to store it.
+
+Versioned namespaces. The pages cached by the site-wide cache middleware
+(`main.middleware`) are keyed by the versions of the namespaces their URL
+belongs to (`PATH_NAMESPACES`), so `bump` invalidates the pages of a
+namespace (e.g. a prediction, or the dashboard) and nothing else.
+"""
+
+import re
+import time
+import uuid
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+from django.core.cache import cache
+
+# Seconds an expired entry is still served while it is recomputed
+STALE_TIMEOUT = 60 * 60
+# Upper bound of a computation, after which the lock is released
+LOCK_TIMEOUT = 60
+POLL_INTERVAL = 0.1
+
+# URL path -> namespace of its cached page. The first match applies
+PATH_NAMESPACES = [
+    (
+        re.compile(r"^/api/registry/predictions/(?P<id>\d+)/"),
+        "prediction:{id}",
+    ),
+    (
+        re.compile(
+            r"^/api/registry/models?/(?P<owner>[^/]+)/(?P<repository>[^/]+)/"
+        ),
+        "model:{owner}/{repository}",
+    ),
+    (re.compile(r"^/api/registry/"), "registry"),
+    (
+        re.compile(r"^/api/vis/dashboard/prediction/(?P<id>\d+)/"),
+        "prediction:{id}",
+    ),
+    (re.compile(r"^/api/vis/dashboard/"), "dashboard"),
+]
+
+
+class Entry(NamedTuple):
+    value: Any
+    fresh_until: float
+
+
+def _fresh(entry: Any) -> bool:
+    return isinstance(entry, Entry) and entry.fresh_until > time.time()
+
+
+def _store(
+    key: str,
+    value: Any,
+    timeout: int,
+    stale_key: Optional[str],
+) -> None:
+    cache.set(
+        key, Entry(value, time.time() + timeout), timeout + STALE_TIMEOUT
+    )
+    if stale_key:
+        cache.set(stale_key, value, timeout + STALE_TIMEOUT)
+
+
+def single_flight(
+    key: str,
+    compute: Callable[[], Any],
+    timeout: int,
+    stale_key: Optional[str] = None,
+    cacheable: Callable[[Any], bool] = lambda value: value is not None,
+) -> tuple[Any, bool]:
+    """
+    Returns `(value, stale)`. `value` is read from `key` while fresh, and
+    recomputed with `compute()` by a single worker once `timeout` seconds
+    old. `stale_key` holds the last value of entries that are replaced by
+    a new key (e.g. keys including a data version); it is served while the
+    new key is being computed, with `stale=True` as it may not match `key`
+    """
+    entry = cache.get(key)
+    if _fresh(entry):
+        return entry.value, False
+
+    lock = f"lock:{key}"
+    if cache.add(lock, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            if cacheable(value):
+                _store(key, value, timeout, stale_key)
+            return value, False
+        finally:
+            cache.delete(lock)
+
+    # Someone else is computing it
+    if isinstance(entry, Entry):
+        return entry.value, False
+    if stale_key:
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return stale, True
+
+    deadline = time.time() + LOCK_TIMEOUT
+    while time.time() < deadline and cache.get(lock) is not None:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, Entry):
+            return entry.value, False
+
+    entry = cache.get(key)
+    if isinstance(entry, Entry):
+        return entry.value, False
+    return compute(), False
+
+
+def path_namespace(path: str) -> Optional[str]:
+    for pattern, namespace in PATH_NAMESPACES:
+        match = pattern.match(path)
+        if match:
+            return namespace.format(**match.groupdict()).lower()
+    return None
+
+
+def model_namespace(owner: str, repository: str) -> str:
+    return f"model:{owner}/{repository}".lower()
+
+
+def prediction_namespace(prediction_id: int) -> str:
+    return f"prediction:{prediction_id}"
+
+
+def _new_version() -> str:
+    # Random, so a version is never reused: not after its entry is culled
+    # (which mints a new one), nor by workers with skewed clocks
+    return uuid.uuid4().hex
+
+
+def namespace_version(namespace: str) -> str:
+    return cache.get_or_set(f"namespace:{namespace}", _new_version, None)
+
+
+def bump(namespaces: Iterable[str]) -> None:
+    """Invalidates the cached pages of the `namespaces`"""
+    cache.set_many(
+        {f"namespace:{n}": _new_version() for n in namespaces}, None
+    )
+
+
+def namespaced_prefix(key_prefix: str, path: str) -> str:
+    """`key_prefix` of the page at `path`, with its namespace version"""
+    namespace = path_namespace(path)
+    if namespace is None:
+        return key_prefix
+    return f"{key_prefix}:{namespace}:{namespace_version(namespace)}"
@@ -0,0 +1,37 @@
+import copy
+
+from django.middleware import cache
+
+from main.cache import namespaced_prefix
+
+
+def _for_request(middleware, request):
+    """
+    The middleware with the key prefix of the request's namespace, computed
+    once so the page is stored under the version it was fetched with
+    """
+    if not hasattr(request, "_cache_key_prefix"):
+        request._cache_key_prefix = namespaced_prefix(
+            middleware.key_prefix, request.path
+        )
+    bound = copy.copy(middleware)
+    bound.key_prefix = request._cache_key_prefix
+    return bound
+
+
+class UpdateCacheMiddleware(cache.UpdateCacheMiddleware):
+    """`UpdateCacheMiddleware` keyed by namespace (`main.cache.bump`)"""
+
+    def process_response(self, request, response):
+        return cache.UpdateCacheMiddleware.process_response(
+            _for_request(self, request), request, response
+        )
+
+
+class FetchFromCacheMiddleware(cache.FetchFromCacheMiddleware):
+    """`FetchFromCacheMiddleware` keyed by namespace (`main.cache.bump`)"""
+
+    def process_request(self, request):
+        return cache.FetchFromCacheMiddleware.process_request(
+            _for_request(self, request), request
+        )
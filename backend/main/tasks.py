@@ -20,9 +20,21 @@ app.conf.beat_schedule = {
         "schedule": crontab(day_of_week=5, hour=3, minute=0),
     },
     "update-contaovos-daily": {
-        "task": "datastore.tasks.sync_contaovos_for_date",
+        "task": "datastore.tasks.sync_contaovos",
         "schedule": crontab(hour=1, minute=0),
     },
+    "refresh-copernicus-weekly-daily": {
+        "task": "datastore.tasks.refresh_copernicus_brasil_weekly",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "warm-episcanner-bundles": {
+        "task": "datastore.tasks.warm_episcanner_bundles",
+        "schedule": crontab(minute="*/15"),
+    },
+    "refresh-map-boundaries-daily": {
+        "task": "maps.tasks.refresh_map_boundaries",
+        "schedule": crontab(hour=3, minute=30),
+    },
     "backup-databases-daily": {
         "task": "main.tasks.backup_databases",
         "schedule": crontab(hour=23, minute=0),
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from main.cache import (
+    Entry,
+    bump,
+    namespaced_prefix,
+    path_namespace,
+    single_flight,
+)
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.compute = mock.Mock(return_value="new")
+
+    def test_miss_is_computed_and_stored(self):
+        self.assertEqual(
+            single_flight("k", self.compute, 60, "k:latest"), ("new", False)
+        )
+        self.assertEqual(
+            single_flight("k", self.compute, 60, "k:latest"), ("new", False)
+        )
+        self.compute.assert_called_once()
+        self.assertEqual(cache.get("k:latest"), "new")
+
+    def test_expired_is_recomputed(self):
+        cache.set("k", Entry("old", 0), 60)
+        self.assertEqual(single_flight("k", self.compute, 60), ("new", False))
+        self.compute.assert_called_once()
+
+    def test_expired_is_served_while_locked(self):
+        cache.set("k", Entry("old", 0), 60)
+        cache.add("lock:k", 1)
+        self.assertEqual(single_flight("k", self.compute, 60), ("old", False))
+        self.compute.assert_not_called()
+
+    def test_stale_key_is_served_while_locked(self):
+        cache.set("k:latest", "previous")
+        cache.add("lock:k", 1)
+        self.assertEqual(
+            single_flight("k", self.compute, 60, "k:latest"),
+            ("previous", True),
+        )
+        self.compute.assert_not_called()
+
+    def test_waits_for_the_lock_holder(self):
+        cache.add("lock:k", 1)
+
+        def sleep(_):
+            cache.set("k", Entry("theirs", float("inf")))
+            cache.delete("lock:k")
+
+        with mock.patch("main.cache.time.sleep", side_effect=sleep):
+            self.assertEqual(
+                single_flight("k", self.compute, 60), ("theirs", False)
+            )
+        self.compute.assert_not_called()
+
+    def test_uncacheable_is_not_stored(self):
+        single_flight("k", self.compute, 60, cacheable=lambda value: False)
+        self.assertIsNone(cache.get("k"))
+        self.assertIsNone(cache.get("lock:k"))
+
+
+class NamespaceTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_path_namespace(self):
+        for path, namespace in [
+            ("/api/registry/predictions/12/", "prediction:12"),
+            ("/api/registry/predictions/12/data/", "prediction:12"),
+            ("/api/vis/dashboard/prediction/12/", "prediction:12"),
+            (
+                "/api/registry/model/Owner/Repo/predictions/",
+                "model:owner/repo",
+            ),
+            ("/api/registry/models/owner/repo/", "model:owner/repo"),
+            ("/api/registry/predictions/", "registry"),
+            ("/api/vis/dashboard/tree/", "dashboard"),
+            ("/api/datastore/episcanner/", None),
+        ]:
+            with self.subTest(path=path):
+                self.assertEqual(path_namespace(path), namespace)
+
+    def test_bump_changes_only_its_namespace(self):
+        prediction = namespaced_prefix("", "/api/registry/predictions/1/")
+        other = namespaced_prefix("", "/api/registry/predictions/2/")
+        dashboard = namespaced_prefix("", "/api/vis/dashboard/tree/")
+
+        bump(["prediction:1", "dashboard"])
+
+        self.assertNotEqual(
+            namespaced_prefix("", "/api/registry/predictions/1/"), prediction
+        )
+        self.assertNotEqual(
+            namespaced_prefix("", "/api/vis/dashboard/tree/"), dashboard
+        )
+        self.assertEqual(
+            namespaced_prefix("", "/api/registry/predictions/2/"), other
+        )
+        self.assertEqual(namespaced_prefix("p", "/api/datastore/"), "p")
+
+    def test_culled_version_is_not_reused(self):
+        path = "/api/vis/dashboard/tree/"
+        seen = {namespaced_prefix("", path)}
+        for _ in range(3):
+            cache.delete("namespace:dashboard")
+            seen.add(namespaced_prefix("", path))
+            bump(["dashboard"])
+            seen.add(namespaced_prefix("", path))
+        self.assertEqual(len(seen), 7)
@@ -1,8 +1,17 @@
+import gzip
+import json
+from typing import Literal
+
 from ninja import Router, Query
-from django.http import HttpRequest
+from ninja.errors import HttpError
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
 from django.contrib.gis.db.models.functions import AsGeoJSON
 from users.auth import UidKeyAuth
 from vis.brasil.models import GeoCity, GeoState
+from maps.boundaries import ALL_STATES, get_blob
+from maps.layers import TILE_LAYERS
+from maps.tiles import get_tile
 
 router = Router()
 
@@ -12,7 +21,19 @@ router = Router()
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
-def get_city_boundaries(request: HttpRequest, uf: str):
+def get_city_boundaries(
+    request: HttpRequest,
+    uf: str,
+    resolution: Literal["low", "medium", "high"] = "high",
+    format: Literal["geojson", "topojson"] = "geojson",
+):
+    data = get_blob("cities", uf, resolution, format)
+    if data is not None:
+        return blob_response(request, data)
+
+    if format == "topojson":
+        raise HttpError(404, "TopoJSON boundaries not available")
+
     cities = GeoCity.objects.filter(
         city__microregion__mesoregion__state__uf__iexact=uf
     ).annotate(geojson=AsGeoJSON("geometry"))
@@ -38,7 +59,21 @@ def get_city_boundaries(request: HttpRequest, uf: str):
     auth=UidKeyAuth(),
     include_in_schema=False,
 )
-def get_state_boundaries(request: HttpRequest, uf: list[str] = Query(None)):
+def get_state_boundaries(
+    request: HttpRequest,
+    uf: list[str] = Query(None),
+    resolution: Literal["low", "medium", "high"] = "high",
+    format: Literal["geojson", "topojson"] = "geojson",
+):
+    data = get_blob("states", ALL_STATES, resolution, format)
+    if data is not None:
+        if not uf:
+            return blob_response(request, data)
+        return filter_states(json.loads(gzip.decompress(data)), uf)
+
+    if format == "topojson":
+        raise HttpError(404, "TopoJSON boundaries not available")
+
     states = GeoState.objects.all()
 
     if uf:
@@ -61,3 +96,54 @@ def get_state_boundaries(request: HttpRequest, uf: list[str] = Query(None)):
         )
 
     return {"type": "FeatureCollection", "features": features}
+
+
+def blob_response(request: HttpRequest, data: bytes) -> HttpResponse:
+    """Sends the gzipped blob as is to the clients that accept it"""
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(data, content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(
+            gzip.decompress(data), content_type="application/json"
+        )
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+def filter_states(collection: dict, ufs: list[str]) -> dict:
+    ufs = [u.upper() for u in ufs]
+    if collection["type"] == "Topology":
+        states = collection["objects"]["states"]
+        states["geometries"] = [
+            g for g in states["geometries"] if g["properties"]["sigla"] in ufs
+        ]
+    else:
+        collection["features"] = [
+            f
+            for f in collection["features"]
+            if f["properties"]["sigla"] in ufs
+        ]
+    return collection
+
+
+@router.get(
+    "/tiles/{layer}/{int:z}/{int:x}/{int:y}.pbf",
+    auth=UidKeyAuth(),
+    include_in_schema=False,
+)
+def get_vector_tile(request: HttpRequest, layer: str, z: int, x: int, y: int):
+    """
+    Mapbox Vector Tile of a layer: states, cities, macrosaude or traps.
+    Tiles out of the layer zoom range are empty
+    """
+    if layer not in TILE_LAYERS:
+        raise HttpError(404, f"Unknown layer: {layer}")
+
+    if z > 22 or not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise HttpError(400, "Invalid tile coordinates")
+
+    return HttpResponse(
+        get_tile(layer, z, x, y),
+        content_type="application/vnd.mapbox-vector-tile",
+    )
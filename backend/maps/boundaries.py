@@ -0,0 +1,129 @@
+"""
+Precomputed state and city boundaries for `maps.api`. The geometries of
+each collection (all states, or the cities of a UF) are simplified at the
+`RESOLUTIONS` tolerances over a shared-arc topology (`maps.topology`), and
+stored as gzipped GeoJSON and TopoJSON blobs, served as they are.
+"""
+
+import gzip
+import json
+import logging
+from typing import Optional
+
+from django.db import transaction
+from django.contrib.gis.db.models.functions import AsGeoJSON
+
+from main.utils import UFs
+from maps.layers import CityLayer, StateLayer
+from maps.models import BoundaryBlob
+from maps.topology import Topology
+from vis.brasil.models import GeoCity, GeoState
+
+logger = logging.getLogger(__name__)
+
+# Douglas-Peucker tolerance, in degrees
+RESOLUTIONS = {"low": 0.01, "medium": 0.001, "high": 0.0001}
+FORMATS = ("geojson", "topojson")
+ALL_STATES = "BR"
+
+
+def _polygons(geojson: str) -> list:
+    geometry = json.loads(geojson)
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def state_features() -> list[tuple[dict, list]]:
+    rows = GeoState.objects.annotate(
+        geojson=AsGeoJSON("geometry")
+    ).values_list("state__geocode", "state__name", "state__uf", "geojson")
+    return [
+        ({"geocode": geocode, "name": name, "sigla": uf}, _polygons(geojson))
+        for geocode, name, uf, geojson in rows
+    ]
+
+
+def city_features(uf: str) -> list[tuple[dict, list]]:
+    rows = (
+        GeoCity.objects.filter(
+            city__microregion__mesoregion__state__uf__iexact=uf
+        )
+        .annotate(geojson=AsGeoJSON("geometry"))
+        .values_list("city__geocode", "city__name", "geojson")
+    )
+    return [
+        ({"geocode": geocode, "name": name}, _polygons(geojson))
+        for geocode, name, geojson in rows
+    ]
+
+
+def _compress(data: dict) -> bytes:
+    return gzip.compress(json.dumps(data, separators=(",", ":")).encode())
+
+
+def store(kind: str, uf: str, features: list, version: str) -> None:
+    topology = Topology.build(features)
+
+    blobs = []
+    for resolution, tolerance in RESOLUTIONS.items():
+        for fmt, data in (
+            ("geojson", topology.to_geojson(tolerance)),
+            ("topojson", topology.to_topojson(tolerance, kind)),
+        ):
+            blobs.append(
+                BoundaryBlob(
+                    kind=kind,
+                    uf=uf,
+                    resolution=resolution,
+                    format=fmt,
+                    data=_compress(data),
+                    version=version,
+                )
+            )
+
+    with transaction.atomic():
+        BoundaryBlob.objects.filter(kind=kind, uf=uf).delete()
+        BoundaryBlob.objects.bulk_create(blobs)
+
+
+def refresh_boundaries(force: bool = False) -> dict[str, int]:
+    """
+    Rebuilds the state and city blobs whose geometries changed since they
+    were built (their tile layer version moved), or all of them if `force`
+    """
+    refreshed = {"states": 0, "cities": 0}
+
+    version = str(StateLayer().version())
+    if force or _outdated("states", version):
+        store("states", ALL_STATES, state_features(), version)
+        refreshed["states"] = 1
+
+    version = str(CityLayer().version())
+    if force or _outdated("cities", version):
+        for uf in UFs:
+            features = city_features(uf)
+            if features:
+                store("cities", uf, features, version)
+                refreshed["cities"] += 1
+
+    logger.info("Map boundaries refreshed: %s", refreshed)
+    return refreshed
+
+
+def _outdated(kind: str, version: str) -> bool:
+    blobs = BoundaryBlob.objects.filter(kind=kind)
+    return not blobs.exists() or blobs.exclude(version=version).exists()
+
+
+def get_blob(kind: str, uf: str, resolution: str, fmt: str) -> Optional[bytes]:
+    data = (
+        BoundaryBlob.objects.filter(
+            kind=kind, uf=uf.upper(), resolution=resolution, format=fmt
+        )
+        .values_list("data", flat=True)
+        .first()
+    )
+    return bytes(data) if data is not None else None
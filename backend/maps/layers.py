@@ -1,6 +1,22 @@
+import time
+
 from vectortiles import VectorLayer
+from django.core.cache import cache
+from django.contrib.gis.geos import Polygon
+from django.db.models import Count, F, Func, Q, Value
+
+from datastore.caching import watermark
+from datastore.models import ContaOvos
+from vis.brasil.models import GeoCity, GeoMacroSaude, GeoState
+from .models import (
+    CentroidTest,
+    LayerVersion,
+    MultipolygonTest,
+    PolygonTest,
+)
 
-from .models import CentroidTest, PolygonTest, MultipolygonTest
+# Seconds a layer version is read from the cache before the database
+VERSION_INTERVAL = 60
 
 
 class CentroidLayer(VectorLayer):
@@ -25,3 +41,117 @@ class MultipolygonLayer(VectorLayer):
     tile_fields = ("name",)
     geom_field = "geom"
     min_zoom = 0
+
+
+class BoundaryLayer(VectorLayer):
+    """
+    Production layers, rendered by `maps.tiles`. `get_queryset` returns
+    the tile properties (`tile_fields`) as values. Boundaries are
+    simplified by zoom and versioned by `invalidate`, called when their
+    geometries change (see `maps.signals`). The version is stored in the
+    database (`LayerVersion`)
+    """
+
+    geom_field = "geometry"
+    max_zoom = 16
+    simplify = True
+
+    def geometry(self):
+        return F(self.geom_field)
+
+    def bounds_filter(self, west, south, east, north) -> Q:
+        bbox = Polygon.from_bbox((west, south, east, north))
+        bbox.srid = 4326
+        return Q(**{f"{self.geom_field}__bboverlaps": bbox})
+
+    def version(self):
+        # The cache only saves the query: a culled entry is read again
+        return cache.get_or_set(
+            f"tiles:version:{self.id}",
+            lambda: LayerVersion.objects.get_or_create(
+                layer=self.id, defaults={"version": time.time_ns()}
+            )[0].version,
+            VERSION_INTERVAL,
+        )
+
+    @classmethod
+    def invalidate(cls) -> None:
+        LayerVersion.objects.update_or_create(
+            layer=cls.id, defaults={"version": time.time_ns()}
+        )
+        cache.delete(f"tiles:version:{cls.id}")
+
+
+class StateLayer(BoundaryLayer):
+    model = GeoState
+    id = "states"
+    tile_fields = ("geocode", "name", "uf")
+    min_zoom = 0
+
+    def get_queryset(self):
+        return GeoState.objects.values(
+            geocode=F("state__geocode"),
+            name=F("state__name"),
+            uf=F("state__uf"),
+        )
+
+
+class CityLayer(BoundaryLayer):
+    model = GeoCity
+    id = "cities"
+    tile_fields = ("geocode", "name")
+    min_zoom = 4
+
+    def get_queryset(self):
+        return GeoCity.objects.values(
+            geocode=F("city__geocode"),
+            name=F("city__name"),
+        )
+
+
+class MacroSaudeLayer(BoundaryLayer):
+    model = GeoMacroSaude
+    id = "macrosaude"
+    tile_fields = ("geocode", "name", "uf")
+    min_zoom = 3
+
+    def get_queryset(self):
+        return GeoMacroSaude.objects.values(
+            "geocode", "name", uf=F("state__uf")
+        )
+
+
+class TrapLayer(BoundaryLayer):
+    """ContaOvos ovitraps, versioned by the ContaOvos ingestion"""
+
+    model = ContaOvos
+    id = "traps"
+    tile_fields = ("trap_id", "geocode", "countings")
+    min_zoom = 8
+    simplify = False
+
+    def get_queryset(self):
+        return ContaOvos.objects.values(
+            "latitude",
+            "longitude",
+            trap_id=F("ovitrap_website_id"),
+            geocode=F("adm2_id"),
+        ).annotate(countings=Count("counting_id"))
+
+    def geometry(self):
+        point = Func(F("longitude"), F("latitude"), function="ST_MakePoint")
+        return Func(point, Value(4326), function="ST_SetSRID")
+
+    def bounds_filter(self, west, south, east, north) -> Q:
+        return Q(latitude__range=(south, north)) & Q(
+            longitude__range=(west, east)
+        )
+
+    def version(self):
+        return watermark("contaovos")
+
+
+TILE_LAYERS = {
+    layer.id: layer
+    for layer in (StateLayer, CityLayer, MacroSaudeLayer, TrapLayer)
+}
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from maps.boundaries import refresh_boundaries
+
+
+class Command(BaseCommand):
+    help = "Precomputes the simplified boundaries served by the maps API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--if-changed",
+            action="store_true",
+            help="Only rebuild boundaries whose geometries changed",
+        )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_boundaries(force=not options["if_changed"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Finished. States: {refreshed['states']}, "
+                f"UFs with cities: {refreshed['cities']}"
+            )
+        )
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maps", "0004_multipolygontest"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BoundaryBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20)),
+                ("uf", models.CharField(max_length=2)),
+                ("resolution", models.CharField(max_length=10)),
+                ("format", models.CharField(max_length=10)),
+                ("data", models.BinaryField()),
+                ("version", models.CharField(max_length=50)),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="boundaryblob",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "uf", "resolution", "format"),
+                name="uq_boundary_blob",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maps", "0005_boundaryblob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LayerVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("layer", models.CharField(max_length=50, unique=True)),
+                ("version", models.BigIntegerField()),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
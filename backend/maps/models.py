@@ -14,3 +14,38 @@ class PolygonTest(models.Model):
 class MultipolygonTest(models.Model):
     name = models.CharField(max_length=250)  # type: ignore[var-annotated]
     geom = models.MultiPolygonField(srid=4326)  # type: ignore[var-annotated]
+
+
+class BoundaryBlob(models.Model):
+    """
+    Pre-serialized, gzipped boundary collections served by `maps.api`,
+    built by `maps.boundaries.refresh_boundaries`
+    """
+
+    kind = models.CharField(max_length=20)  # type: ignore[var-annotated]
+    uf = models.CharField(max_length=2)  # type: ignore[var-annotated]
+    resolution = models.CharField(max_length=10)  # type: ignore[var-annotated]
+    format = models.CharField(max_length=10)  # type: ignore[var-annotated]
+    data = models.BinaryField()  # type: ignore[var-annotated]
+    # Tile layer version of the geometries it was built from
+    version = models.CharField(max_length=50)  # type: ignore[var-annotated]
+    updated = models.DateTimeField(auto_now=True)  # type: ignore[var-annotated]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "uf", "resolution", "format"],
+                name="uq_boundary_blob",
+            )
+        ]
+
+
+class LayerVersion(models.Model):
+    """
+    Version of the geometries of a tile layer (`maps.layers`), bumped when
+    they change. Tiles and boundary blobs are keyed by it
+    """
+
+    layer = models.CharField(max_length=50, unique=True)  # type: ignore[var-annotated]
+    version = models.BigIntegerField()  # type: ignore[var-annotated]
+    updated = models.DateTimeField(auto_now=True)  # type: ignore[var-annotated]
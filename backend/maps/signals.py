@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from vis.brasil.models import GeoCity, GeoMacroSaude, GeoState
+from maps.layers import CityLayer, MacroSaudeLayer, StateLayer
+
+LAYERS = {
+    GeoState: StateLayer,
+    GeoCity: CityLayer,
+    GeoMacroSaude: MacroSaudeLayer,
+}
+
+
+@receiver(post_save, sender=GeoState)
+@receiver(post_delete, sender=GeoState)
+@receiver(post_save, sender=GeoCity)
+@receiver(post_delete, sender=GeoCity)
+@receiver(post_save, sender=GeoMacroSaude)
+@receiver(post_delete, sender=GeoMacroSaude)
+def invalidate_tiles(sender, **kwargs):
+    LAYERS[sender].invalidate()
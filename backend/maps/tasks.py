@@ -0,0 +1,7 @@
+from mosqlimate.celeryapp import app
+from maps import boundaries
+
+
+@app.task
+def refresh_map_boundaries(force: bool = False):
+    return boundaries.refresh_boundaries(force=force)
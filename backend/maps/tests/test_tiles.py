@@ -0,0 +1,52 @@
+import tempfile
+from pathlib import Path
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from maps.layers import CityLayer, StateLayer
+from maps.tiles import MBTiles, simplify_tolerance, tile_bounds
+
+
+class TilesTest(SimpleTestCase):
+    def test_tile_bounds(self):
+        west, south, east, north = tile_bounds(0, 0, 0)
+        self.assertEqual((west, east), (-180, 180))
+        self.assertAlmostEqual(north, 85.0511, places=4)
+        self.assertAlmostEqual(south, -85.0511, places=4)
+
+        west, south, east, north = tile_bounds(1, 0, 1)
+        self.assertEqual((west, east), (-180, 0))
+        self.assertAlmostEqual(north, 0)
+
+    def test_simplify_tolerance(self):
+        self.assertAlmostEqual(
+            simplify_tolerance(1) / 2, simplify_tolerance(2)
+        )
+
+    def test_mbtiles_version(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = MBTiles(Path(tmp) / "layer.mbtiles")
+            self.assertIsNone(store.get(3, 2, 1, "v1"))
+
+            store.set(3, 2, 1, "v1", b"tile")
+            self.assertEqual(store.get(3, 2, 1, "v1"), b"tile")
+            self.assertIsNone(store.get(3, 2, 1, "v2"))
+
+            store.set(3, 2, 2, "v2", b"other")
+            self.assertEqual(store.get(3, 2, 2, "v2"), b"other")
+            # Tiles of the previous version were dropped
+            self.assertIsNone(store.get(3, 2, 1, "v2"))
+
+
+class LayerVersionTest(TestCase):
+    def test_version_survives_the_cache(self):
+        version = StateLayer().version()
+        cache.clear()
+        self.assertEqual(StateLayer().version(), version)
+
+    def test_invalidate(self):
+        state, city = StateLayer().version(), CityLayer().version()
+        StateLayer.invalidate()
+        self.assertNotEqual(StateLayer().version(), state)
+        self.assertEqual(CityLayer().version(), city)
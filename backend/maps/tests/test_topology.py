@@ -0,0 +1,61 @@
+from django.test import SimpleTestCase
+
+from maps.topology import Topology, simplify
+
+
+def square(x0, y0, x1, y1, step=0.25):
+    """Closed ring with extra vertices along each side"""
+    n = round((x1 - x0) / step)
+    bottom = [(x0 + i * step, y0) for i in range(n)]
+    right = [(x1, y0 + i * step) for i in range(n)]
+    top = [(x1 - i * step, y1) for i in range(n)]
+    left = [(x0, y1 - i * step) for i in range(n)]
+    ring = bottom + right + top + left
+    return [[ring + [ring[0]]]]
+
+
+class TopologyTest(SimpleTestCase):
+    def setUp(self):
+        self.topology = Topology.build(
+            [
+                ({"sigla": "AA"}, square(0, 0, 1, 1)),
+                ({"sigla": "BB"}, square(1, 0, 2, 1)),
+            ]
+        )
+
+    def test_simplify_keeps_end_points(self):
+        points = [(0, 0), (1, 0.001), (2, 0), (3, 5), (4, 0)]
+        self.assertEqual(
+            simplify(points, 0.01), [(0, 0), (2, 0), (3, 5), (4, 0)]
+        )
+
+    def test_shared_border_is_one_arc(self):
+        (_, (a,)), (_, (b,)) = self.topology.features
+        shared = {i if i >= 0 else ~i for i in a[0]} & {
+            i if i >= 0 else ~i for i in b[0]
+        }
+        self.assertEqual(len(shared), 1)
+        # Each side walks the border in its own direction
+        (index,) = shared
+        self.assertEqual(sorted([index in a[0], index in b[0]]), [False, True])
+
+    def test_geojson_borders_match(self):
+        features = self.topology.to_geojson(0.5)["features"]
+        first, second = (f["geometry"]["coordinates"][0][0] for f in features)
+        self.assertIn([1.0, 0.0], first)
+        self.assertIn([1.0, 1.0], first)
+        self.assertEqual(
+            {tuple(p) for p in first if p[0] == 1.0},
+            {tuple(p) for p in second if p[0] == 1.0},
+        )
+        # Straight sides lose their intermediate vertices
+        self.assertLess(len(first), 4 * 4 + 1)
+
+    def test_topojson(self):
+        topojson = self.topology.to_topojson(0.0001, "states")
+        geometries = topojson["objects"]["states"]["geometries"]
+        self.assertEqual(topojson["type"], "Topology")
+        self.assertEqual(
+            [g["properties"]["sigla"] for g in geometries], ["AA", "BB"]
+        )
+        self.assertEqual(len(topojson["arcs"]), len(self.topology.arcs))
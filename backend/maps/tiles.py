@@ -0,0 +1,183 @@
+"""
+Mapbox Vector Tiles of the `maps.layers.TILE_LAYERS`, rendered by PostGIS
+(ST_AsMVT) and stored on disk in one MBTiles file per layer, under
+`settings.TILES_CACHE_DIR`.
+
+Polygons are simplified to half a screen pixel of the requested zoom, so
+national maps at low zooms only carry the vertices that can be seen. The
+store keeps the version of its layer in the MBTiles metadata: tiles of
+another version are never served, and the first tile of a new version
+empties the store.
+"""
+
+import math
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BinaryField, Func, Value
+
+from .layers import TILE_LAYERS
+
+EXTENT = 4096
+BUFFER = 64
+TILE_SIZE = 256  # pixels
+SIMPLIFY_PIXELS = 0.5
+WEB_MERCATOR_WIDTH = 40075016.68557849  # meters
+
+MBTILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (
+    zoom_level INTEGER,
+    tile_column INTEGER,
+    tile_row INTEGER,
+    tile_data BLOB,
+    PRIMARY KEY (zoom_level, tile_column, tile_row)
+);
+"""
+
+
+def tile_bounds(z: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """(west, south, east, north) of a XYZ tile, in degrees"""
+    n = 2**z
+
+    def lat(row: float) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return (x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y))
+
+
+def simplify_tolerance(z: int) -> float:
+    """Half a screen pixel at zoom `z`, in meters"""
+    return WEB_MERCATOR_WIDTH / (2**z * TILE_SIZE) * SIMPLIFY_PIXELS
+
+
+class MBTiles:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(MBTILES_SCHEMA)
+        return conn
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection) -> Optional[str]:
+        row = conn.execute(
+            "SELECT value FROM metadata WHERE name = 'version'"
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, z: int, x: int, y: int, version: str) -> Optional[bytes]:
+        conn = self.connect()
+        try:
+            if self._version(conn) != version:
+                return None
+            row = conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? "
+                "AND tile_column = ? AND tile_row = ?",
+                (z, x, 2**z - 1 - y),  # MBTiles rows are TMS
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def set(self, z: int, x: int, y: int, version: str, data: bytes) -> None:
+        conn = self.connect()
+        try:
+            with conn:
+                if self._version(conn) != version:
+                    conn.execute("DELETE FROM tiles")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO metadata VALUES "
+                        "('version', ?)",
+                        (version,),
+                    )
+                conn.execute(
+                    "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                    (z, x, 2**z - 1 - y, data),
+                )
+        finally:
+            conn.close()
+
+
+def render_tile(layer, z: int, x: int, y: int) -> bytes:
+    # The filter bounds include the buffer rendered around the tile
+    west, south, east, north = tile_bounds(z, x, y)
+    margin = (east - west) * BUFFER / EXTENT
+    bounds = (
+        west - margin,
+        max(south - margin, -90),
+        east + margin,
+        min(north + margin, 90),
+    )
+
+    geom = Func(
+        layer.geometry(),
+        Value(3857),
+        function="ST_Transform",
+        output_field=BinaryField(),
+    )
+    if layer.simplify:
+        geom = Func(
+            geom,
+            Value(simplify_tolerance(z)),
+            function="ST_SimplifyPreserveTopology",
+            output_field=BinaryField(),
+        )
+    envelope = Func(
+        Value(z),
+        Value(x),
+        Value(y),
+        function="ST_TileEnvelope",
+        output_field=BinaryField(),
+    )
+    geom = Func(
+        geom,
+        envelope,
+        Value(EXTENT),
+        Value(BUFFER),
+        Value(True),
+        function="ST_AsMVTGeom",
+        output_field=BinaryField(),
+    )
+
+    queryset = (
+        layer.get_queryset()
+        .filter(layer.bounds_filter(*bounds))
+        .annotate(tile_geom=geom)
+    )
+    sql, params = queryset.query.sql_with_params()
+
+    quote = connection.ops.quote_name
+    fields = ", ".join(quote(f) for f in layer.tile_fields)
+    query = (
+        f"SELECT ST_AsMVT(t.*, %s, {EXTENT}, 'tile_geom') FROM ("
+        f"SELECT {fields}, tile_geom FROM ({sql}) AS q "
+        "WHERE tile_geom IS NOT NULL) AS t"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(query, [layer.id, *params])
+        (tile,) = cursor.fetchone()
+    return bytes(tile or b"")
+
+
+def get_tile(layer_id: str, z: int, x: int, y: int) -> bytes:
+    layer = TILE_LAYERS[layer_id]()
+    if not layer.min_zoom <= z <= layer.max_zoom:
+        return b""
+
+    version = hashlib.sha1(str(layer.version()).encode()).hexdigest()
+    store = MBTiles(Path(settings.TILES_CACHE_DIR) / f"{layer.id}.mbtiles")
+
+    tile = store.get(z, x, y, version)
+    if tile is None:
+        tile = render_tile(layer, z, x, y)
+        store.set(z, x, y, version, tile)
+    return tile
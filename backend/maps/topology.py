@@ -0,0 +1,277 @@
+"""
+Shared-arc topology of polygon features, serialized as TopoJSON or as
+GeoJSON at a given simplification tolerance.
+
+Rings are cut at the junctions (points where the neighbouring vertices
+differ between rings) into arcs, and a border between two features is a
+single arc referenced by both. Each arc is simplified once, keeping its
+end points, so adjacent features stay seamless at any tolerance.
+"""
+
+import math
+from typing import Any, Optional
+
+Point = tuple[float, float]
+Key = tuple[int, int]
+
+# Vertices closer than this (in degrees) are the same topology node
+PRECISION = 1e7
+# TopoJSON quantization (grid cells per axis)
+QUANTIZATION = 100_000
+
+
+def _key(point) -> Key:
+    return (round(point[0] * PRECISION), round(point[1] * PRECISION))
+
+
+def simplify(points: list[Point], tolerance: float) -> list[Point]:
+    """Douglas-Peucker, always keeping the end points"""
+    if len(points) < 3 or not tolerance:
+        return points
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+
+        farthest, distance = 0, 0.0
+        for i in range(first + 1, last):
+            x, y = points[i]
+            if length:
+                d = abs(dy * x - dx * y + x2 * y1 - y2 * x1) / length
+            else:
+                d = math.hypot(x - x1, y - y1)
+            if d > distance:
+                farthest, distance = i, d
+
+        if distance > tolerance:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+class Topology:
+    def __init__(self):
+        self.points: dict[Key, Point] = {}
+        self.arcs: list[list[Key]] = []
+        self._index: dict[tuple, int] = {}
+        # (properties, polygons -> rings -> arc indexes)
+        self.features: list[tuple[dict, list[list[list[int]]]]] = []
+
+    @classmethod
+    def build(cls, features: list[tuple[dict, Any]]) -> "Topology":
+        """
+        `features` are (properties, coordinates) pairs, the coordinates of
+        a GeoJSON MultiPolygon: polygons -> rings -> (x, y) points
+        """
+        topology = cls()
+
+        rings: list[list[list[list[Key]]]] = []
+        for _, polygons in features:
+            feature_rings = []
+            for polygon in polygons:
+                polygon_rings = []
+                for ring in polygon:
+                    keys = []
+                    for point in ring:
+                        key = _key(point)
+                        topology.points.setdefault(key, tuple(point))
+                        if not keys or keys[-1] != key:
+                            keys.append(key)
+                    if len(keys) > 1 and keys[0] == keys[-1]:
+                        keys.pop()
+                    if len(keys) >= 3:
+                        polygon_rings.append(keys)
+                if polygon_rings:
+                    feature_rings.append(polygon_rings)
+            rings.append(feature_rings)
+
+        junctions = _junctions(
+            ring
+            for feature in rings
+            for polygon in feature
+            for ring in polygon
+        )
+
+        for (properties, _), feature in zip(features, rings):
+            topology.features.append(
+                (
+                    properties,
+                    [
+                        [
+                            [
+                                topology._add(arc, closed)
+                                for arc, closed in _cut(ring, junctions)
+                            ]
+                            for ring in polygon
+                        ]
+                        for polygon in feature
+                    ],
+                )
+            )
+
+        return topology
+
+    def _add(self, arc: list[Key], closed: bool) -> int:
+        if closed:
+            arc = _rotate(arc[:-1])
+            reverse = tuple(_rotate(arc[:-1][::-1]))
+        else:
+            reverse = tuple(arc[::-1])
+
+        key = tuple(arc)
+        if key in self._index:
+            return self._index[key]
+        if reverse in self._index:
+            return ~self._index[reverse]
+
+        self._index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return len(self.arcs) - 1
+
+    def simplified_arcs(self, tolerance: float) -> list[list[Point]]:
+        arcs = [
+            simplify([self.points[k] for k in arc], tolerance)
+            for arc in self.arcs
+        ]
+
+        # Rings that would collapse keep their arcs, for every feature
+        for _, polygons in self.features:
+            for polygon in polygons:
+                for ring in polygon:
+                    if len(_ring(ring, arcs)) < 4:
+                        for index in ring:
+                            i = ~index if index < 0 else index
+                            arcs[i] = [self.points[k] for k in self.arcs[i]]
+        return arcs
+
+    def to_geojson(self, tolerance: float) -> dict:
+        arcs = self.simplified_arcs(tolerance)
+        digits = _digits(tolerance)
+
+        features = []
+        for properties, polygons in self.features:
+            coordinates = [
+                [
+                    [
+                        [round(x, digits), round(y, digits)]
+                        for x, y in _ring(ring, arcs)
+                    ]
+                    for ring in polygon
+                ]
+                for polygon in polygons
+            ]
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "MultiPolygon",
+                        "coordinates": coordinates,
+                    },
+                    "properties": properties,
+                }
+            )
+
+        return {"type": "FeatureCollection", "features": features}
+
+    def to_topojson(self, tolerance: float, name: str) -> dict:
+        arcs = self.simplified_arcs(tolerance)
+
+        xs = [x for arc in arcs for x, _ in arc] or [0.0]
+        ys = [y for arc in arcs for _, y in arc] or [0.0]
+        x0, y0 = min(xs), min(ys)
+        kx = (max(xs) - x0) / (QUANTIZATION - 1) or 1
+        ky = (max(ys) - y0) / (QUANTIZATION - 1) or 1
+
+        encoded = []
+        for arc in arcs:
+            quantized: list[list[int]] = []
+            for x, y in arc:
+                point = [round((x - x0) / kx), round((y - y0) / ky)]
+                if not quantized or point != quantized[-1]:
+                    quantized.append(point)
+            if len(quantized) == 1:
+                quantized.append(quantized[0])
+
+            # Delta encoded, the first point is absolute
+            deltas = [quantized[0]] + [
+                [b[0] - a[0], b[1] - a[1]]
+                for a, b in zip(quantized, quantized[1:])
+            ]
+            encoded.append(deltas)
+
+        return {
+            "type": "Topology",
+            "transform": {"scale": [kx, ky], "translate": [x0, y0]},
+            "objects": {
+                name: {
+                    "type": "GeometryCollection",
+                    "geometries": [
+                        {
+                            "type": "MultiPolygon",
+                            "arcs": polygons,
+                            "properties": properties,
+                        }
+                        for properties, polygons in self.features
+                    ],
+                }
+            },
+            "arcs": encoded,
+        }
+
+
+def _junctions(rings) -> set[Key]:
+    neighbours: dict[Key, frozenset] = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, key in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % n]))
+            if neighbours.setdefault(key, pair) != pair:
+                junctions.add(key)
+    return junctions
+
+
+def _rotate(ring: list[Key]) -> list[Key]:
+    """Closed ring starting (and ending) at its smallest point"""
+    i = ring.index(min(ring))
+    return ring[i:] + ring[:i] + [ring[i]]
+
+
+def _cut(ring: list[Key], junctions: set[Key]) -> list[tuple[list, bool]]:
+    starts = [i for i, key in enumerate(ring) if key in junctions]
+    if not starts:
+        return [(ring + [ring[0]], True)]
+
+    ring = ring[starts[0] :] + ring[: starts[0]]
+    arcs = []
+    arc = [ring[0]]
+    for key in ring[1:]:
+        arc.append(key)
+        if key in junctions:
+            arcs.append((arc, False))
+            arc = [key]
+    arc.append(ring[0])
+    arcs.append((arc, False))
+    return arcs
+
+
+def _ring(indexes: list[int], arcs: list[list[Point]]) -> list[Point]:
+    points: list[Point] = []
+    for i in indexes:
+        arc = arcs[~i][::-1] if i < 0 else arcs[i]
+        points.extend(arc[1:] if points else arc)
+    return points
+
+
+def _digits(tolerance: Optional[float]) -> int:
+    if not tolerance:
+        return 7
+    return max(0, math.ceil(-math.log10(tolerance)) + 1)
@@ -84,9 +84,9 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
-    "django.middleware.cache.UpdateCacheMiddleware",
+    "main.middleware.UpdateCacheMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.cache.FetchFromCacheMiddleware",
+    "main.middleware.FetchFromCacheMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -204,6 +204,11 @@ CACHES = {
     }
 }
 
+# MBTiles stores of the map vector tiles (maps.tiles)
+TILES_CACHE_DIR = env(
+    "TILES_CACHE_DIR", default=f"{BASE_DIR.parent}/tilecache"
+)
+
 
 SOCIALACCOUNT_PROVIDERS = {
     "github": {
@@ -1,6 +1,8 @@
 from .base import *  # noqa: F403
 from .base import DATABASES as _base_databases  # noqa: E402
 
+import tempfile
+
 DEFAULT_CREDS = _base_databases["default"]
 
 DATABASES = {
@@ -36,3 +38,11 @@ DATABASE_ROUTERS: tuple[str, ...] = ()  # type: ignore[no-redef]
 TEST_RUNNER = "mosqlimate.settings.test_runner.SimpleTestRunner"
 
 PASSWORD_HASHERS = ("django.contrib.auth.hashers.MD5PasswordHasher",)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+TILES_CACHE_DIR = tempfile.mkdtemp(prefix="tilecache-")
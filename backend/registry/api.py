@@ -622,8 +622,8 @@ def repository_predictions(request, owner: str, repository: str):
             "quantitativeprediction",
         )
         .annotate(
-            start=models.Min("quantitativeprediction__data__date"),
-            end=models.Max("quantitativeprediction__data__date"),
+            start=models.F("quantitativeprediction__start_date"),
+            end=models.F("quantitativeprediction__end_date"),
             mae_score=models.F("quantitativeprediction__mae_score"),
             mse_score=models.F("quantitativeprediction__mse_score"),
             crps_score=models.F("quantitativeprediction__crps_score"),
@@ -996,10 +996,6 @@ def list_predictions(
     ).all()
 
     qs = filters.filter(qs)
-    qs = qs.annotate(
-        start_date=models.Min("quantitativeprediction__data__date"),
-        end_date=models.Max("quantitativeprediction__data__date"),
-    )
 
     if user and (user.is_superuser or user.is_staff):
         pass
@@ -1194,6 +1190,8 @@ def create_prediction(request, data: s.PredictionIn):
                 )
             }
 
+    dates = [row.date for row in data.prediction]
+
     prediction = m.QuantitativePrediction(
         model=model,
         disease=disease_obj,
@@ -1202,6 +1200,9 @@ def create_prediction(request, data: s.PredictionIn):
         case_definition=data.case_definition,
         published=data.published,
         adm_level=data.adm_level,
+        start_date=min(dates, default=None),
+        end_date=max(dates, default=None),
+        n_rows=len(dates),
         **adms,
     )
 
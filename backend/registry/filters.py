@@ -73,9 +73,10 @@ class PredictionFilterSchema(FilterSchema):
     imdc_year: Optional[int] = Field(
         default=None, q="model__sprint__year__exact"
     )  # type: ignore[call-overload]
+    # Predictions with dates within [start, end]
     start: Optional[date] = Field(
-        None, q="quantitativeprediction__data__date__gte"
+        None, q="quantitativeprediction__end_date__gte"
     )  # type: ignore[call-overload]
     end: Optional[date] = Field(
-        None, q="quantitativeprediction__data__date__lte"
+        None, q="quantitativeprediction__start_date__lte"
     )  # type: ignore[call-overload]
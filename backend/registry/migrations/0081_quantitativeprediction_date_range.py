@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def set_date_range(apps, schema_editor):
+    QuantitativePrediction = apps.get_model(
+        "registry", "QuantitativePrediction"
+    )
+    QuantitativePredictionRow = apps.get_model(
+        "registry", "QuantitativePredictionRow"
+    )
+    rows = (
+        QuantitativePredictionRow.objects.filter(prediction=OuterRef("pk"))
+        .order_by()
+        .values("prediction")
+    )
+    QuantitativePrediction.objects.update(
+        start_date=Subquery(rows.annotate(d=Min("date")).values("d")),
+        end_date=Subquery(rows.annotate(d=Max("date")).values("d")),
+        n_rows=Coalesce(Subquery(rows.annotate(n=Count("id")).values("n")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("registry", "0080_alter_organizationmembership_organization"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quantitativeprediction",
+            name="start_date",
+            field=models.DateField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="quantitativeprediction",
+            name="end_date",
+            field=models.DateField(db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="quantitativeprediction",
+            name="n_rows",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(
+            set_date_range, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -294,6 +294,10 @@ class QuantitativePrediction(ModelPrediction):
     log_score = models.FloatField(null=True, default=None)  # type: ignore[var-annotated]
     interval_score = models.FloatField(null=True, default=None)  # type: ignore[var-annotated]
     wis_score = models.FloatField(null=True, default=None)  # type: ignore[var-annotated]
+    # Date range and size of `data`, kept on insert
+    start_date = models.DateField(null=True, db_index=True)  # type: ignore[var-annotated]
+    end_date = models.DateField(null=True, db_index=True)  # type: ignore[var-annotated]
+    n_rows = models.PositiveIntegerField(default=0)  # type: ignore[var-annotated]
 
     @property
     def scores(self) -> dict:
@@ -1,6 +1,52 @@
+import json
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, List, Optional, Sequence
+
+from ninja.errors import HttpError
 from ninja.pagination import PaginationBase
 from ninja import Schema
-from typing import Any, List, Optional
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Serializes the key of the last returned row into an opaque token"""
+    raw = json.dumps(list(values), cls=DjangoJSONEncoder)
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise HttpError(400, "Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise HttpError(400, "Invalid cursor")
+    return values
+
+
+def keyset_filter(fields: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Lexicographic "greater than" over the key fields:
+        (a, b, c) > (x, y, z) =
+            a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    """
+    q = Q()
+    for i, field in enumerate(fields):
+        branch = Q()
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            branch &= Q(**{prev_field: prev_value})
+        q |= branch & Q(**{f"{field}__gt": values[i]})
+    return q
+
+
+def _item_key(item: Any, fields: Sequence[str]) -> list:
+    if isinstance(item, dict):
+        return [item[f] for f in fields]
+    return [getattr(item, f) for f in fields]
 
 
 class PagesPagination(PaginationBase):
@@ -9,6 +55,8 @@ class PagesPagination(PaginationBase):
     class Input(Schema):
         page: int = 1
         per_page: int = 300
+        cursor: Optional[str] = None
+        count: bool = False
 
     class Output(Schema):
         items: Optional[List[Any]] = None
@@ -16,6 +64,14 @@ class PagesPagination(PaginationBase):
         message: Optional[str] = None
         error: Optional[str] = None
 
+    def __init__(
+        self,
+        cursor_fields: Optional[Sequence[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.cursor_fields = tuple(cursor_fields or ())
+        super().__init__(**kwargs)
+
     def paginate_queryset(  # type: ignore[override]
         self,
         queryset,
@@ -41,9 +97,14 @@ class PagesPagination(PaginationBase):
             page 3 = query[10:15]
             ...
             page 9 = query[40:45]
+
+        Cursor mode:
+            Enabled when `cursor` is sent (empty for the first page) on
+            endpoints that declare `cursor_fields`. Rows are ordered by
+            these fields and each page starts right after the key encoded
+            in `next_cursor`, so no OFFSET nor COUNT(*) is needed. The total
+            is only computed if `count=true` is also sent.
         """
-        total_items: int = self._items_count(queryset)
-        page: int = pagination.page
         per_page: int = pagination.per_page
         max_per_page = self.max_per_page
         message: str = ""
@@ -59,6 +120,14 @@ class PagesPagination(PaginationBase):
             per_page = 1
             message = "The minimum items per page is 1"
 
+        if pagination.cursor is not None:
+            return self._paginate_cursor(
+                queryset, pagination, per_page, message
+            )
+
+        total_items: int = self._items_count(queryset)
+        page: int = pagination.page
+
         total_pages: int = total_items // per_page
 
         if total_pages * per_page < total_items:
@@ -83,3 +152,57 @@ class PagesPagination(PaginationBase):
             },
             "message": message,
         }
+
+    def _paginate_cursor(
+        self,
+        queryset,
+        pagination: Input,
+        per_page: int,
+        message: str,
+    ) -> Any:
+        fields = self.cursor_fields
+        if not fields:
+            raise HttpError(400, "This endpoint does not support `cursor`")
+
+        query = getattr(queryset, "query", None)
+        if query is not None and query.values_select:
+            selected = set(query.values_select) | set(query.annotation_select)
+            if not set(fields) <= selected:
+                # e.g. aggregated rows, which don't carry the row key
+                raise HttpError(
+                    400, "`cursor` is not supported for this query"
+                )
+
+        total_items: Optional[int] = None
+        if pagination.count:
+            total_items = self._items_count(queryset)
+
+        queryset = queryset.order_by(*fields)
+
+        if pagination.cursor:
+            values = decode_cursor(pagination.cursor, len(fields))
+            queryset = queryset.filter(keyset_filter(fields, values))
+
+        # Fetches one extra row to know if there is a next page
+        items = list(queryset[: per_page + 1])
+        has_next = len(items) > per_page
+        items = items[:per_page]
+
+        next_cursor = None
+        if has_next:
+            next_cursor = encode_cursor(_item_key(items[-1], fields))
+
+        res: dict[str, Any] = {
+            "items": len(items),
+            "per_page": per_page,
+            "next_cursor": next_cursor,
+        }
+
+        if total_items is not None:
+            res["total_items"] = total_items
+
+        return {
+            "items": items,
+            "pagination": res,
+            "message": message,
+        }
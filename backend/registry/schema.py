@@ -8,10 +8,9 @@ from epiweeks import Week
 import pandas as pd
 from ninja import Field
 from ninja.errors import HttpError
-from django.db.models import Min, Max
 
 from main.schema import Schema
-from .models import ModelPrediction
+from .models import ModelPrediction, QuantitativePrediction
 
 
 class Model(Schema):
@@ -58,6 +57,12 @@ class Model(Schema):
         return obj.updated.date()
 
 
+def _quantitative(obj) -> Optional[QuantitativePrediction]:
+    if isinstance(obj, QuantitativePrediction):
+        return obj
+    return getattr(obj, "quantitativeprediction", None)
+
+
 class Prediction(Schema):
     id: int
     model: Model
@@ -82,23 +87,13 @@ class Prediction(Schema):
 
     @staticmethod
     def resolve_start(obj):
-        start = getattr(obj, "start_date", None)
-        if start:
-            return start
-        child = getattr(obj, "quantitativeprediction", None)
-        if child:
-            return child.data.aggregate(d=Min("date"))["d"]
-        return None
+        child = _quantitative(obj)
+        return child.start_date if child else None
 
     @staticmethod
     def resolve_end(obj):
-        end = getattr(obj, "end_date", None)
-        if end:
-            return end
-        child = getattr(obj, "quantitativeprediction", None)
-        if child:
-            return child.data.aggregate(d=Max("date"))["d"]
-        return None
+        child = _quantitative(obj)
+        return child.end_date if child else None
 
     @staticmethod
     def resolve_adm_0(obj):
@@ -0,0 +1,193 @@
+"""
+Scores of quantitative predictions against the observed cases, computed
+with NumPy over the rows of many predictions at once.
+
+As in `mosqlient.scoring.score.Scorer`, the forecast of each row is a
+lognormal distribution fitted to its quantile bands: by least squares over
+the nine quantiles when the prediction has every band, or from the median
+and the upper 90% bound when it only has the 90% interval. CRPS and the log
+score are the ones of that lognormal; the interval score is the 90% one and
+WIS weights every interval the prediction has.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+# Band column -> quantile level
+QUANTILES = {
+    "lower_95": 0.025,
+    "lower_90": 0.05,
+    "lower_80": 0.1,
+    "lower_50": 0.25,
+    "pred": 0.5,
+    "upper_50": 0.75,
+    "upper_80": 0.9,
+    "upper_90": 0.95,
+    "upper_95": 0.975,
+}
+INTERVALS = (50, 80, 90, 95)
+CONF_LEVEL = 90
+LOG_SCORE_FLOOR = -100.0
+# Bounds of the lognormal sigma, as in mosqlient's fit
+SIGMA_MIN = 1e-6
+SIGMA_MAX = 15.0
+SCORES = ("mae", "mse", "crps", "log_score", "interval_score", "wis")
+
+
+def interval_score(lower, upper, observed, alpha: float) -> np.ndarray:
+    return (
+        upper
+        - lower
+        + 2 / alpha * np.maximum(0, lower - observed)
+        + 2 / alpha * np.maximum(0, observed - upper)
+    )
+
+
+def fit_lognormal(
+    bands: dict[str, np.ndarray], complete: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    `mu` and `sigma` of each row: least squares over the quantiles where
+    `complete`, else the median and upper 90% bound
+    """
+    z = ndtri(np.array(list(QUANTILES.values())))
+    quantiles = np.column_stack([bands[c] for c in QUANTILES])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        y = np.log(np.where(quantiles <= 0, 0.01, quantiles))
+        dz = z - z.mean()
+        sigma_ls = (y - y.mean(axis=1, keepdims=True)) @ dz / (dz @ dz)
+        mu_ls = y.mean(axis=1) - sigma_ls * z.mean()
+
+        median, upper = bands["pred"], bands[f"upper_{CONF_LEVEL}"]
+        mu_90 = np.log(np.where(median > 0, median, 0.1))
+        sigma_90 = np.clip(
+            (np.log(np.where(upper > 0, upper, 0.01)) - mu_90)
+            / ndtri(QUANTILES[f"upper_{CONF_LEVEL}"]),
+            SIGMA_MIN,
+            SIGMA_MAX,
+        )
+
+    return (
+        np.where(complete, mu_ls, mu_90),
+        np.where(complete, sigma_ls, sigma_90),
+    )
+
+
+def _available(codes: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Whether each of the `n` predictions has `values` in all its rows"""
+    missing = np.bincount(codes, weights=np.isnan(values), minlength=n)
+    return missing == 0
+
+
+def _mean(codes: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    valid = ~np.isnan(values)
+    sums = np.bincount(codes[valid], weights=values[valid], minlength=n)
+    counts = np.bincount(codes[valid], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def score_arrays(
+    codes: np.ndarray,
+    observed: np.ndarray,
+    bands: dict[str, np.ndarray],
+    n: Optional[int] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Mean scores of `n` predictions. Row `i` belongs to prediction
+    `codes[i]`, was observed as `observed[i]` and forecasted as
+    `bands[column][i]` (NaN or a missing column where there is no band).
+    NaN where a prediction lacks the bands a score needs
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    n = int(codes.max()) + 1 if n is None else n
+    y = np.asarray(observed, dtype=float)
+    nan = np.full(len(y), np.nan)
+    cols = {
+        c: np.asarray(bands[c], dtype=float) if c in bands else nan
+        for c in QUANTILES
+    }
+    has = {c: _available(codes, v, n)[codes] for c, v in cols.items()}
+
+    median = cols["pred"]
+    lower = cols[f"lower_{CONF_LEVEL}"]
+    upper = cols[f"upper_{CONF_LEVEL}"]
+    probabilistic = (
+        has["pred"] & has[f"lower_{CONF_LEVEL}"] & has[f"upper_{CONF_LEVEL}"]
+    )
+    complete = np.logical_and.reduce(list(has.values()))
+
+    mu, sigma = fit_lognormal(cols, complete)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_y = np.where(y > 0, np.log(np.where(y > 0, y, 1)), -np.inf)
+        w = (log_y - mu) / sigma
+        crps = y * (2 * ndtr(w) - 1) - 2 * np.exp(mu + sigma**2 / 2) * (
+            ndtr(w - sigma) + ndtr(sigma / np.sqrt(2)) - 1
+        )
+        log_score = np.where(
+            y > 0,
+            -log_y - np.log(sigma) - 0.5 * np.log(2 * np.pi) - 0.5 * w**2,
+            -np.inf,
+        )
+        log_score = np.maximum(log_score, LOG_SCORE_FLOOR)
+
+    weighted = 0.5 * np.abs(y - median)
+    intervals = np.zeros(len(y))
+    for level in INTERVALS:
+        present = has[f"lower_{level}"] & has[f"upper_{level}"]
+        alpha = 1 - level / 100
+        weighted = weighted + np.where(
+            present,
+            alpha
+            / 2
+            * interval_score(
+                cols[f"lower_{level}"], cols[f"upper_{level}"], y, alpha
+            ),
+            0,
+        )
+        intervals += present
+    wis = weighted / (intervals + 0.5)
+
+    def probabilistic_only(values):
+        return np.where(probabilistic, values, np.nan)
+
+    rows = {
+        "mae": np.abs(y - median),
+        "mse": (y - median) ** 2,
+        "crps": probabilistic_only(crps),
+        "log_score": probabilistic_only(log_score),
+        "interval_score": probabilistic_only(
+            interval_score(lower, upper, y, 1 - CONF_LEVEL / 100)
+        ),
+        "wis": probabilistic_only(wis),
+    }
+    return {name: _mean(codes, values, n) for name, values in rows.items()}
+
+
+def score(
+    rows: pd.DataFrame, by: str = "prediction_id"
+) -> dict[Any, dict[str, Optional[float]]]:
+    """
+    Scores of each prediction in `rows`, which have the prediction (`by`),
+    the observed `casos` and the band columns of `QUANTILES`
+    """
+    if rows.empty:
+        return {}
+
+    ids, codes = np.unique(rows[by].to_numpy(), return_inverse=True)
+    scores = score_arrays(
+        codes.ravel(),
+        rows["casos"].to_numpy(dtype=float),
+        {c: rows[c].to_numpy(dtype=float) for c in QUANTILES if c in rows},
+        len(ids),
+    )
+    return {
+        key.item() if hasattr(key, "item") else key: {
+            name: None if np.isnan(values[i]) else float(values[i])
+            for name, values in scores.items()
+        }
+        for i, key in enumerate(ids)
+    }
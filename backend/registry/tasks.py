@@ -1,58 +1,257 @@
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from dateutil.relativedelta import relativedelta  # type: ignore[import-untyped]
 from typing import Optional
 
-from django.core.cache import cache
-from django.db.models import Subquery, OuterRef, Max, Q
+import pandas as pd
+from celery import chord
+from django.db import connections
+from django.db.models import Q
 from django.utils import timezone
 
+from main import cache
 from mosqlimate.celeryapp import app
 
-from registry.models import QuantitativePrediction
-from vis.utils import calculate_score
+from registry import scoring
+from registry.models import QuantitativePrediction, QuantitativePredictionRow
+from vis.utils import ground_truth_rows, hist_alerta_data, scoring_target
 
+logger = logging.getLogger(__name__)
 
-@app.task
-def update_prediction_scores(prediction_ids: Optional[list[int]] = None):
+# registry.scoring score -> QuantitativePrediction field
+SCORE_FIELDS = {
+    "mae": "mae_score",
+    "mse": "mse_score",
+    "crps": "crps_score",
+    "log_score": "log_score",
+    "interval_score": "interval_score",
+    "wis": "wis_score",
+}
+# Predictions per scoring subtask
+SCORING_CHUNK_SIZE = 25
+
+
+def predictions_to_score(prediction_ids: Optional[list[int]] = None) -> list:
+    """
+    Ids of the predictions ending in the last year or never scored, out of
+    `prediction_ids` when given
+    """
     year_ago = timezone.now().date() - relativedelta(years=1)
 
-    latest = (
-        QuantitativePrediction.objects.filter(id=OuterRef("id"))
-        .annotate(max_date=Max("data__date"))
-        .values("max_date")
+    empty_scores = Q(**{f"{f}__isnull": True for f in SCORE_FIELDS.values()})
+
+    filters = Q(end_date__gte=year_ago) | empty_scores
+
+    if prediction_ids:
+        filters &= Q(id__in=prediction_ids)
+
+    # Predictions of the same target end up in the same chunks
+    return list(
+        QuantitativePrediction.objects.filter(filters)
+        .order_by(
+            "disease", "case_definition", "adm_level", "adm1", "adm2", "id"
+        )
+        .values_list("id", flat=True)
     )
 
-    q = QuantitativePrediction.objects.annotate(end_date=Subquery(latest))
 
-    empty_scores = Q(
-        mae_score__isnull=True,
-        mse_score__isnull=True,
-        crps_score__isnull=True,
-        log_score__isnull=True,
-        interval_score__isnull=True,
-        wis_score__isnull=True,
+def load_ground_truth(predictions: list) -> dict[tuple, object]:
+    """
+    Cases of each scoring target (`vis.utils.scoring_target`), read once
+    for the union of the date windows of its `predictions`. Keyed by the
+    target; None where they couldn't be read
+    """
+    windows: dict[tuple, list] = {}
+    targets: dict[tuple, dict] = {}
+    for prediction in predictions:
+        target = scoring_target(prediction)
+        if not target or not prediction.start_date:
+            continue
+        key = tuple(sorted(target.items()))
+        targets[key] = target
+        start, end = windows.get(
+            key, (prediction.start_date, prediction.end_date)
+        )
+        windows[key] = [
+            min(start, prediction.start_date),
+            max(end, prediction.end_date),
+        ]
+
+    truth: dict[tuple, object] = {}
+    for key, (start, end) in windows.items():
+        try:
+            truth[key] = hist_alerta_data(
+                start_window_date=start, end_window_date=end, **targets[key]
+            )
+        except ValueError as e:
+            logger.error("Loading ground truth %s: %s", key, e)
+            truth[key] = None
+    return truth
+
+
+def score_rows(prediction_ids: list[int]) -> dict[int, dict]:
+    """
+    Scores of the predictions that have rows and ground truth, computed in
+    one pass over the rows of all of them (`registry.scoring`)
+    """
+    predictions = list(
+        QuantitativePrediction.objects.filter(
+            id__in=prediction_ids
+        ).select_related("disease", "adm1", "adm2")
     )
 
-    filters = Q(end_date__gte=year_ago) | empty_scores
+    # Each target's cases are tagged with its index as `group`
+    truth = load_ground_truth(predictions)
+    groups = {key: i for i, key in enumerate(truth)}
+    prediction_group = {}
+    for prediction in predictions:
+        target = scoring_target(prediction)
+        key = tuple(sorted(target.items())) if target else None
+        if truth.get(key) is not None:
+            prediction_group[prediction.id] = groups[key]
+
+    frames = [
+        df.assign(group=groups[key])
+        for key, df in truth.items()
+        if df is not None and not df.empty
+    ]
+    if not frames or not prediction_group:
+        return {}
+
+    rows = pd.DataFrame(
+        list(
+            QuantitativePredictionRow.objects.filter(
+                prediction_id__in=prediction_group
+            ).values("prediction_id", "date", *scoring.QUANTILES)
+        )
+    )
+    if rows.empty:
+        return {}
+
+    rows["group"] = rows["prediction_id"].map(prediction_group)
+    rows = ground_truth_rows(rows, pd.concat(frames), on=["group", "date"])
+    return scoring.score(rows)
+
+
+def score_chunk(prediction_ids: list[int]) -> dict[str, dict]:
+    """
+    Scores of each prediction, keyed by its id (as str, for JSON). When the
+    chunk can't be scored at once, each prediction is scored on its own;
+    the ones that fail are logged and get None scores, so a chunk always
+    returns every prediction
+    """
+    results = {str(i): dict.fromkeys(scoring.SCORES) for i in prediction_ids}
 
-    if not prediction_ids:
-        predictions = q.filter(filters)
-    else:
-        predictions = q.filter(Q(id__in=prediction_ids) & filters)
+    try:
+        scored = score_rows(prediction_ids)
+    except Exception as e:
+        logger.error("Scoring chunk %s: %s", prediction_ids, e)
+        scored = {}
+        for prediction_id in prediction_ids:
+            try:
+                scored.update(score_rows([prediction_id]))
+            except Exception as e:
+                logger.error("Scoring prediction %s: %s", prediction_id, e)
 
+    for prediction_id, scores in scored.items():
+        results[str(prediction_id)] = scores
+    return results
+
+
+@app.task
+def score_predictions(prediction_ids: list[int]) -> dict[str, dict]:
+    results = score_chunk(prediction_ids)
+    logger.info("Scored %s predictions", len(results))
+    return results
+
+
+def score_namespaces(predictions: list) -> set[str]:
+    """Cache namespaces of the pages showing the scores of `predictions`"""
+    namespaces = {"dashboard"}
     for prediction in predictions:
-        try:
-            scores = calculate_score(prediction.id)
-        except Exception as e:
-            logging.error(e)
-            continue
+        repository = prediction.model.repository
+        owner = (
+            repository.owner.username
+            if repository.owner
+            else repository.organization.name
+        )
+        namespaces.add(cache.prediction_namespace(prediction.id))
+        namespaces.add(cache.model_namespace(owner, repository.name))
+    return namespaces
+
+
+@app.task
+def save_prediction_scores(chunks: list[dict[str, dict]]) -> int:
+    """Stores the changed scores of the `score_predictions` chunks"""
+    scores = {int(i): s for chunk in chunks for i, s in chunk.items()}
 
-        if scores != prediction.scores:
-            cache.clear()
-            prediction.mae_score = scores["mae"]
-            prediction.mse_score = scores["mse"]
-            prediction.crps_score = scores["crps"]
-            prediction.log_score = scores["log_score"]
-            prediction.interval_score = scores["interval_score"]
-            prediction.wis_score = scores["wis"]
-            prediction.save()
+    changed = []
+    for prediction in (
+        QuantitativePrediction.objects.filter(id__in=scores)
+        .select_related(
+            "model__repository__owner", "model__repository__organization"
+        )
+        .only(
+            "id",
+            "model__repository__name",
+            "model__repository__owner__username",
+            "model__repository__organization__name",
+            *SCORE_FIELDS.values(),
+        )
+    ):
+        new = scores[prediction.id]
+        if any(
+            getattr(prediction, field) != new[key]
+            for key, field in SCORE_FIELDS.items()
+        ):
+            for key, field in SCORE_FIELDS.items():
+                setattr(prediction, field, new[key])
+            changed.append(prediction)
+
+    if changed:
+        QuantitativePrediction.objects.bulk_update(
+            changed, list(SCORE_FIELDS.values()), batch_size=500
+        )
+        cache.bump(score_namespaces(changed))
+
+    logger.info("%s prediction scores updated", len(changed))
+    return len(changed)
+
+
+def _score_locally(chunks: list[list[int]]) -> list[dict]:
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    results = []
+    with ProcessPoolExecutor(mp_context=context) as pool:
+        for n, result in enumerate(pool.map(score_chunk, chunks), 1):
+            logger.info("Scored chunk %s of %s", n, len(chunks))
+            results.append(result)
+    return results
+
+
+@app.task
+def update_prediction_scores(
+    prediction_ids: Optional[list[int]] = None, local: bool = False
+):
+    """
+    Scores the predictions in chunks, in parallel: a chord of
+    `score_predictions` subtasks on the workers, or a process pool with
+    `local=True`, then saves the changed scores at once
+    """
+    ids = predictions_to_score(prediction_ids)
+    chunks = [
+        ids[i : i + SCORING_CHUNK_SIZE]
+        for i in range(0, len(ids), SCORING_CHUNK_SIZE)
+    ]
+    if not chunks:
+        return 0
+
+    if local:
+        return save_prediction_scores(_score_locally(chunks))
+
+    chord(score_predictions.s(chunk) for chunk in chunks)(
+        save_prediction_scores.s()
+    )
+    return len(ids)
@@ -0,0 +1,109 @@
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from mosqlient.scoring.score import Scorer
+from scipy.stats import lognorm, norm
+
+from registry import scoring
+from registry.tasks import score_chunk
+
+
+def lognormal_bands(mu, sigma) -> dict:
+    return {
+        column: lognorm.ppf(q, s=sigma, scale=np.exp(mu))
+        for column, q in scoring.QUANTILES.items()
+    }
+
+
+class ScoringTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        n = 30
+        self.dates = pd.date_range("2024-01-07", periods=n, freq="W-SUN")
+        self.observed = rng.integers(50, 500, n).astype(float)
+        mu = np.log(self.observed) + rng.normal(0, 0.3, n)
+        self.bands = lognormal_bands(mu, rng.uniform(0.1, 0.6, n))
+
+    def rows(self, columns=scoring.QUANTILES):
+        return pd.DataFrame(
+            {
+                "prediction_id": 1,
+                "date": self.dates,
+                "casos": self.observed,
+                **{c: self.bands[c] for c in columns},
+            }
+        )
+
+    def test_matches_mosqlient_scorer(self):
+        data = pd.DataFrame({"date": self.dates, "casos": self.observed})
+        pred = self.rows().drop(columns=["prediction_id", "casos"])
+        scorer = Scorer("key", df_true=data, pred=pred)
+
+        scores = scoring.score(self.rows())[1]
+
+        for name in ("mae", "mse", "crps", "log_score", "wis"):
+            with self.subTest(score=name):
+                self.assertAlmostEqual(
+                    scores[name], scorer.summary[name]["pred"], places=6
+                )
+
+    def test_interval_score_uses_both_bounds(self):
+        lower, upper = self.bands["lower_90"], self.bands["upper_90"]
+        expected = np.mean(
+            scoring.interval_score(lower, upper, self.observed, 0.1)
+        )
+        score = scoring.score(self.rows())[1]["interval_score"]
+        self.assertAlmostEqual(score, expected)
+
+    def test_only_90_interval(self):
+        rows = self.rows(["lower_90", "pred", "upper_90"])
+        scores = scoring.score(rows)[1]
+
+        median = self.bands["pred"]
+        mu = np.log(median)
+        sigma = (np.log(self.bands["upper_90"]) - mu) / norm.ppf(0.95)
+        expected = np.mean(
+            lognorm.logpdf(self.observed, s=sigma, scale=np.exp(mu))
+        )
+        self.assertAlmostEqual(scores["log_score"], expected)
+        self.assertAlmostEqual(
+            scores["mae"], np.mean(np.abs(self.observed - median))
+        )
+        self.assertIsNotNone(scores["wis"])
+
+    def test_point_predictions(self):
+        scores = scoring.score(self.rows(["pred"]))[1]
+        self.assertIsNotNone(scores["mae"])
+        self.assertIsNotNone(scores["mse"])
+        for name in ("crps", "log_score", "interval_score", "wis"):
+            self.assertIsNone(scores[name])
+
+    def test_scores_each_prediction(self):
+        first = self.rows()
+        second = first.assign(prediction_id=2, pred=first["pred"] * 2)
+        scores = scoring.score(pd.concat([first, second]))
+
+        self.assertEqual(set(scores), {1, 2})
+        self.assertEqual(scores[1], scoring.score(first)[1])
+        self.assertGreater(scores[2]["mae"], scores[1]["mae"])
+
+
+class ScoreChunkTest(SimpleTestCase):
+    @mock.patch("registry.tasks.score_rows")
+    def test_failed_prediction_gets_no_scores(self, score_rows):
+        scores = dict.fromkeys(scoring.SCORES, 1.0)
+
+        def fake_score_rows(ids):
+            if 2 in ids:
+                raise ValueError("bad rows")
+            return {i: scores for i in ids}
+
+        score_rows.side_effect = fake_score_rows
+
+        results = score_chunk([1, 2, 3])
+
+        self.assertEqual(results["1"], scores)
+        self.assertEqual(results["3"], scores)
+        self.assertEqual(results["2"], dict.fromkeys(scoring.SCORES))
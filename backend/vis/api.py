@@ -23,7 +23,7 @@ from vis.charts import (
 from ninja import Router, Query
 from ninja.decorators import decorate_view
 from django.views.decorators.cache import never_cache
-from django.db.models import Max, Min, Q
+from django.db.models import Q
 
 router = Router()
 router.add_router("", infodengue_router)
@@ -287,9 +287,7 @@ def dashboard_predictions(
         "model__repository__owner",
     )
 
-    qs = qs.annotate(start=Min("data__date"), end=Max("data__date"))
-
-    qs = qs.filter(start__isnull=False)
+    qs = qs.filter(start_date__isnull=False)
 
     return qs
 
@@ -1,23 +1,31 @@
 from typing import List
 
 from ninja import Router, Query
-from ninja.decorators import decorate_view
-from django.db.models import F, Sum, Count, Q
-from django.views.decorators.cache import never_cache
+from django.db.models import F
 
 from users.auth import ChartAuth
-from main.utils import UF_CODES, CODES_UF
-from main.models import APILog
+from main.utils import CODES_UF
 from datastore.models import ContaOvos
+from datastore.caching import cached_result
+from datastore.charts import (
+    WEEKLY_RANGE_DESCRIPTION,
+    contaovos_weekly,
+    eggs_density,
+    map_clusters,
+    map_states,
+    positivity,
+)
 from vis.throttle import SdkThrottle
 from vis.charts.schema import (
     ContaOvosChartIn,
     ContaOvosPositivityIn,
     ContaOvosMapIn,
+    ContaOvosMapClusterIn,
     ContaOvosEggsDensityOut,
     ContaOvosPositivityOut,
     ContaOvosMapStateOut,
     ContaOvosMapScatterOut,
+    ContaOvosMapClusterOut,
 )
 
 router = Router(tags=["charts"])
@@ -25,143 +33,66 @@ auth = ChartAuth()
 throttle = SdkThrottle()
 
 
-@decorate_view(never_cache)
 @router.get(
     "/charts/contaovos/eggs_density/",
     response=List[ContaOvosEggsDensityOut],
     auth=auth,
     throttle=throttle,
+    description=WEEKLY_RANGE_DESCRIPTION,
 )
+@cached_result("contaovos", log=True)
 def charts_contaovos(
     request,
     payload: ContaOvosChartIn = Query(...),
 ):
-    APILog.from_request(request)
-    qs = ContaOvos.objects.filter(date__range=(payload.start, payload.end))
-
-    if payload.uf:
-        qs = qs.filter(adm2__adm1=UF_CODES[payload.uf.upper()])
-    elif payload.geocode:
-        qs = qs.filter(adm2=payload.geocode)
-
-    qs = (
-        qs.values("year", "week")  # type: ignore[assignment]
-        .annotate(total_eggs=Sum("eggs"))
-        .order_by("year", "week")
+    qs = contaovos_weekly(
+        payload.start, payload.end, uf=payload.uf, geocode=payload.geocode
     )
-
-    return [
-        {
-            "epiweek": f"{row['year']}-{str(row['week']).zfill(2)}",  # type: ignore[index]
-            "total_eggs": row["total_eggs"],  # type: ignore[index]
-        }
-        for row in qs
-    ]
+    return eggs_density(qs)
 
 
-@decorate_view(never_cache)
 @router.get(
     "/charts/contaovos/positivity/",
     response=List[ContaOvosPositivityOut],
     auth=auth,
     throttle=throttle,
+    description=WEEKLY_RANGE_DESCRIPTION,
 )
+@cached_result("contaovos", log=True)
 def charts_contaovos_positivity(
     request,
     payload: ContaOvosPositivityIn = Query(...),
 ):
-    APILog.from_request(request)
-    qs = ContaOvos.objects.filter(date__range=(payload.start, payload.end))
-
-    if payload.uf:
-        qs = qs.filter(adm2__adm1=UF_CODES[payload.uf.upper()])
-
-    data = (
-        qs.annotate(
-            group=F("adm2__name") if payload.uf else F("adm2__adm1__geocode")
-        )
-        .values("group")
-        .annotate(
-            total_traps=Count("ovitrap_website_id", distinct=True),
-            pos_traps=Count(
-                "ovitrap_website_id", distinct=True, filter=Q(eggs__gt=0)
-            ),
-        )
-    )
-
-    result = []
-    for row in data:
-        name = row["group"]
-        if not payload.uf:
-            name = CODES_UF.get(int(name), str(name))
-        positivity = round(
-            (
-                (row["pos_traps"] / row["total_traps"] * 100)
-                if row["total_traps"]
-                else 0
-            ),
-            2,
-        )
-        result.append({"name": name, "positivity": positivity})
+    qs = contaovos_weekly(payload.start, payload.end, uf=payload.uf)
+    return positivity(qs, by_municipality=bool(payload.uf))
 
-    result.sort(key=lambda x: x["positivity"], reverse=True)
-    return result
 
-
-@decorate_view(never_cache)
 @router.get(
     "/charts/contaovos/map/",
     response=List[ContaOvosMapStateOut],
     auth=auth,
     throttle=throttle,
+    description=WEEKLY_RANGE_DESCRIPTION,
 )
+@cached_result("contaovos", log=True)
 def charts_contaovos_map(
     request,
     payload: ContaOvosMapIn = Query(...),
 ):
-    APILog.from_request(request)
-    qs = ContaOvos.objects.filter(date__range=(payload.start, payload.end))
-
-    states = (
-        qs.annotate(state_code_num=F("adm2__adm1__geocode"))
-        .values("state_code_num")
-        .annotate(
-            total_eggs=Sum("eggs"),
-            trap_count=Count("ovitrap_website_id", distinct=True),
-            municipality_count=Count("adm2", distinct=True),
-        )
-    )
-
-    state_data = []
-    for row in states:
-        name = CODES_UF.get(
-            int(row["state_code_num"]),
-            str(row["state_code_num"]),
-        )
-        state_data.append(
-            {
-                "name": name,
-                "total_eggs": row["total_eggs"],
-                "trap_count": row["trap_count"],
-                "municipality_count": row["municipality_count"],
-            }
-        )
-
-    return state_data
+    return map_states(contaovos_weekly(payload.start, payload.end))
 
 
-@decorate_view(never_cache)
 @router.get(
     "/charts/contaovos/map/scatter/",
     response=List[ContaOvosMapScatterOut],
     auth=auth,
     throttle=throttle,
 )
+@cached_result("contaovos", log=True)
 def charts_contaovos_map_scatter(
     request,
     payload: ContaOvosMapIn = Query(...),
 ):
-    APILog.from_request(request)
     qs = ContaOvos.objects.filter(date__range=(payload.start, payload.end))
 
     scatter_qs = (
@@ -195,3 +126,17 @@ def charts_contaovos_map_scatter(
         )
 
     return scatter_data
+
+
+@router.get(
+    "/charts/contaovos/map/clusters/",
+    response=List[ContaOvosMapClusterOut],
+    auth=auth,
+    throttle=throttle,
+)
+@cached_result("contaovos", log=True)
+def charts_contaovos_map_clusters(
+    request,
+    payload: ContaOvosMapClusterIn = Query(...),
+):
+    return map_clusters(payload.start, payload.end, payload.zoom, payload.bbox)
@@ -1,14 +1,11 @@
 from typing import List
 
 from ninja import Router, Query
-from ninja.decorators import decorate_view
-from django.views.decorators.cache import never_cache
-from django.core.cache import cache
 
 from users.auth import ChartAuth
-from main.utils import UFs
-from main.models import APILog
-from datastore.models import Adm2, EpiscannerSirParams
+from datastore.models import EpiscannerSirParams
+from datastore.geography import geography
+from datastore.caching import cached_result
 from vis.throttle import SdkThrottle
 from vis.charts.schema import (
     EpiscannerChartIn,
@@ -26,32 +23,21 @@ DISEASE_CID10 = {
 }
 
 
-@decorate_view(never_cache)
 @router.get(
     "/charts/episcanner/",
     response=List[EpiscannerChartOut],
     auth=auth,
     throttle=throttle,
 )
+@cached_result("episcanner", "geography", log=True)
 def charts_episcanner(
     request,
     payload: EpiscannerChartIn = Query(...),
 ):
-    APILog.from_request(request)
-
-    cache_key = f"episcanner:{payload.disease}:{payload.uf}:{payload.year}"
-    cached_data = cache.get(cache_key)
-    if cached_data is not None:
-        return cached_data
-
     cid10 = DISEASE_CID10[payload.disease]
 
-    geocodes_in_state = [
-        int(g)
-        for g in Adm2.objects.filter(adm1__name=UFs[payload.uf]).values_list(
-            "geocode", flat=True
-        )
-    ]
+    geo = geography()
+    geocodes_in_state = geo.geocodes(payload.uf)
 
     rows = (
         EpiscannerSirParams.objects.using("infodengue")
@@ -78,20 +64,13 @@ def charts_episcanner(
         )
     )
 
-    adm2_names = {
-        a.geocode: a.name
-        for a in Adm2.objects.filter(
-            geocode__in=[str(g) for g in geocodes_in_state]
-        )
-    }
-
     objs = [
         EpiscannerChartOut(
             disease=payload.disease,
             CID10=r["cid10"],
             year=r["year"],
             geocode=r["geocode"],
-            muni_name=adm2_names.get(str(r["geocode"]), ""),
+            muni_name=geo.name(r["geocode"]),
             peak_week=r["peak_week"],
             beta=r["beta"],
             gamma=r["gamma"],
@@ -106,5 +85,4 @@ def charts_episcanner(
         for r in rows
     ]
 
-    cache.set(cache_key, objs, timeout=86400)
     return objs
@@ -1,18 +1,16 @@
 from typing import Any, List, Literal, Optional
 
 from ninja import Router, Query
-from ninja.decorators import decorate_view
-from django.views.decorators.cache import never_cache
 
 from users.auth import ChartAuth
 from main.utils import UFs
-from main.models import APILog
 from datastore.models import (
-    Municipio,
     HistoricoAlerta,
     HistoricoAlertaZika,
     HistoricoAlertaChik,
 )
+from datastore.geography import geography
+from datastore.caching import cached_result, HISTORICO_ALERTA
 from vis.throttle import SdkThrottle
 from vis.charts.schema import (
     InfodengueChartIn,
@@ -42,12 +40,7 @@ def get_infodengue_queryset(
     if uf:
         uf = uf.upper()  # type: ignore[no-redef]
         if uf in UFs:
-            uf_name = UFs[uf]
-            geocodes = (
-                Municipio.objects.using("infodengue")
-                .filter(uf=uf_name)
-                .values_list("geocodigo", flat=True)
-            )
+            geocodes = geography().geocodes(uf)
             qs = qs.filter(municipio_geocodigo__in=geocodes)
         else:
             raise ValueError("Invalid UF")
@@ -55,18 +48,17 @@ def get_infodengue_queryset(
     return qs
 
 
-@decorate_view(never_cache)
 @router.get(
     "/charts/infodengue/rt/",
     response={200: List[InfodengueRtOut], 404: dict},
     auth=auth,
     throttle=throttle,
 )
+@cached_result(*HISTORICO_ALERTA, "geography", log=True)
 def charts_infodengue_rt(
     request,
     payload: InfodengueChartIn = Query(...),
 ):
-    APILog.from_request(request)
     qs = get_infodengue_queryset(payload.disease)  # type: ignore[arg-type]
 
     if qs is None:
@@ -85,18 +77,17 @@ def charts_infodengue_rt(
     return list(data)
 
 
-@decorate_view(never_cache)
 @router.get(
     "/charts/infodengue/total-cases/",
     response={200: InfodengueTotalCasesOut, 404: dict},
     auth=auth,
     throttle=throttle,
 )
+@cached_result(*HISTORICO_ALERTA, "geography", log=True)
 def charts_infodengue_total_cases(
     request,
     payload: InfodengueChartIn = Query(...),
 ):
-    APILog.from_request(request)
     from django.db.models import Sum
 
     qs = get_infodengue_queryset(payload.disease)  # type: ignore[arg-type]
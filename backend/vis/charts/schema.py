@@ -5,6 +5,8 @@ from typing import Optional
 from ninja import Schema
 from pydantic import field_validator, model_validator
 
+from datastore.charts import parse_bbox
+
 MAX_DATE_RANGE_DAYS = 365
 
 VALID_DISEASES = {"dengue", "deng", "chik", "chikungunya", "zika"}
@@ -176,6 +178,25 @@ class ContaOvosMapIn(Schema):
         return self
 
 
+class ContaOvosMapClusterIn(ContaOvosMapIn):
+    zoom: int = 4
+    bbox: Optional[str] = None  # west,south,east,north
+
+    @field_validator("zoom")
+    @classmethod
+    def validate_zoom(cls, v):
+        if not 0 <= v <= 22:
+            raise ValueError("Zoom must be between 0 and 22")
+        return v
+
+    @field_validator("bbox")
+    @classmethod
+    def validate_bbox(cls, v):
+        if v is not None:
+            parse_bbox(v)
+        return v
+
+
 class EpiscannerChartIn(Schema):
     disease: str
     uf: str
@@ -275,6 +296,15 @@ class ContaOvosMapScatterOut(Schema):
     municipality: str
 
 
+class ContaOvosMapClusterOut(Schema):
+    latitude: float
+    longitude: float
+    count: int
+    eggs: int
+    trap_id: Optional[int] = None
+    municipality: Optional[str] = None
+
+
 class EpiscannerChartOut(Schema):
     disease: str
     CID10: str
@@ -53,6 +53,14 @@ class DashboardPredictionOut(Schema):
     def resolve_repository(obj):
         return obj.model.repository.name
 
+    @staticmethod
+    def resolve_start(obj):
+        return obj.start_date
+
+    @staticmethod
+    def resolve_end(obj):
+        return obj.end_date
+
     @staticmethod
     def resolve_sprint(obj):
         if obj.model.sprint:
@@ -1,5 +1,5 @@
 from datetime import date, timedelta
-from unittest.mock import patch, Mock
+from unittest.mock import patch
 
 from django.test import TestCase, Client
 from django.contrib.auth import get_user_model
@@ -381,6 +381,8 @@ class EpiscannerChartInTest(TestCase):
 
 
 class ClimateChartEndpointTest(TestCase):
+    databases = {"default", "infodengue"}
+
     def setUp(self):
         self.client = Client()
         self.user = User.objects.create_user(
@@ -441,7 +443,7 @@ class ClimateChartEndpointTest(TestCase):
 
     @patch("vis.charts.climate.CopernicusBrasil")
     def test_accumulated_waterfall_accepts_sdk_key(self, mock_model):
-        mock_model.objects.using.return_value.filter.return_value.order_by.return_value.values.return_value = (
+        mock_model.objects.using.return_value.filter.return_value.order_by.return_value.values.return_value.annotate.return_value = (
             []
         )
         r = self.client.get(
@@ -465,6 +467,8 @@ class ClimateChartEndpointTest(TestCase):
 
 
 class InfodengueChartEndpointTest(TestCase):
+    databases = {"default", "infodengue"}
+
     def setUp(self):
         self.client = Client()
         self.user = User.objects.create_user(
@@ -630,6 +634,8 @@ class ContaOvosChartEndpointTest(TestCase):
 
 
 class EpiscannerChartEndpointTest(TestCase):
+    databases = {"default", "infodengue"}
+
     def setUp(self):
         self.client = Client()
         self.user = User.objects.create_user(
@@ -646,14 +652,10 @@ class EpiscannerChartEndpointTest(TestCase):
         )
         self.assertEqual(r.status_code, 401)
 
-    @patch("vis.charts.episcanner.cache")
     @patch("vis.charts.episcanner.EpiscannerSirParams")
-    @patch("vis.charts.episcanner.Adm2")
-    def test_accepts_sdk_key(self, mock_adm2, mock_params, mock_cache):
-        mock_cache.get.return_value = None
-        geocodes_filter = Mock()
-        geocodes_filter.values_list.return_value = ["2300101"]
-        mock_adm2.objects.filter.side_effect = [geocodes_filter, []]
+    @patch("vis.charts.episcanner.geography")
+    def test_accepts_sdk_key(self, mock_geo, mock_params):
+        mock_geo.return_value.geocodes.return_value = [2300101]
         mock_params.objects.using.return_value.filter.return_value.values.return_value = (
             []
         )
@@ -665,14 +667,10 @@ class EpiscannerChartEndpointTest(TestCase):
         self.assertEqual(r.status_code, 200)
         self.assertEqual(r.json(), [])
 
-    @patch("vis.charts.episcanner.cache")
     @patch("vis.charts.episcanner.EpiscannerSirParams")
-    @patch("vis.charts.episcanner.Adm2")
-    def test_accepts_uid_key(self, mock_adm2, mock_params, mock_cache):
-        mock_cache.get.return_value = None
-        geocodes_filter = Mock()
-        geocodes_filter.values_list.return_value = ["2300101"]
-        mock_adm2.objects.filter.side_effect = [geocodes_filter, []]
+    @patch("vis.charts.episcanner.geography")
+    def test_accepts_uid_key(self, mock_geo, mock_params):
+        mock_geo.return_value.geocodes.return_value = [2300101]
         mock_params.objects.using.return_value.filter.return_value.values.return_value = (
             []
         )
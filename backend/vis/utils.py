@@ -1,25 +1,20 @@
-from django.db.models import Min, Max
 from datetime import date
 from typing import Optional, Literal
 
 import pandas as pd
 from django.db.models import Sum
-from django.contrib.auth import get_user_model
-from mosqlient.scoring.score import Scorer
 
-from main.utils import UF_CODES, CODES_UF
+from main.utils import CODES_UF
 from datastore.models import (
-    Adm2,
     HistoricoAlerta,
     HistoricoAlertaChik,
     HistoricoAlertaZika,
 )
+from datastore.geography import geography
+from registry import scoring
 from registry.models import QuantitativePrediction
 
 
-User = get_user_model()
-
-
 def hist_alerta_data(
     case_definition: Literal["reported", "probable"],
     disease: str,
@@ -39,12 +34,10 @@ def hist_alerta_data(
         raise ValueError("Unknown disease")
 
     if str(adm_level) == "1":
-        if not str(adm_1).isdigit():
-            adm_1 = UF_CODES[adm_1]
+        if str(adm_1).isdigit():
+            adm_1 = CODES_UF[int(adm_1)]
 
-        geocodes = list(
-            Adm2.objects.filter(adm1=adm_1).values_list("geocode", flat=True)
-        )
+        geocodes = geography().geocodes(adm_1)  # type: ignore[arg-type]
     elif str(adm_level) == "2":
         if adm_2 is None:
             raise ValueError("adm_2 required when adm_level=2")
@@ -72,51 +65,22 @@ def hist_alerta_data(
     return df
 
 
-def calculate_score(
-    prediction_id: int,
-    confidence_level: float = 0.9,
-) -> dict[str, float | None]:
-    prediction = QuantitativePrediction.objects.get(id=prediction_id)
-
-    scores: dict[str, float | None] = dict(
-        mae=None,
-        mse=None,
-        crps=None,
-        log_score=None,
-        interval_score=None,
-        wis=None,
-    )
+SCORE_DISEASES = {"A90": "dengue", "A92.5": "zika", "A92.0": "chik"}
 
-    disease: str | None = None
-    match prediction.disease.code:
-        case "A90":
-            disease = "dengue"
-        case "A92.5":
-            disease = "zika"
-        case "A92.0":
-            disease = "chik"
-        case _:
-            disease = None
 
+def scoring_target(prediction: QuantitativePrediction) -> Optional[dict]:
+    """
+    `hist_alerta_data` arguments, but the date window, of the cases the
+    prediction is scored against. Predictions with the same target share
+    them. None for diseases that can't be scored
+    """
+    disease = SCORE_DISEASES.get(prediction.disease.code)
     if not disease:
-        return scores
-
-    data = prediction.data.aggregate(
-        min_date=Min("date"),
-        max_date=Max("date"),
-    )
-
-    start_window_date = data["min_date"]
-    end_window_date = data["max_date"]
+        return None
 
-    if not start_window_date or not end_window_date:
-        return scores
-
-    data_df = hist_alerta_data(
+    return dict(
         case_definition=prediction.case_definition,
         disease=disease,
-        start_window_date=start_window_date,
-        end_window_date=end_window_date,
         adm_level=int(prediction.adm_level),
         adm_1=(
             CODES_UF[int(prediction.adm1.geocode)] if prediction.adm1 else None
@@ -124,29 +88,72 @@ def calculate_score(
         adm_2=int(prediction.adm2.geocode) if prediction.adm2 else None,
     )
 
-    pred_df = pd.DataFrame(list(prediction.data.values()))
 
-    pred_df = pred_df.dropna(axis=1)
+def slice_window(df: pd.DataFrame, start: date, end: date) -> pd.DataFrame:
+    """Rows of a `hist_alerta_data` frame within [start, end]"""
+    dates = df["date"]
+    return df[
+        (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+    ].copy()
 
-    if data_df.empty or pred_df.empty:
-        return scores
 
-    data_df.rename(columns={"target": "casos"}, inplace=True)
+def ground_truth_rows(
+    rows: pd.DataFrame, ground_truth: pd.DataFrame, on: list[str]
+) -> pd.DataFrame:
+    """
+    Prediction `rows` with the observed cases (`casos`) of their date, out
+    of a `hist_alerta_data` frame. Rows without observed cases are dropped
+    """
+    observed = ground_truth.rename(columns={"target": "casos"})
+    rows = rows.assign(date=pd.to_datetime(rows["date"]))
+    return rows.merge(observed[[*on, "casos"]], on=on)
+
 
-    if "casos" not in data_df.columns:
+def calculate_score(
+    prediction_id: int,
+    confidence_level: float = 0.9,
+    prediction: Optional[QuantitativePrediction] = None,
+    ground_truth: Optional[pd.DataFrame] = None,
+) -> dict[str, float | None]:
+    """
+    Scores the prediction against the cases in Historico_alerta (see
+    `registry.scoring`). The `ground_truth` of the prediction's
+    `scoring_target` can be passed, over a window covering the prediction's
+    """
+    if prediction is None:
+        prediction = QuantitativePrediction.objects.get(id=prediction_id)
+
+    scores: dict[str, float | None] = {s: None for s in scoring.SCORES}
+
+    target = scoring_target(prediction)
+    if not target:
         return scores
 
-    data_df = data_df[["date", "casos"]]
-    data_df.date = pd.to_datetime(data_df.date)
+    start_window_date = prediction.start_date
+    end_window_date = prediction.end_date
 
-    staff_user = User.objects.filter(is_staff=True).first()
-    if not staff_user:
+    if not start_window_date or not end_window_date:
         return scores
 
-    score = Scorer(staff_user.api_key, df_true=data_df, pred=pred_df)  # type: ignore[attr-defined]
+    if ground_truth is not None:
+        data_df = slice_window(
+            ground_truth, start_window_date, end_window_date
+        )
+    else:
+        data_df = hist_alerta_data(
+            start_window_date=start_window_date,
+            end_window_date=end_window_date,
+            **target,
+        )
 
-    for s in ["mae", "mse", "crps", "log_score", "interval_score", "wis"]:
-        if s in score.summary and "pred" in score.summary[s]:
-            scores[s] = score.summary[s]["pred"]
+    pred_df = pd.DataFrame(
+        list(prediction.data.values("date", *scoring.QUANTILES))
+    )
+
+    if data_df.empty or pred_df.empty:
+        return scores
 
+    rows = ground_truth_rows(pred_df, data_df, on=["date"])
+    rows["prediction_id"] = prediction.id
+    scores.update(scoring.score(rows).get(prediction.id, {}))
     return scores